@@ -1,7 +1,62 @@
 import sys
 from chess.model.game import Game
 
+
+def _perft(args):
+    from chess.model.perft import main
+    return main(args)
+
+
+def _smp(args):
+    from chess.engine.parallel import main
+    return main(args)
+
+
+def _replay(args):
+    from chess.data.replay import main
+    return main(args)
+
+
+def _serve(args):
+    from chess.net.server import main
+    return main(args)
+
+
+def _uci(args):
+    from chess.engine.uci import main
+    return main(args)
+
+
+def _book(args):
+    from chess.data.book import main
+    return main(args)
+
+
+def _tablebase(args):
+    from chess.data.tablebase import main
+    return main(args)
+
+
+def _tournament(args):
+    from chess.engine.tournament import main
+    return main(args)
+
+
+commands = {
+    "perft": _perft,
+    "smp": _smp,
+    "replay": _replay,
+    "serve": _serve,
+    "uci": _uci,
+    "tournament": _tournament,
+    "book": _book,
+    "tablebase": _tablebase
+}
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        sys.exit(commands[sys.argv[1]](sys.argv[2:]))
+
     game: Game = Game()
     if len(sys.argv) > 1:
         # print(game.board)
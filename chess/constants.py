@@ -11,3 +11,10 @@ ROOK_DIRECTIONS: Coord2DSet = {(0, 1), (1, 0), (0, -1), (-1, 0)}
 BISHOP_DIRECTIONS: Coord2DSet = {(1, 1), (1, -1), (-1, 1), (-1, -1)}
 QUEEN_DIRECTIONS: Coord2DSet = ROOK_DIRECTIONS.union(BISHOP_DIRECTIONS)
 KING_DIRECTIONS: Coord2DSet = QUEEN_DIRECTIONS
+
+# castling rights flags
+WHITE_KINGSIDE: int = 1
+WHITE_QUEENSIDE: int = 2
+BLACK_KINGSIDE: int = 4
+BLACK_QUEENSIDE: int = 8
+ALL_CASTLING: int = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
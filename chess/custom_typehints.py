@@ -9,3 +9,6 @@ GameStatus = Enum("GameStatus",
                   ["NORMAL", "DRAW", "WHITE_WIN", "BLACK_WIN", "WHITE_CHECKS_BLACK", "BLACK_CHECKS_WHITE"])
 Coord2D = Tuple[int, int]
 Coord2DSet = Set[Coord2D]
+Square = int
+Bitboard = int
+Move = int
@@ -0,0 +1,230 @@
+"""
+Opening book in the Polyglot layout, read through mmap.
+
+A book file is a sequence of 16-byte big-endian entries sorted by key:
+
+    key     8 bytes  Zobrist key of the position, see Game.zobrist_key
+    move    2 bytes  to file, to row, from file, from row and promotion
+                     piece in 3 bits each from the low bits up, rows
+                     counted from white's side and promotions numbered
+                     1-4 for knight to queen; castling is stored as the
+                     king taking its own rook, e.g. e1h1
+    weight  2 bytes  how often the move should be chosen relative to the
+                     other moves of the position
+    learn   4 bytes  unused, kept zero
+
+The entry layout and move encoding are those of Polyglot, but the keys are
+this package's Zobrist keys rather than the Polyglot random table, so
+books built elsewhere will not match any position. Build books from PGN
+with build_book or python -m chess book.
+
+A lookup is a binary search over the mapped file followed by a scan over
+the entries of the position, so only a handful of pages are touched.
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from chess.custom_typehints import Colour, Move
+from chess.model.bitboard import KING
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.move import encode_move, to_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.pgn import PgnGame, parse_san, read_games
+
+_ENTRY = struct.Struct(">QHHI")
+_KEY = struct.Struct(">Q")
+ENTRY_BYTES: int = _ENTRY.size
+MAX_WEIGHT: int = 0xFFFF
+DEFAULT_MAX_PLY: int = 20
+# king moves stored as the king taking its rook, by the king's destination
+_CASTLING_TO_ROOK: Dict[Tuple[int, int], int] = {(60, 62): 63, (60, 58): 56, (4, 6): 7, (4, 2): 0}
+_ROOK_TO_CASTLING: Dict[Tuple[int, int], int] = {(king, rook): to for (king, to), rook in _CASTLING_TO_ROOK.items()}
+
+
+class BookEntry(NamedTuple):
+    key: int
+    move: int
+    weight: int
+    learn: int = 0
+
+
+def encode_book_move(game: Game, move: Move) -> int:
+    """Polyglot encoding of *move* played in the position of *game*"""
+    from_sq: int = move & 63
+    to_sq: int = move >> 6 & 63
+    if game.board.codes[from_sq] % 6 == KING:
+        to_sq = _CASTLING_TO_ROOK.get((from_sq, to_sq), to_sq)
+    return (to_sq & 7) | (7 - (to_sq >> 3)) << 3 | (from_sq & 7) << 6 | (7 - (from_sq >> 3)) << 9 | (move >> 12) << 12
+
+
+def decode_book_move(game: Game, book_move: int) -> Move:
+    """Move of the Polyglot encoded *book_move* in the position of *game*, not checked for legality"""
+    to_sq: int = (7 - (book_move >> 3 & 7)) * 8 + (book_move & 7)
+    from_sq: int = (7 - (book_move >> 9 & 7)) * 8 + (book_move >> 6 & 7)
+    if game.board.codes[from_sq] % 6 == KING:
+        to_sq = _ROOK_TO_CASTLING.get((from_sq, to_sq), to_sq)
+    return encode_move(from_sq, to_sq, book_move >> 12 & 7)
+
+
+class OpeningBook:
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a book file for lookups
+        :raises ValueError: when the file size is not a whole number of entries
+        """
+        self.path: str = path
+        self._file = open(path, "rb")
+        size: int = os.fstat(self._file.fileno()).st_size
+        if size % ENTRY_BYTES:
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book")
+        self._count: int = size // ENTRY_BYTES
+        # an empty file cannot be mapped
+        self._data: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if size else None
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def entries(self, key: int) -> List[BookEntry]:
+        """Entries stored for Zobrist *key* in file order, heaviest first in books from build_book"""
+        data: Optional[mmap.mmap] = self._data
+        low: int = 0
+        high: int = self._count
+        while low < high:
+            middle: int = (low + high) // 2
+            if _KEY.unpack_from(data, middle * ENTRY_BYTES)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found: List[BookEntry] = []
+        while low < self._count:
+            entry: BookEntry = BookEntry(*_ENTRY.unpack_from(data, low * ENTRY_BYTES))
+            if entry.key != key:
+                break
+            found.append(entry)
+            low += 1
+        return found
+
+    def moves(self, game: Game) -> List[Tuple[Move, int]]:
+        """
+        Book moves of the position of *game* with their weights, moves that
+        are illegal in the position (a key collision) are left out
+        """
+        legal: List[Move] = generate_legal_moves(game)
+        found: List[Tuple[Move, int]] = []
+        for entry in self.entries(game.zobrist_key):
+            move: Move = decode_book_move(game, entry.move)
+            if move in legal:
+                found.append((move, entry.weight))
+        return found
+
+    def choose(self, game: Game, rng: Optional[random.Random] = None, best: bool = False) -> Optional[Move]:
+        """
+        Pick a book move for the position of *game*
+        :param rng: random source, the module's by default
+        :param best: take the heaviest move instead of a weighted random one
+        :return: the move or None when the position is not in the book
+        """
+        candidates: List[Tuple[Move, int]] = [(move, weight) for move, weight in self.moves(game) if weight > 0]
+        if not candidates:
+            return None
+        if best:
+            return max(candidates, key=lambda candidate: candidate[1])[0]
+        rng = rng if rng is not None else random
+        pick: int = rng.randrange(sum(weight for _, weight in candidates))
+        for move, weight in candidates:
+            pick -= weight
+            if pick < 0:
+                return move
+        return candidates[-1][0]
+
+    def close(self) -> None:
+        if self._data is not None and not self._data.closed:
+            self._data.close()
+        self._file.close()
+
+
+def _result_points(result: str, white: bool) -> int:
+    """Weight a move earns: 2 for a win of the side that played it, 1 for a draw or an unknown result"""
+    if result == "1/2-1/2" or result not in ("1-0", "0-1"):
+        return 1
+    return 2 if (result == "1-0") == white else 0
+
+
+def build_book(sources: Iterable[Union[str, PgnGame]], path: str, max_ply: int = DEFAULT_MAX_PLY,
+               min_weight: int = 1) -> int:
+    """
+    Compile an opening book from games
+    :param sources: PGN file paths or parsed games
+    :param path: book file to write, replaced atomically
+    :param max_ply: moves after this many plies of a game are not added
+    :param min_weight: entries lighter than this are dropped
+    :return: number of entries written
+    """
+    weights: Dict[Tuple[int, int], int] = {}
+    for source in sources:
+        for record in read_games(source) if isinstance(source, str) else (source,):
+            game: Game = game_from_fen(record.headers.get("FEN", STARTING_FEN))
+            for san in record.moves[:max_ply]:
+                try:
+                    move: Move = parse_san(game, san)
+                except ValueError:
+                    break
+                entry: Tuple[int, int] = (game.zobrist_key, encode_book_move(game, move))
+                weights[entry] = weights.get(entry, 0) + _result_points(record.result, game.turn() is Colour.WHITE)
+                game.make_move(move)
+
+    # weights are 16 bit, scale the moves of a position down together
+    heaviest: Dict[int, int] = {}
+    for (key, _), weight in weights.items():
+        heaviest[key] = max(heaviest.get(key, 0), weight)
+    entries: List[BookEntry] = []
+    for (key, book_move), weight in weights.items():
+        if heaviest[key] > MAX_WEIGHT:
+            weight = weight * MAX_WEIGHT // heaviest[key]
+        if weight >= min_weight:
+            entries.append(BookEntry(key, book_move, weight))
+    entries.sort(key=lambda entry: (entry.key, -entry.weight, entry.move))
+
+    temporary: str = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        for entry in entries:
+            handle.write(_ENTRY.pack(*entry))
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: book <output> <pgn files> [--max-ply N] [--min-weight N] [--probe FEN]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(prog="python -m chess book", description="build an opening book from PGN files")
+    parser.add_argument("output")
+    parser.add_argument("pgn", nargs="*")
+    parser.add_argument("--max-ply", type=int, default=DEFAULT_MAX_PLY, help="plies of each game to add")
+    parser.add_argument("--min-weight", type=int, default=1, help="drop lighter entries")
+    parser.add_argument("--probe", default=None, metavar="FEN", help="list the book moves of a position instead")
+    options = parser.parse_args(args)
+
+    if options.probe is not None:
+        with OpeningBook(options.output) as book:
+            for move, weight in book.moves(game_from_fen(options.probe)):
+                print(f"{to_uci(move)} {weight}")
+        return 0
+    count: int = build_book(options.pgn, options.output, options.max_ply, options.min_weight)
+    print(f"{count} entries written to {options.output}")
+    return 0
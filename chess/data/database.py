@@ -0,0 +1,274 @@
+"""
+On-disk position store that is queried through mmap instead of being loaded.
+
+A database is two files next to each other:
+
+<path>.dat: a 24-byte header (magic, record size, record count) followed by
+fixed width records. Each record holds the Zobrist key, the 32-byte position
+from chess.model.encoding, and four 32-bit counters: games, white wins,
+draws and black wins.
+
+<path>.idx: a 24-byte header (magic, capacity, count) followed by an
+open-addressing hash table. Each slot holds a key and its record number
+plus one, and a slot holding 0 is empty. Zobrist keys are uniformly
+distributed, so the low bits of the key pick the slot and collisions are
+resolved by linear probing. The table is kept at most half full and
+doubles when it fills up; a database opened with the number of positions
+it is expected to hold is sized for them up front, so appends never stop
+to rehash. The index is built inside a mapping of its file, never in RAM.
+
+A lookup touches one or two index slots and one record, all through the
+page cache. Only the pages that are actually read come into memory, so the
+size of the dataset is bounded by disk rather than RAM. Adding a position
+that is already stored updates its counters in place.
+"""
+import mmap
+import os
+import struct
+from typing import Iterator, NamedTuple, Optional
+
+from chess.model.encoding import POSITION_BYTES, encode_position, decode_position
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.pgn import PgnGame, parse_san
+
+DATA_MAGIC: bytes = b"CHPOSDAT"
+INDEX_MAGIC: bytes = b"CHPOSIDX"
+
+_HEADER = struct.Struct("<8sQQ")
+_RECORD = struct.Struct(f"<Q{POSITION_BYTES}s4I")
+_SLOT = struct.Struct("<QQ")
+_KEY = struct.Struct("<Q")
+RECORD_BYTES: int = _RECORD.size
+MIN_CAPACITY: int = 1024
+_KEY_MASK: int = (1 << 64) - 1
+
+
+class PositionEntry(NamedTuple):
+    key: int
+    position: bytes
+    games: int
+    white_wins: int
+    draws: int
+    black_wins: int
+
+    def game(self) -> Game:
+        """The stored position as a Game"""
+        return decode_position(self.position)
+
+
+class PositionDatabase:
+
+    def __init__(self, path: str, writable: bool = False, expected_positions: int = 0) -> None:
+        """
+        Open the database stored in <path>.dat and <path>.idx
+        :param path: path of the two files without their extension
+        :param writable: allow adding positions, the files are created when missing
+        :param expected_positions: size the index for this many positions, see reserve
+        :raises FileNotFoundError: when a read only database does not exist
+        :raises ValueError: when the files are not position database files
+        """
+        self.path: str = path
+        self.writable: bool = writable
+        self._data_path: str = path + ".dat"
+        self._index_path: str = path + ".idx"
+        if writable and not os.path.exists(self._data_path):
+            with open(self._data_path, "wb") as handle:
+                handle.write(_HEADER.pack(DATA_MAGIC, RECORD_BYTES, 0))
+
+        self._data_file = open(self._data_path, "r+b" if writable else "rb")
+        self._data: mmap.mmap = self._map(self._data_file)
+        magic, record_bytes, self._count = _HEADER.unpack_from(self._data)
+        if magic != DATA_MAGIC or record_bytes != RECORD_BYTES:
+            self._data_file.close()
+            raise ValueError(f"{self._data_path} is not a position database")
+
+        if writable and not self._index_is_current():
+            self.rebuild_index()
+        self._index_file = open(self._index_path, "r+b" if writable else "rb")
+        self._index: mmap.mmap = self._map(self._index_file)
+        magic, self._capacity, count = _HEADER.unpack_from(self._index)
+        if magic != INDEX_MAGIC or count != self._count:
+            self.close()
+            raise ValueError(f"{self._index_path} does not index {self._data_path}, reopen writable to rebuild it")
+        if expected_positions:
+            self.reserve(expected_positions)
+
+    def _map(self, handle) -> mmap.mmap:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ)
+
+    def __enter__(self) -> "PositionDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: int) -> bool:
+        return self._find(key)[1] >= 0
+
+    def __iter__(self) -> Iterator[PositionEntry]:
+        """Stored entries in insertion order"""
+        for number in range(self._count):
+            yield PositionEntry(*_RECORD.unpack_from(self._data, _HEADER.size + number * RECORD_BYTES))
+
+    def _index_is_current(self) -> bool:
+        if not os.path.exists(self._index_path):
+            return False
+        with open(self._index_path, "rb") as handle:
+            header: bytes = handle.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            return False
+        magic, capacity, count = _HEADER.unpack(header)
+        return magic == INDEX_MAGIC and count == self._count and \
+            os.path.getsize(self._index_path) == _HEADER.size + capacity * _SLOT.size
+
+    def _find(self, key: int):
+        """
+        Probe the index for *key*
+        :return: offset of the slot holding the key or of the empty slot that
+        ends the probe sequence, and the record number or -1 when not stored
+        """
+        key &= _KEY_MASK
+        index: mmap.mmap = self._index
+        mask: int = self._capacity - 1
+        slot: int = key & mask
+        while True:
+            offset: int = _HEADER.size + slot * _SLOT.size
+            stored_key, value = _SLOT.unpack_from(index, offset)
+            if not value:
+                return offset, -1
+            if stored_key == key:
+                return offset, value - 1
+            slot = (slot + 1) & mask
+
+    def get(self, key: int) -> Optional[PositionEntry]:
+        """
+        The entry stored for Zobrist *key*
+        :return: the entry or None when the position was never added
+        """
+        number: int = self._find(key)[1]
+        if number < 0:
+            return None
+        return PositionEntry(*_RECORD.unpack_from(self._data, _HEADER.size + number * RECORD_BYTES))
+
+    def lookup(self, game: Game) -> Optional[PositionEntry]:
+        """The entry stored for the position of *game*"""
+        return self.get(game.zobrist_key)
+
+    def add(self, game: Game, result: str = "*") -> None:
+        """
+        Count one more game through the position of *game*
+        :param result: "1-0", "0-1" or "1/2-1/2" to count towards the outcome, anything else only counts the game
+        """
+        if not self.writable:
+            raise PermissionError("database is open read only")
+        key: int = game.zobrist_key
+        outcome: int = {"1-0": 1, "1/2-1/2": 2, "0-1": 3}.get(result, 0)
+        slot_offset, number = self._find(key)
+        if number >= 0:
+            offset: int = _HEADER.size + number * RECORD_BYTES
+            entry = list(_RECORD.unpack_from(self._data, offset))
+            entry[2] += 1
+            if outcome:
+                entry[2 + outcome] += 1
+            _RECORD.pack_into(self._data, offset, *entry)
+            return
+
+        if 2 * (self._count + 1) > self._capacity:
+            self._grow_index(2 * self._capacity)
+            slot_offset = self._find(key)[0]
+        counts = [1, 0, 0, 0]
+        if outcome:
+            counts[outcome] = 1
+        self._append(_RECORD.pack(key, encode_position(game), *counts))
+        _SLOT.pack_into(self._index, slot_offset, key, self._count)
+        _HEADER.pack_into(self._index, 0, INDEX_MAGIC, self._capacity, self._count)
+
+    def add_game(self, record: PgnGame) -> int:
+        """
+        Count every position of a game record towards its result
+        :raises ValueError: when the record holds an illegal move, positions before it are added
+        :return: number of positions added
+        """
+        game: Game = game_from_fen(record.headers.get("FEN", STARTING_FEN))
+        self.add(game, record.result)
+        for san in record.moves:
+            game.make_move(parse_san(game, san))
+            self.add(game, record.result)
+        return len(record.moves) + 1
+
+    def _append(self, record: bytes) -> None:
+        end: int = _HEADER.size + self._count * RECORD_BYTES
+        if end + RECORD_BYTES > len(self._data):
+            # grow the file ahead of the records so the mapping is not redone on every append
+            self._data.close()
+            self._data_file.truncate(max(end + RECORD_BYTES, 2 * end))
+            self._data = self._map(self._data_file)
+        self._data[end:end + RECORD_BYTES] = record
+        self._count += 1
+        _HEADER.pack_into(self._data, 0, DATA_MAGIC, RECORD_BYTES, self._count)
+
+    def reserve(self, positions: int) -> None:
+        """
+        Size the index for *positions* stored positions, so that adding up
+        to that many does not rehash it again
+        """
+        if not self.writable:
+            raise PermissionError("database is open read only")
+        if 2 * positions > self._capacity:
+            self._grow_index(2 * positions)
+
+    def _grow_index(self, capacity: int) -> None:
+        self._index.close()
+        self._index_file.close()
+        self.rebuild_index(capacity)
+        self._index_file = open(self._index_path, "r+b")
+        self._index = self._map(self._index_file)
+        self._capacity = _HEADER.unpack_from(self._index)[1]
+
+    def rebuild_index(self, capacity: int = MIN_CAPACITY) -> None:
+        """
+        Write the index file again from the records, e.g. after it was lost
+        :param capacity: slots to allocate, raised to a power of two at least twice the record count
+        """
+        while capacity < 2 * self._count or capacity & (capacity - 1):
+            capacity = 1 << capacity.bit_length()
+        mask: int = capacity - 1
+        temporary: str = self._index_path + ".tmp"
+        with open(temporary, "w+b") as handle:
+            # sized on disk and filled through the mapping, only touched pages are in memory
+            handle.truncate(_HEADER.size + capacity * _SLOT.size)
+            with mmap.mmap(handle.fileno(), 0) as slots:
+                for number in range(self._count):
+                    key: int = _KEY.unpack_from(self._data, _HEADER.size + number * RECORD_BYTES)[0]
+                    slot: int = key & mask
+                    while _KEY.unpack_from(slots, _HEADER.size + slot * _SLOT.size + 8)[0]:
+                        slot = (slot + 1) & mask
+                    _SLOT.pack_into(slots, _HEADER.size + slot * _SLOT.size, key, number + 1)
+                # written last so an interrupted rebuild is not taken for a complete index
+                _HEADER.pack_into(slots, 0, INDEX_MAGIC, capacity, self._count)
+        os.replace(temporary, self._index_path)
+
+    def flush(self) -> None:
+        """Write changes through to disk"""
+        if self.writable:
+            self._data.flush()
+            self._index.flush()
+
+    def close(self) -> None:
+        for name in ("_data", "_index"):
+            mapped: Optional[mmap.mmap] = getattr(self, name, None)
+            if mapped is not None and not mapped.closed:
+                if self.writable:
+                    mapped.flush()
+                mapped.close()
+        if self.writable and not self._data_file.closed:
+            # drop the space reserved for appends
+            self._data_file.truncate(_HEADER.size + self._count * RECORD_BYTES)
+        for name in ("_data_file", "_index_file"):
+            handle = getattr(self, name, None)
+            if handle is not None:
+                handle.close()
@@ -0,0 +1,235 @@
+"""
+Batch replay of game files into per-position records.
+
+The games of every PGN file in a directory are read in the main process,
+cut into chunks of a fixed number of games and replayed by a pool of worker
+processes. Each chunk is written to its own shard file, one tab separated
+line per position:
+
+    FEN, Zobrist key (hex), side to move (w/b), number of legal moves, in check (0/1)
+
+Shards are written under a temporary name and renamed once complete, so an
+existing shard is always whole and a rerun skips it. A game with an illegal
+or unreadable move is reported and replay carries on with the next game; a
+worker process that dies takes its pool down with it, the pool is then
+restarted and the chunks that were in flight are retried.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from chess.custom_typehints import Colour
+from chess.model.fen import STARTING_FEN, game_from_fen, game_to_fen
+from chess.model.game import Game, is_in_check
+from chess.model.move_generator import generate_legal_moves
+from chess.model.pgn import PgnGame, read_games, parse_san, open_text
+
+GAME_FILE_SUFFIXES = (".pgn", ".pgn.gz", ".pgn.bz2", ".pgn.zst")
+
+# a labelled game: "<file>:<game number>" and the record itself
+LabelledGame = Tuple[str, PgnGame]
+
+
+@dataclass
+class ChunkResult:
+    index: int
+    games: int = 0
+    positions: int = 0
+    errors: List[str] = field(default_factory=list)
+    skipped: bool = False
+
+
+@dataclass
+class BatchSummary:
+    chunks: int = 0
+    games: int = 0
+    positions: int = 0
+    skipped_chunks: int = 0
+    errors: List[str] = field(default_factory=list)
+    failed_chunks: List[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add(self, result: ChunkResult) -> None:
+        self.chunks += 1
+        self.games += result.games
+        self.positions += result.positions
+        self.skipped_chunks += result.skipped
+        self.errors.extend(result.errors)
+
+
+def find_game_files(directory: str) -> List[str]:
+    """PGN files, compressed or not, anywhere under *directory* in a stable order"""
+    paths: List[str] = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in names if name.endswith(GAME_FILE_SUFFIXES))
+    return sorted(paths)
+
+
+def shard_path(output_dir: str, index: int, compress: bool = False) -> str:
+    return os.path.join(output_dir, f"positions-{index:06d}.tsv" + (".gz" if compress else ""))
+
+
+def position_lines(record: PgnGame) -> Iterator[str]:
+    """
+    Replay *record* and describe every position of it, the final one included
+    :raises ValueError: when the record holds an illegal move or a bad FEN tag,
+    positions before it have been yielded by then
+    """
+    game: Game = game_from_fen(record.headers.get("FEN", STARTING_FEN))
+    for ply in range(len(record.moves) + 1):
+        moves = generate_legal_moves(game)
+        side: Colour = game.turn()
+        yield f"{game_to_fen(game)}\t{game.zobrist_key:016x}\t{'w' if side is Colour.WHITE else 'b'}\t" \
+              f"{len(moves)}\t{int(is_in_check(game.board, side))}\n"
+        if ply < len(record.moves):
+            game.make_move(parse_san(game, record.moves[ply], moves))
+
+
+def _replay_chunk(index: int, games: List[LabelledGame], output_dir: str, compress: bool) -> ChunkResult:
+    """Replay one chunk of games into its shard, run in a worker process"""
+    result: ChunkResult = ChunkResult(index)
+    path: str = shard_path(output_dir, index, compress)
+    temporary: str = path + ".tmp" + (".gz" if compress else "")
+    with open_text(temporary, "w") as output:
+        for label, record in games:
+            result.games += 1
+            try:
+                for line in position_lines(record):
+                    output.write(line)
+                    result.positions += 1
+            except ValueError as error:
+                result.errors.append(f"{label}: {error}")
+    os.replace(temporary, path)
+    return result
+
+
+def _chunks(paths: List[str], chunk_size: int) -> Iterator[Tuple[int, List[LabelledGame]]]:
+    chunk: List[LabelledGame] = []
+    index: int = 0
+    for path in paths:
+        for number, record in enumerate(read_games(path), 1):
+            chunk.append((f"{path}:{number}", record))
+            if len(chunk) == chunk_size:
+                yield index, chunk
+                chunk, index = [], index + 1
+    if chunk:
+        yield index, chunk
+
+
+def run_batch(input_dir: str, output_dir: str, workers: Optional[int] = None, chunk_size: int = 100,
+              compress: bool = False, max_attempts: int = 3,
+              progress: Optional[Callable[[BatchSummary], None]] = None) -> BatchSummary:
+    """
+    Replay every game file under *input_dir* into shards in *output_dir*
+    :param workers: number of worker processes, one per CPU by default
+    :param chunk_size: games per chunk, and so per shard file
+    :param compress: gzip the shards
+    :param max_attempts: times a chunk is tried when worker processes keep dying
+    :param progress: called with the running totals after every chunk
+    :return: totals of the batch, errors of individual games and chunks that
+    could not be completed
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk size must be at least 1")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    summary: BatchSummary = BatchSummary()
+    start: float = time.perf_counter()
+    chunks: Iterator[Tuple[int, List[LabelledGame]]] = _chunks(find_game_files(input_dir), chunk_size)
+    # chunks to (re)submit and chunks in flight, with the attempts made so far
+    queue: List[Tuple[int, List[LabelledGame], int]] = []
+    pending: Dict[Future, Tuple[int, List[LabelledGame], int]] = {}
+    exhausted: bool = False
+
+    def finish(result: ChunkResult) -> None:
+        summary.add(result)
+        summary.elapsed = time.perf_counter() - start
+        if progress is not None:
+            progress(summary)
+
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while True:
+            # keep the pool busy without reading further ahead than needed
+            while len(pending) < 2 * workers and (queue or not exhausted):
+                if queue:
+                    index, games, attempts = queue.pop(0)
+                else:
+                    try:
+                        index, games = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    attempts = 0
+                    if os.path.exists(shard_path(output_dir, index, compress)):
+                        finish(ChunkResult(index, games=len(games), skipped=True))
+                        continue
+                future: Future = executor.submit(_replay_chunk, index, games, output_dir, compress)
+                pending[future] = (index, games, attempts + 1)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            broken: bool = False
+            for future in done:
+                index, games, attempts = pending.pop(future)
+                try:
+                    finish(future.result())
+                except BrokenProcessPool:
+                    broken = True
+                    queue.append((index, games, attempts))
+                except Exception as error:
+                    summary.errors.append(f"chunk {index}: {error!r}")
+                    summary.failed_chunks.append(index)
+            if broken:
+                # every chunk in flight went down with the pool
+                queue.extend(pending.values())
+                pending.clear()
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                for entry in list(queue):
+                    if entry[2] >= max_attempts:
+                        queue.remove(entry)
+                        summary.errors.append(f"chunk {entry[0]}: worker died {entry[2]} times")
+                        summary.failed_chunks.append(entry[0])
+                queue.sort(key=lambda entry: entry[0])
+    finally:
+        executor.shutdown(wait=True)
+    summary.failed_chunks.sort()
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def _print_progress(summary: BatchSummary, stream: TextIO = sys.stderr) -> None:
+    rate: float = summary.positions / summary.elapsed if summary.elapsed > 0 else 0.0
+    print(f"\rchunks {summary.chunks}  games {summary.games}  positions {summary.positions}  "
+          f"errors {len(summary.errors)}  {rate:.0f} positions/s", end="", file=stream, flush=True)
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: replay <input dir> <output dir> [--workers N] [--chunk-size N] [--gzip]
+    :return: exit status, 1 when some chunks could not be completed
+    """
+    parser = argparse.ArgumentParser(prog="python -m chess replay",
+                                     description="replay game files into per-position records")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per CPU by default")
+    parser.add_argument("--chunk-size", type=int, default=100, help="games per shard")
+    parser.add_argument("--gzip", action="store_true", help="compress the shards")
+    options = parser.parse_args(args)
+
+    summary: BatchSummary = run_batch(options.input_dir, options.output_dir, options.workers,
+                                      options.chunk_size, options.gzip, progress=_print_progress)
+    print(file=sys.stderr)
+    for error in summary.errors:
+        print(error, file=sys.stderr)
+    print(f"{summary.games} games, {summary.positions} positions in {summary.elapsed:.2f}s, "
+          f"{summary.skipped_chunks} chunks already done, {len(summary.failed_chunks)} failed")
+    return 1 if summary.failed_chunks else 0
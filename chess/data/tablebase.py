@@ -0,0 +1,437 @@
+"""
+Native endgame tablebases for king and queen, king and rook and king and
+pawn against a lone king (KQK, KRK and KPK).
+
+Tables are generated here by retrograde analysis: starting from the
+positions where the lone king is mated, wins are propagated backwards one
+ply at a time through un-moves of the strong side, and a position of the
+lone king is lost once every one of its moves runs into a win found
+earlier. Pawn promotions are looked up in the finished KQK and KRK tables.
+
+Each table is a file of one byte per position after a 16-byte header
+(magic, table name, entry count). The strong side is stored as white, the
+index is side to move, white king, black king and piece square, 6 bits
+each, side to move highest. A byte of 0 is a draw (or an illegal
+position), any other value v means the side to move wins (white to move)
+or loses (black to move) with mate v - 1 plies away. Positions with the
+colours reversed are probed through the vertical mirror.
+
+Files are read through mmap and pages of them are kept in a bounded least
+recently used cache, so a probe normally touches no file at all.
+"""
+import argparse
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from chess.custom_typehints import Bitboard, Move
+from chess.model.attacks import KING_ATTACKS, PAWN_ATTACKS, rook_attacks, queen_attacks
+from chess.model.bitboard import BitBoard, INDEX_COLOUR, PAWN, ROOK, QUEEN, KING, SQUARE_BITS, iter_squares, popcount
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import to_uci
+from chess.model.move_generator import generate_legal_moves
+
+MAGIC: bytes = b"CHESSTB1"
+_HEADER = struct.Struct("<8s4sI")
+TABLE_SIZE: int = 2 << 18
+PAGE_BYTES: int = 4096
+DEFAULT_CACHE_PAGES: int = 256
+TABLE_PIECES: Dict[str, int] = {"KQK": QUEEN, "KRK": ROOK, "KPK": PAWN}
+# wins and losses from the point of view of the side to move
+WIN, DRAW, LOSS = 1, 0, -1
+
+
+class TablebaseResult(NamedTuple):
+    # WIN, DRAW or LOSS for the side to move
+    wdl: int
+    # plies to mate with best play, 0 for draws
+    dtm: int
+
+
+def table_index(white_to_move: bool, white_king: int, black_king: int, piece: int) -> int:
+    return (0 if white_to_move else 1) << 18 | white_king << 12 | black_king << 6 | piece
+
+
+def _piece_attacks(piece_type: int) -> Callable[[int, Bitboard], Bitboard]:
+    if piece_type == QUEEN:
+        return queen_attacks
+    if piece_type == ROOK:
+        return rook_attacks
+    return lambda square, occupied: PAWN_ATTACKS[0][square]
+
+
+def _square_maps() -> List[List[int]]:
+    """The 8 symmetries of the board as square to square tables, the identity first and the mirror of files second"""
+    maps: List[List[int]] = []
+    for transpose in (False, True):
+        for flip_y in (0, 7):
+            for flip_x in (0, 7):
+                table: List[int] = []
+                for square in range(64):
+                    x, y = square & 7, square >> 3
+                    if transpose:
+                        x, y = y, x
+                    table.append((y ^ flip_y) * 8 + (x ^ flip_x))
+                maps.append(table)
+    return maps
+
+
+SQUARE_MAPS: List[List[int]] = _square_maps()
+# symmetry taking the white king to the a1-d1-d4 triangle, for tables without pawns
+KING_SYMMETRY: List[int] = [next(i for i, table in enumerate(SQUARE_MAPS)
+                                 if (table[square] & 7) <= 3 <= (table[square] >> 3) and
+                                 (table[square] & 7) + (table[square] >> 3) >= 7)
+                            for square in range(64)]
+KING_SQUARES: List[List[int]] = [list(iter_squares(KING_ATTACKS[square])) for square in range(64)]
+# reflection in the a1-h8 diagonal and the side of it each square is on
+DIAGONAL_MIRROR: List[int] = [(7 - (square & 7)) * 8 + 7 - (square >> 3) for square in range(64)]
+DIAGONAL_SIDE: List[int] = [((square & 7) + (square >> 3) > 7) - ((square & 7) + (square >> 3) < 7) for square in range(64)]
+# mirror taking the pawn to the a-d files
+PAWN_SYMMETRY: List[int] = [0 if square & 7 <= 3 else 1 for square in range(64)]
+
+
+def _is_legal(piece_type: int, white_to_move: bool, white_king: int, black_king: int, piece: int) -> bool:
+    if white_king == black_king or piece in (white_king, black_king) or KING_ATTACKS[white_king] >> black_king & 1:
+        return False
+    if piece_type == PAWN and not 1 <= piece >> 3 <= 6:
+        return False
+    # the side not to move cannot be in check, only the black king can be
+    return not white_to_move or \
+        not _piece_attacks(piece_type)(piece, SQUARE_BITS[white_king] | SQUARE_BITS[black_king]) >> black_king & 1
+
+
+def _canonical(piece_type: int) -> Callable[[int, int, int, int], int]:
+    """Index of the position standing for all positions symmetric to it"""
+    if piece_type == PAWN:
+        def canonical(side: int, white_king: int, black_king: int, piece: int) -> int:
+            table: List[int] = SQUARE_MAPS[PAWN_SYMMETRY[piece]]
+            return side << 18 | table[white_king] << 12 | table[black_king] << 6 | table[piece]
+    else:
+        def canonical(side: int, white_king: int, black_king: int, piece: int) -> int:
+            table: List[int] = SQUARE_MAPS[KING_SYMMETRY[white_king]]
+            white_king, black_king, piece = table[white_king], table[black_king], table[piece]
+            # a king on the diagonal of the triangle leaves the reflection in it to choose
+            if not DIAGONAL_SIDE[white_king] and (DIAGONAL_SIDE[black_king] or DIAGONAL_SIDE[piece]) < 0:
+                table = DIAGONAL_MIRROR
+                white_king, black_king, piece = table[white_king], table[black_king], table[piece]
+            return side << 18 | white_king << 12 | black_king << 6 | piece
+    return canonical
+
+
+def generate_table(name: str, promotions: Optional[Dict[str, bytearray]] = None) -> bytearray:
+    """
+    Solve one table by retrograde analysis. Only one position of each set
+    of symmetric positions is solved, the others are filled in at the end.
+    :param name: KQK, KRK or KPK
+    :param promotions: solved KQK and KRK tables, needed for KPK
+    :return: one byte per index, see the module documentation
+    """
+    piece_type: int = TABLE_PIECES[name]
+    attacks: Callable[[int, Bitboard], Bitboard] = _piece_attacks(piece_type)
+    canonical: Callable[[int, int, int, int], int] = _canonical(piece_type)
+    table: bytearray = bytearray(TABLE_SIZE)
+
+    def black_moves(white_king: int, black_king: int, piece: int) -> Tuple[Optional[Bitboard], bool]:
+        """King moves of black and whether black is in check, None when black can take the piece"""
+        piece_bit: Bitboard = SQUARE_BITS[piece]
+        guarded: Bitboard = KING_ATTACKS[white_king]
+        if KING_ATTACKS[black_king] & piece_bit and not guarded & piece_bit:
+            return None, False
+        # the black king does not shield the squares behind it from a slider
+        piece_attacks: Bitboard = attacks(piece, SQUARE_BITS[white_king])
+        targets: Bitboard = KING_ATTACKS[black_king] & ~(guarded | piece_attacks | piece_bit)
+        return targets, bool(piece_attacks >> black_king & 1)
+
+    def mark_win(white_king: int, black_king: int, piece: int) -> None:
+        index: int = canonical(0, white_king, black_king, piece)
+        if not table[index] and _is_legal(piece_type, True, white_king, black_king, piece):
+            table[index] = distance + 2
+            next_layer.append(index)
+
+    if piece_type == PAWN:
+        symmetries: List[List[int]] = SQUARE_MAPS[:2]
+        positions: List[Tuple[int, int, int]] = [
+            (white_king, black_king, piece) for white_king in range(64) for black_king in range(64)
+            for piece in range(64) if piece & 7 <= 3]
+    else:
+        symmetries = SQUARE_MAPS
+        positions = [(white_king, black_king, piece) for white_king in range(64) if not KING_SYMMETRY[white_king]
+                     for black_king in range(64) for piece in range(64)
+                     if DIAGONAL_SIDE[white_king] or (DIAGONAL_SIDE[black_king] or DIAGONAL_SIDE[piece]) >= 0]
+
+    # distance 0: black to move and mated
+    layer: List[int] = []
+    for white_king, black_king, piece in positions:
+        if _is_legal(piece_type, False, white_king, black_king, piece):
+            targets, in_check = black_moves(white_king, black_king, piece)
+            if targets == 0 and in_check:
+                index: int = table_index(False, white_king, black_king, piece)
+                table[index] = 1
+                layer.append(index)
+
+    # wins by promoting, by distance
+    seeds: Dict[int, List[int]] = {}
+    if piece_type == PAWN:
+        for white_king, black_king, piece in positions:
+            promotion: int = piece - 8
+            if piece >> 3 != 1 or promotion in (white_king, black_king) or \
+                    not _is_legal(piece_type, True, white_king, black_king, piece):
+                continue
+            values: List[int] = [promotions[promoted][table_index(False, white_king, black_king, promotion)]
+                                 for promoted in ("KQK", "KRK")]
+            distance: int = min((value for value in values if value), default=0)
+            if distance:
+                seeds.setdefault(distance, []).append(table_index(True, white_king, black_king, piece))
+
+    solved: List[int] = []
+    distance = 0
+    while layer or any(seed > distance for seed in seeds):
+        solved.extend(layer)
+        next_layer: List[int] = []
+        for index in layer:
+            white_king, black_king, piece = index >> 12 & 63, index >> 6 & 63, index & 63
+            kings: Bitboard = SQUARE_BITS[white_king] | SQUARE_BITS[black_king]
+            if index >> 18:
+                # black to move and lost: every white move into it wins
+                blocked: Bitboard = KING_ATTACKS[black_king] | SQUARE_BITS[piece]
+                for origin in KING_SQUARES[white_king]:
+                    if not blocked >> origin & 1:
+                        mark_win(origin, black_king, piece)
+                if piece_type == PAWN:
+                    if piece + 8 < 56 and not kings >> (piece + 8) & 1:
+                        mark_win(white_king, black_king, piece + 8)
+                        if piece >> 3 == 4 and not kings >> (piece + 16) & 1:
+                            mark_win(white_king, black_king, piece + 16)
+                else:
+                    for origin in iter_squares(attacks(piece, kings) & ~kings):
+                        mark_win(white_king, black_king, origin)
+            else:
+                # white to move and winning: a black move into it may have been the last escape
+                blocked = KING_ATTACKS[white_king] | SQUARE_BITS[piece]
+                for origin in KING_SQUARES[black_king]:
+                    if blocked >> origin & 1:
+                        continue
+                    parent: int = canonical(1, white_king, origin, piece)
+                    if table[parent] or not _is_legal(piece_type, False, white_king, origin, piece):
+                        continue
+                    targets, _ = black_moves(white_king, origin, piece)
+                    if not targets:
+                        continue
+                    longest: int = 0
+                    for target in KING_SQUARES[origin]:
+                        if not targets >> target & 1:
+                            continue
+                        value: int = table[canonical(0, white_king, target, piece)]
+                        if not value:
+                            break
+                        longest = max(longest, value)
+                    else:
+                        table[parent] = longest + 1
+                        next_layer.append(parent)
+        distance += 1
+        for index in seeds.pop(distance, ()):
+            if not table[index]:
+                table[index] = distance + 1
+                next_layer.append(index)
+        layer = next_layer
+
+    # every other position is a win or a loss when a symmetric one is
+    for index in solved:
+        value = table[index]
+        side, white_king, black_king, piece = index & 1 << 18, index >> 12 & 63, index >> 6 & 63, index & 63
+        for square_map in symmetries:
+            table[side | square_map[white_king] << 12 | square_map[black_king] << 6 | square_map[piece]] = value
+    return table
+
+
+def write_table(path: str, name: str, table: bytearray) -> None:
+    """Write a solved table to *path*, replaced atomically"""
+    temporary: str = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, name.encode(), len(table)))
+        handle.write(table)
+    os.replace(temporary, path)
+
+
+def build_tables(directory: str, names: Iterable[str] = tuple(TABLE_PIECES)) -> List[str]:
+    """
+    Generate tables into *directory* as <name>.tb, KPK needs KQK and KRK
+    which are generated as well but only written when asked for
+    :return: paths of the files written
+    """
+    names = list(names)
+    unknown: List[str] = [name for name in names if name not in TABLE_PIECES]
+    if unknown:
+        raise ValueError(f"unknown tables {', '.join(unknown)}, known are {', '.join(TABLE_PIECES)}")
+    os.makedirs(directory, exist_ok=True)
+    tables: Dict[str, bytearray] = {}
+    for name in TABLE_PIECES:
+        if name in names or name != "KPK" and "KPK" in names:
+            tables[name] = generate_table(name, tables)
+    paths: List[str] = []
+    for name in names:
+        path: str = os.path.join(directory, name + ".tb")
+        write_table(path, name, tables[name])
+        paths.append(path)
+    return paths
+
+
+class Tablebase:
+
+    def __init__(self, directory: str, cache_pages: int = DEFAULT_CACHE_PAGES) -> None:
+        """
+        Open the tables found in *directory*, missing ones are not probed
+        :param cache_pages: pages of PAGE_BYTES kept in memory, least recently used first out
+        :raises ValueError: when a .tb file is not a table
+        """
+        if cache_pages < 1:
+            raise ValueError("the tablebase cache needs at least one page")
+        self.directory: str = directory
+        self.cache_pages: int = cache_pages
+        self._files: Dict[str, object] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._pages: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        for name in TABLE_PIECES:
+            path: str = os.path.join(directory, name + ".tb")
+            if not os.path.exists(path):
+                continue
+            handle = open(path, "rb")
+            if os.fstat(handle.fileno()).st_size != _HEADER.size + TABLE_SIZE:
+                handle.close()
+                self.close()
+                raise ValueError(f"{path} is not a {name} table")
+            mapped: mmap.mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            if _HEADER.unpack_from(mapped) != (MAGIC, name.encode().ljust(4, b"\0"), TABLE_SIZE):
+                mapped.close()
+                handle.close()
+                self.close()
+                raise ValueError(f"{path} is not a {name} table")
+            self._files[name] = handle
+            self._maps[name] = mapped
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def tables(self) -> List[str]:
+        """Names of the tables that were found"""
+        return list(self._maps)
+
+    @property
+    def hit_rate(self) -> float:
+        probes: int = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def _read(self, name: str, index: int) -> int:
+        key: Tuple[str, int] = (name, index // PAGE_BYTES)
+        page: Optional[bytes] = self._pages.get(key)
+        if page is None:
+            self.misses += 1
+            start: int = _HEADER.size + key[1] * PAGE_BYTES
+            page = self._maps[name][start:start + PAGE_BYTES]
+            self._pages[key] = page
+            if len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self._pages.move_to_end(key)
+        return page[index % PAGE_BYTES]
+
+    def probe(self, game: Game) -> Optional[TablebaseResult]:
+        """
+        Outcome of the position of *game* with best play, ignoring the fifty-move rule
+        :return: the result or None when no table covers the position
+        """
+        board: BitBoard = game.board
+        if popcount(board.occupied) != 3 or game.castling_rights:
+            return None
+        strong: int = 0 if popcount(board.occupancy[0]) == 2 else 1
+        offset: int = 6 * strong
+        for name, piece_type in TABLE_PIECES.items():
+            if board.pieces[piece_type + offset]:
+                break
+        else:
+            return None
+        if name not in self._maps:
+            return None
+
+        white_king: int = board.pieces[KING + offset].bit_length() - 1
+        black_king: int = board.pieces[KING + 6 - offset].bit_length() - 1
+        piece: int = board.pieces[piece_type + offset].bit_length() - 1
+        strong_to_move: bool = game.turn() is INDEX_COLOUR[strong]
+        if strong:
+            # the table has the strong side as white
+            white_king, black_king, piece = white_king ^ 56, black_king ^ 56, piece ^ 56
+        value: int = self._read(name, table_index(strong_to_move, white_king, black_king, piece))
+        if not value:
+            return TablebaseResult(DRAW, 0)
+        return TablebaseResult(WIN if strong_to_move else LOSS, value - 1)
+
+    def best_move(self, game: Game) -> Optional[Move]:
+        """
+        A move keeping the outcome of the position, the fastest mate when
+        winning and the slowest when losing
+        :return: the move or None when no table covers the position or there is no legal move
+        """
+        if self.probe(game) is None:
+            return None
+        best: Optional[Move] = None
+        best_key: Tuple[int, int] = (LOSS - 1, 0)
+        for move in generate_legal_moves(game):
+            game.make_move(move)
+            # taking the last piece or promoting to a minor piece leaves a dead draw
+            child: TablebaseResult = self.probe(game) or TablebaseResult(DRAW, 0)
+            game.unmake_move()
+            key: Tuple[int, int] = (-child.wdl, -child.dtm if child.wdl == LOSS else child.dtm)
+            if key > best_key:
+                best, best_key = move, key
+        return best
+
+    def clear_cache(self) -> None:
+        self._pages.clear()
+
+    def close(self) -> None:
+        self._pages.clear()
+        for mapped in self._maps.values():
+            mapped.close()
+        for handle in self._files.values():
+            handle.close()
+        self._maps.clear()
+        self._files.clear()
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: tablebase <directory> [--tables KQK,KRK,KPK] [--probe FEN]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(prog="python -m chess tablebase",
+                                     description="generate endgame tables by retrograde analysis")
+    parser.add_argument("directory")
+    parser.add_argument("--tables", default=",".join(TABLE_PIECES), help="comma separated tables to generate")
+    parser.add_argument("--probe", default=None, metavar="FEN", help="look a position up instead")
+    options = parser.parse_args(args)
+
+    if options.probe is not None:
+        game: Game = game_from_fen(options.probe)
+        with Tablebase(options.directory) as tablebase:
+            result: Optional[TablebaseResult] = tablebase.probe(game)
+            if result is None:
+                print("not in the tablebase")
+                return 1
+            move: Optional[Move] = tablebase.best_move(game)
+        print(f"{('loss', 'draw', 'win')[result.wdl + 1]} dtm {result.dtm} best {to_uci(move) if move else '-'}")
+        return 0
+    for path in build_tables(options.directory, [name for name in options.tables.split(",") if name]):
+        print(f"wrote {path}")
+    return 0
@@ -0,0 +1,245 @@
+"""
+Batched NumPy representation of many positions for feature extraction.
+
+A batch of N positions is an (N, 12) uint64 array holding the bitboard of
+every piece code (see chess.model.bitboard). to_planes unpacks it into the
+(N, 12, 8, 8) boolean tensor that models take, plane [code, y, x] is set
+where a piece of that code stands. Attack masks, move destinations and
+mobility are computed for the whole batch at once with shifted bitboard
+fills instead of one position and one piece at a time.
+
+Castling and en passant depend on the history of a game, not only on the
+placement, so they are left out: destination_masks matches the union of
+get_attack_coords over the positions where neither is possible, and a pawn
+may double push from its starting row.
+
+NumPy is an optional dependency, installed with the numpy extra.
+"""
+from typing import Iterable, List, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("chess.data.tensor needs numpy, install the numpy extra of the package") from error
+
+from chess.custom_typehints import Bitboard
+from chess.model.bitboard import BitBoard, PIECE_INDEX, COLOUR_INDEX, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from chess.model.board import Board
+from chess.model.fen import fen_pieces
+
+_FILE_A = 0x0101010101010101
+# bits a shift by dx files may wrap onto, indexed by dx + 2
+_WRAP = [_FILE_A * 0xC0, _FILE_A * 0x80, 0, _FILE_A * 0x01, _FILE_A * 0x03]
+# row a pawn lands on after a single push from its starting row, per colour index
+_SINGLE_PUSH_ROW = [np.uint64(0xFF << 40), np.uint64(0xFF << 16)]
+_SQUARE_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+KNIGHT_STEPS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_STEPS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+ROOK_RAYS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_RAYS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+
+def _shift(bitboards: np.ndarray, dx: int, dy: int) -> np.ndarray:
+    """Move every bit dx files and dy rows, dropping bits that leave the board"""
+    amount: int = dy * 8 + dx
+    if amount > 0:
+        shifted = bitboards << np.uint64(amount)
+    else:
+        shifted = bitboards >> np.uint64(-amount)
+    if dx:
+        shifted &= np.uint64(~_WRAP[dx + 2] & (1 << 64) - 1)
+    return shifted
+
+
+def _slide(generators: np.ndarray, empty: np.ndarray, rays) -> np.ndarray:
+    """Squares reached by sliding from the generator bits along *rays*, up to and including the first blocker"""
+    attacks = np.zeros_like(generators)
+    for dx, dy in rays:
+        flood = generators
+        ray = _shift(flood, dx, dy)
+        for _ in range(6):
+            flood = ray & empty
+            if not flood.any():
+                break
+            ray |= _shift(flood, dx, dy)
+        attacks |= ray
+    return attacks
+
+
+def _steps(generators: np.ndarray, steps) -> np.ndarray:
+    attacks = np.zeros_like(generators)
+    for dx, dy in steps:
+        attacks |= _shift(generators, dx, dy)
+    return attacks
+
+
+def popcount(bitboards: np.ndarray) -> np.ndarray:
+    """Number of set bits of every element"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitboards).astype(np.int64)
+    as_bytes = np.ascontiguousarray(bitboards, dtype="<u8").view(np.uint8).reshape(bitboards.shape + (8,))
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+def bitboard_array(boards: Sequence[Union[Board, BitBoard]]) -> np.ndarray:
+    """
+    (N, 12) uint64 bitboards of 8x8 boards
+    :raises ValueError: for a list based board that is not 8x8
+    """
+    rows: List[List[Bitboard]] = []
+    for board in boards:
+        if isinstance(board, BitBoard):
+            rows.append(board.pieces)
+            continue
+        if len(board) != 8:
+            raise ValueError("only 8x8 boards can be converted")
+        pieces: List[Bitboard] = [0] * 12
+        for y, row in enumerate(board.blocks):
+            for x, block in enumerate(row):
+                if block.piece is not None:
+                    pieces[PIECE_INDEX[type(block.piece)] + 6 * COLOUR_INDEX[block.piece.colour]] |= 1 << (y * 8 + x)
+        rows.append(pieces)
+    return np.array(rows, dtype=np.uint64).reshape(len(rows), 12)
+
+
+def fen_array(fens: Iterable[str]) -> np.ndarray:
+    """
+    (N, 12) uint64 bitboards of the placement field of FEN records, without building boards
+    :raises ValueError: when a placement is malformed
+    """
+    codes = {letter: PIECE_INDEX[piece] for letter, piece in fen_pieces.items()}
+    codes.update({letter.upper(): code for letter, code in codes.items()})
+    rows: List[List[Bitboard]] = []
+    for fen in fens:
+        pieces: List[Bitboard] = [0] * 12
+        square: int = 0
+        for char in fen.split(" ", 1)[0]:
+            if char == "/":
+                if square % 8:
+                    raise ValueError(f"FEN row does not cover 8 squares: {fen!r}")
+            elif char.isdigit():
+                square += int(char)
+            elif char in codes and square < 64:
+                pieces[codes[char] + (6 if char.islower() else 0)] |= 1 << square
+                square += 1
+            else:
+                raise ValueError(f"invalid FEN placement {fen!r}")
+        if square != 64:
+            raise ValueError(f"FEN placement does not cover 64 squares: {fen!r}")
+        rows.append(pieces)
+    return np.array(rows, dtype=np.uint64).reshape(len(rows), 12)
+
+
+def to_planes(bitboards: np.ndarray) -> np.ndarray:
+    """
+    Unpack bitboards of any shape (..., ) into boolean (..., 8, 8) planes,
+    an (N, 12) batch becomes the (N, 12, 8, 8) tensor
+    """
+    as_bytes = np.ascontiguousarray(bitboards, dtype="<u8").view(np.uint8).reshape(bitboards.shape + (8,))
+    bits = np.unpackbits(as_bytes, axis=-1, bitorder="little")
+    return bits.reshape(bitboards.shape + (8, 8)).astype(bool)
+
+
+def boards_to_tensor(boards: Sequence[Union[Board, BitBoard]]) -> np.ndarray:
+    """(N, 12, 8, 8) boolean tensor of 8x8 boards"""
+    return to_planes(bitboard_array(boards))
+
+
+def fens_to_tensor(fens: Iterable[str]) -> np.ndarray:
+    """(N, 12, 8, 8) boolean tensor of FEN records"""
+    return to_planes(fen_array(fens))
+
+
+def _pieces(bitboards: np.ndarray):
+    """
+    Every piece of the batch as flat arrays: index of its position, its piece
+    code and the bit of its square, ordered by position and then piece code
+    """
+    position, code, square = np.nonzero(to_planes(bitboards).reshape(len(bitboards), 12, 64))
+    return position, code, _SQUARE_BITS[square]
+
+
+def _piece_attacks(code: np.ndarray, bits: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+    """Attacks of each piece given its code, square bit and the occupancy it sees"""
+    attacks = np.zeros_like(bits)
+    piece_type = code % 6
+    for group, steps in ((code == PAWN, [(1, -1), (-1, -1)]), (code == PAWN + 6, [(1, 1), (-1, 1)]),
+                         (piece_type == KNIGHT, KNIGHT_STEPS), (piece_type == KING, KING_STEPS)):
+        attacks[group] = _steps(bits[group], steps)
+    for group, rays in ((piece_type == BISHOP, BISHOP_RAYS), (piece_type == ROOK, ROOK_RAYS),
+                        (piece_type == QUEEN, BISHOP_RAYS + ROOK_RAYS)):
+        attacks[group] = _slide(bits[group], ~occupied[group], rays)
+    return attacks
+
+
+def _occupancy(bitboards: np.ndarray) -> np.ndarray:
+    """(N, 2) squares occupied by white and by black"""
+    return np.stack([np.bitwise_or.reduce(bitboards[:, 0:6], axis=1),
+                     np.bitwise_or.reduce(bitboards[:, 6:12], axis=1)], axis=1)
+
+
+def _union(position: np.ndarray, side: np.ndarray, bitboards: np.ndarray, count: int) -> np.ndarray:
+    """(N, 2) union of per-piece bitboards by position and colour"""
+    masks = np.zeros((count, 2), dtype=np.uint64)
+    np.bitwise_or.at(masks, (position, side), bitboards)
+    return masks
+
+
+def attack_masks(bitboards: np.ndarray) -> np.ndarray:
+    """
+    (N, 2) squares attacked by white and by black, defended pieces included,
+    the same as BitBoard.attack_map
+    """
+    position, code, bits = _pieces(bitboards)
+    occupancy = _occupancy(bitboards)
+    occupied = occupancy[:, 0] | occupancy[:, 1]
+    return _union(position, code // 6, _piece_attacks(code, bits, occupied[position]), len(bitboards))
+
+
+def _targets(bitboards: np.ndarray):
+    """
+    Pseudo-legal destinations of every piece, with kings kept out of attacked squares
+    :return: position index, piece code and destinations of each piece
+    """
+    position, code, bits = _pieces(bitboards)
+    side = code // 6
+    occupancy = _occupancy(bitboards)
+    own = occupancy[position, side]
+    enemy = occupancy[position, side ^ 1]
+    occupied = own | enemy
+    targets = _piece_attacks(code, bits, occupied) & ~own
+
+    for pawn_code, dy, push_row in ((PAWN, -1, _SINGLE_PUSH_ROW[0]), (PAWN + 6, 1, _SINGLE_PUSH_ROW[1])):
+        pawns = code == pawn_code
+        empty = ~occupied[pawns]
+        single = _shift(bits[pawns], 0, dy) & empty
+        targets[pawns] = targets[pawns] & enemy[pawns] | single | _shift(single & push_row, 0, dy) & empty
+
+    # attacks with the enemy king lifted off the board, so a king cannot step back along a checking ray
+    lifted = occupied & ~bitboards[position, 6 * (side ^ 1) + KING]
+    danger = _union(position, side, _piece_attacks(code, bits, lifted), len(bitboards))
+    kings = code % 6 == KING
+    targets[kings] &= ~danger[position[kings], side[kings] ^ 1]
+    return position, code, targets
+
+
+def destination_masks(bitboards: np.ndarray) -> np.ndarray:
+    """
+    (N, 2) squares any piece of white and of black can move to, the union
+    that get_attack_coords returns (castling and en passant aside)
+    """
+    position, code, targets = _targets(bitboards)
+    return _union(position, code // 6, targets, len(bitboards))
+
+
+def mobility(bitboards: np.ndarray, by_piece_type: bool = False) -> np.ndarray:
+    """
+    Pseudo-legal move counts of white and black, castling and en passant aside
+    :param by_piece_type: split the counts per piece type
+    :return: (N, 2) counts, or (N, 2, 6) with by_piece_type
+    """
+    position, code, targets = _targets(bitboards)
+    counts = np.zeros((len(bitboards), 2, 6), dtype=np.int64)
+    np.add.at(counts, (position, code // 6, code % 6), popcount(targets))
+    return counts if by_piece_type else counts.sum(axis=2)
@@ -0,0 +1,202 @@
+"""
+Static evaluation in centipawns.
+
+The score is tapered between a midgame and an endgame value by the game
+phase (see chess.model.psqt). Material and piece-square placement come
+straight from the sums the board keeps up to date as pieces move, the other
+terms are computed from the bitboards at the leaf:
+
+- mobility: squares each minor and major piece attacks that are not taken
+  by its own side, relative to a typical count for the piece
+- pawn structure: doubled, isolated and passed pawns, cached by the pawn
+  key of the board since pawns rarely change between neighbouring nodes
+- king safety: pawns sheltering the king and enemy pieces attacking the
+  squares around it, counted in the midgame only
+"""
+from typing import List, Optional, Tuple
+
+from chess.custom_typehints import Bitboard, Square
+from chess.model.attacks import KING_ATTACKS
+from chess.model.bitboard import BitBoard, COLOUR_INDEX, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, \
+    iter_squares, popcount
+from chess.model.game import Game
+from chess.model.psqt import MAX_PHASE
+
+FILE_MASKS: List[Bitboard] = [0x0101010101010101 << x for x in range(8)]
+ADJACENT_FILES: List[Bitboard] = [(FILE_MASKS[x - 1] if x else 0) | (FILE_MASKS[x + 1] if x < 7 else 0)
+                                  for x in range(8)]
+
+
+def _rows_ahead(side: int, y: int) -> Bitboard:
+    """Rows in front of row *y* from the point of view of colour index *side*"""
+    rows: Bitboard = 0
+    for row in (range(y) if side == 0 else range(y + 1, 8)):
+        rows |= 0xFF << (row * 8)
+    return rows
+
+
+# squares where an enemy pawn stops a pawn of each colour index on each square from being passed
+PASSED_MASKS: List[List[Bitboard]] = [
+    [_rows_ahead(side, square >> 3) & (FILE_MASKS[square & 7] | ADJACENT_FILES[square & 7]) for square in range(64)]
+    for side in (0, 1)
+]
+# the two rows in front of a king on the files around it
+SHIELD_MASKS: List[List[Bitboard]] = [
+    [_rows_ahead(side, square >> 3) & ~_rows_ahead(side, (square >> 3) - 2 if side == 0 else (square >> 3) + 2)
+     & (FILE_MASKS[square & 7] | ADJACENT_FILES[square & 7]) for square in range(64)]
+    for side in (0, 1)
+]
+
+# per piece type, bonus for each attacked square beyond a typical count
+MOBILITY_MIDGAME: List[int] = [0, 4, 5, 2, 1, 0]
+MOBILITY_ENDGAME: List[int] = [0, 4, 5, 4, 2, 0]
+MOBILITY_BASELINE: List[int] = [0, 4, 6, 7, 13, 0]
+
+DOUBLED_PAWN: Tuple[int, int] = (-10, -20)
+ISOLATED_PAWN: Tuple[int, int] = (-10, -15)
+# by rows advanced from the pawn's own back rank
+PASSED_PAWN_MIDGAME: List[int] = [0, 5, 10, 15, 25, 40, 60, 0]
+PASSED_PAWN_ENDGAME: List[int] = [0, 10, 20, 35, 60, 100, 150, 0]
+
+SHIELD_PAWN: int = 12
+# weight of an attack on a square next to the king by piece type
+KING_ATTACK_WEIGHTS: List[int] = [0, 2, 2, 3, 5, 0]
+KING_ATTACK_LIMIT: int = 500
+
+
+def mobility(board: BitBoard) -> Tuple[int, int]:
+    """Mobility term from white's point of view, midgame and endgame"""
+    midgame: int = 0
+    endgame: int = 0
+    for side, sign in ((0, 1), (1, -1)):
+        own: Bitboard = board.occupancy[side]
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for square in iter_squares(board.pieces[piece_type + 6 * side]):
+                moves: int = popcount(board.attacks_from[square] & ~own) - MOBILITY_BASELINE[piece_type]
+                midgame += sign * MOBILITY_MIDGAME[piece_type] * moves
+                endgame += sign * MOBILITY_ENDGAME[piece_type] * moves
+    return midgame, endgame
+
+
+def pawn_structure(white_pawns: Bitboard, black_pawns: Bitboard) -> Tuple[int, int]:
+    """Doubled, isolated and passed pawn terms from white's point of view, midgame and endgame"""
+    midgame: int = 0
+    endgame: int = 0
+    for side, sign, pawns, enemy in ((0, 1, white_pawns, black_pawns), (1, -1, black_pawns, white_pawns)):
+        for x in range(8):
+            count: int = popcount(pawns & FILE_MASKS[x])
+            if count > 1:
+                midgame += sign * DOUBLED_PAWN[0] * (count - 1)
+                endgame += sign * DOUBLED_PAWN[1] * (count - 1)
+            if count and not pawns & ADJACENT_FILES[x]:
+                midgame += sign * ISOLATED_PAWN[0] * count
+                endgame += sign * ISOLATED_PAWN[1] * count
+        for square in iter_squares(pawns):
+            if not enemy & PASSED_MASKS[side][square]:
+                advanced: int = 7 - (square >> 3) if side == 0 else square >> 3
+                midgame += sign * PASSED_PAWN_MIDGAME[advanced]
+                endgame += sign * PASSED_PAWN_ENDGAME[advanced]
+    return midgame, endgame
+
+
+class PawnHashTable:
+
+    def __init__(self, entries: int = 16384) -> None:
+        """
+        Fixed size cache of pawn structure terms keyed by BitBoard.pawn_key,
+        a new entry replaces whatever was stored in its slot
+        :param entries: number of slots
+        """
+        if entries < 1:
+            raise ValueError("pawn hash table needs at least one entry")
+        self._keys: List[Optional[int]] = [None] * entries
+        self._scores: List[Tuple[int, int]] = [(0, 0)] * entries
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        """Number of entries the table can hold"""
+        return len(self._keys)
+
+    @property
+    def hit_rate(self) -> float:
+        probes: int = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def clear(self) -> None:
+        self._keys = [None] * len(self._keys)
+        self._scores = [(0, 0)] * len(self._keys)
+        self.hits = self.misses = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int]]:
+        """
+        Look up the terms stored for *key*
+        :return: midgame and endgame terms or None when they are not in the table
+        """
+        index: int = key % len(self._keys)
+        if self._keys[index] == key:
+            self.hits += 1
+            return self._scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, scores: Tuple[int, int]) -> None:
+        index: int = key % len(self._keys)
+        self._keys[index] = key
+        self._scores[index] = scores
+
+
+# used by evaluate, one per process
+PAWN_TABLE: PawnHashTable = PawnHashTable()
+
+
+def cached_pawn_structure(board: BitBoard, table: PawnHashTable = PAWN_TABLE) -> Tuple[int, int]:
+    """pawn_structure of the board, looked up by its pawn key first"""
+    scores: Optional[Tuple[int, int]] = table.probe(board.pawn_key)
+    if scores is None:
+        scores = pawn_structure(board.pieces[PAWN], board.pieces[PAWN + 6])
+        table.store(board.pawn_key, scores)
+    return scores
+
+
+def king_safety(board: BitBoard) -> int:
+    """Midgame king safety term from white's point of view"""
+    score: int = 0
+    for side, sign in ((0, 1), (1, -1)):
+        king: Bitboard = board.pieces[KING + 6 * side]
+        if not king:
+            continue
+        king_square: Square = king.bit_length() - 1
+        score += sign * SHIELD_PAWN * popcount(board.pieces[PAWN + 6 * side] & SHIELD_MASKS[side][king_square])
+
+        zone: Bitboard = KING_ATTACKS[king_square] | king
+        offset: int = 6 * (side ^ 1)
+        attackers: int = 0
+        weight: int = 0
+        for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for square in iter_squares(board.pieces[piece_type + offset]):
+                hits: int = popcount(board.attacks_from[square] & zone)
+                if hits:
+                    attackers += 1
+                    weight += KING_ATTACK_WEIGHTS[piece_type] * hits
+        if attackers > 1:
+            # a lone attacker is rarely dangerous, several together quickly are
+            score -= sign * min(weight * weight, KING_ATTACK_LIMIT)
+    return score
+
+
+def evaluate(game: Game) -> int:
+    """Tapered static evaluation in centipawns from the point of view of the side to move"""
+    board: BitBoard = game.board
+    midgame: int = board.midgame_score
+    endgame: int = board.endgame_score
+
+    mobility_midgame, mobility_endgame = mobility(board)
+    pawns_midgame, pawns_endgame = cached_pawn_structure(board)
+    midgame += mobility_midgame + pawns_midgame + king_safety(board)
+    endgame += mobility_endgame + pawns_endgame
+
+    phase: int = min(board.phase, MAX_PHASE)
+    score: int = midgame * phase + endgame * (MAX_PHASE - phase)
+    # turn the sign before dividing so that mirrored positions round the same way
+    return (score if COLOUR_INDEX[game.turn()] == 0 else -score) // MAX_PHASE
@@ -0,0 +1,168 @@
+"""
+Lazy SMP: several worker processes search the same root position at once
+and share one transposition table in a multiprocessing.shared_memory block.
+Every worker runs the ordinary Searcher, what one worker stores in the table
+shortens the search of the others. Helpers start their iterative deepening
+one ply deeper in turn so they spread over different parts of the tree.
+The main worker's result is returned unless a helper completed a deeper
+iteration.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List, Optional, Tuple
+
+from chess.engine.search import Searcher, SearchLimits, SearchResult
+from chess.model.game import Game
+from chess.model.transposition import TranspositionTable, table_bytes
+
+# state of a worker process, set up once by _init_worker
+_shared_memory: Optional[SharedMemory] = None
+_searcher: Optional[Searcher] = None
+
+
+def _attach(name: str) -> SharedMemory:
+    try:
+        # python 3.13+, keep the resource tracker from unlinking the block when a worker exits
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def _init_worker(name: str, stop_event: Any) -> None:
+    global _shared_memory, _searcher
+    _shared_memory = _attach(name)
+    _searcher = Searcher(table=TranspositionTable(buffer=_shared_memory.buf), stop_event=stop_event)
+
+
+def _worker_search(game: Game, limits: SearchLimits, index: int) -> SearchResult:
+    if index:
+        # helpers never stop on their own, the main worker's limits decide
+        limits = SearchLimits(depth=None, soft_time=None, hard_time=limits.hard_time, nodes=None)
+    return _searcher.search(game, limits, first_depth=1 + index % 2)
+
+
+class ParallelSearcher:
+
+    def __init__(self, workers: Optional[int] = None, hash_mb: float = 64) -> None:
+        """
+        A pool of search processes sharing a transposition table, keep it
+        around between searches since starting the processes is slow
+        :param workers: number of processes, one per CPU by default
+        :param hash_mb: size of the shared transposition table
+        """
+        self.workers: int = workers or os.cpu_count() or 1
+        self._memory: SharedMemory = SharedMemory(create=True, size=table_bytes(hash_mb))
+        self._memory.buf[:] = bytes(self._memory.size)
+        context = multiprocessing.get_context()
+        self._stop_event = context.Event()
+        self._pool: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=self.workers,
+                                                              mp_context=context,
+                                                              initializer=_init_worker,
+                                                              initargs=(self._memory.name, self._stop_event))
+
+    def __enter__(self) -> "ParallelSearcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stop(self) -> None:
+        """Stop a running search, safe to call from another thread"""
+        self._stop_event.set()
+
+    def clear_stop(self) -> None:
+        """
+        Forget an earlier stop. Callers that start the search on another
+        thread call this first with clear_stop=False, so that a stop given
+        before the search gets going is not lost.
+        """
+        self._stop_event.clear()
+
+    def clear(self) -> None:
+        """Empty the shared transposition table"""
+        self._memory.buf[:] = bytes(self._memory.size)
+
+    def search(self, game: Game, limits: Optional[SearchLimits] = None, clear_stop: bool = True) -> SearchResult:
+        """
+        Search the position of *game* on every worker
+        :param clear_stop: forget an earlier stop first, see clear_stop
+        :return: result of the main worker, or of a helper that completed a
+        deeper iteration, with the node counts of all workers summed
+        """
+        limits = limits if limits is not None else SearchLimits()
+        if clear_stop:
+            self._stop_event.clear()
+        start: float = time.perf_counter()
+        futures: List[Future] = [self._pool.submit(_worker_search, game, limits, index)
+                                 for index in range(self.workers)]
+        try:
+            main: SearchResult = futures[0].result()
+        finally:
+            self._stop_event.set()
+        results: List[SearchResult] = [main] + [future.result() for future in futures[1:]]
+
+        best: SearchResult = main
+        for result in results[1:]:
+            if result.depth > best.depth and result.best_move:
+                best = result
+        best.nodes = sum(result.nodes for result in results)
+        best.time = time.perf_counter() - start
+        return best
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._pool.shutdown(wait=True)
+        self._memory.close()
+        self._memory.unlink()
+
+
+def measure_scaling(game: Game, depth: int, worker_counts: List[int],
+                    hash_mb: float = 64) -> List[Tuple[int, float, int, float]]:
+    """
+    Time a fixed depth search of *game* with each number of workers
+    :return: (workers, seconds, nodes, speedup over the first count) per worker count
+    """
+    rows: List[Tuple[int, float, int, float]] = []
+    baseline: Optional[float] = None
+    for workers in worker_counts:
+        with ParallelSearcher(workers=workers, hash_mb=hash_mb) as searcher:
+            # warm up the processes so start up is not timed
+            searcher.search(game, SearchLimits(depth=1))
+            searcher.clear()
+            start: float = time.perf_counter()
+            result: SearchResult = searcher.search(game, SearchLimits(depth=depth))
+            elapsed: float = time.perf_counter() - start
+        baseline = baseline if baseline is not None else elapsed
+        rows.append((workers, elapsed, result.nodes, baseline / elapsed if elapsed > 0 else 0.0))
+    return rows
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: smp <depth> [max workers] [fen]
+    :return: exit status
+    """
+    from chess.model.fen import STARTING_FEN, game_from_fen
+
+    if not args or not args[0].isdigit():
+        print("usage: python -m chess smp <depth> [max workers] [fen]", file=sys.stderr)
+        return 2
+    depth: int = int(args[0])
+    max_workers: int = int(args[1]) if len(args) > 1 and args[1].isdigit() else os.cpu_count() or 1
+    fen: str = " ".join(args[2:] if len(args) > 1 and args[1].isdigit() else args[1:]) or STARTING_FEN
+
+    counts: List[int] = []
+    workers: int = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    print(f"{'workers':>8} {'time':>9} {'nodes':>10} {'speedup':>8}")
+    for workers, elapsed, nodes, speedup in measure_scaling(game_from_fen(fen), depth, counts):
+        print(f"{workers:>8} {elapsed:>8.2f}s {nodes:>10} {speedup:>7.2f}x")
+    return 0
@@ -0,0 +1,371 @@
+"""
+Alpha-beta search on top of chess.model.
+
+Negamax with a transposition table, iterative deepening, check extension
+and a quiescence search over captures and promotions. Moves are ordered by
+the table move, MVV-LVA for captures, two killer moves per ply and a
+history heuristic for the remaining quiet moves. Positions an endgame
+tablebase covers are scored from it with exact mate distances.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Tuple
+
+from chess.custom_typehints import Move
+from chess.data.book import OpeningBook
+from chess.data.tablebase import Tablebase, TablebaseResult, WIN, LOSS
+from chess.engine.evaluation import evaluate as tapered_evaluation
+from chess.model.bitboard import BitBoard, COLOUR_INDEX, SQUARE_BITS, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, \
+    popcount
+from chess.model.game import Game, is_in_check
+from chess.model.move_generator import generate_legal_moves
+from chess.model.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+INFINITY: int = 32000
+MATE_SCORE: int = 31000
+# scores beyond this are mates, their distance to the root is adjusted in the table
+MATE_THRESHOLD: int = MATE_SCORE - 1000
+MAX_PLY: int = 128
+
+PIECE_VALUES: List[int] = [100, 320, 330, 500, 900, 0]
+
+# move ordering bands
+_TABLE_MOVE: int = 1 << 30
+_CAPTURE: int = 1 << 28
+_KILLER: int = 1 << 27
+
+
+def material_evaluation(game: Game) -> int:
+    """Material balance in centipawns from the point of view of the side to move"""
+    pieces: List[int] = game.board.pieces
+    score: int = 0
+    for piece_type in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN):
+        score += PIECE_VALUES[piece_type] * (popcount(pieces[piece_type]) - popcount(pieces[piece_type + 6]))
+    return score if COLOUR_INDEX[game.turn()] == 0 else -score
+
+
+def time_for_move(remaining: float, increment: float = 0, moves_to_go: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Split a clock into soft and hard limits for one move
+    :param remaining: seconds left on the clock
+    :param increment: seconds added after each move
+    :param moves_to_go: moves until the next time control, if any
+    :return: (soft, hard) limits in seconds, no new iteration starts after
+    the soft limit and the search stops outright at the hard limit
+    """
+    moves: int = moves_to_go if moves_to_go else 30
+    soft: float = remaining / moves + increment * 0.8
+    hard: float = min(remaining * 0.5, soft * 4)
+    return min(soft, hard), max(hard, 0.01)
+
+
+@dataclass
+class SearchLimits:
+    depth: Optional[int] = None
+    soft_time: Optional[float] = None
+    hard_time: Optional[float] = None
+    nodes: Optional[int] = None
+
+
+@dataclass
+class SearchResult:
+    best_move: Move
+    score: int
+    depth: int
+    pv: List[Move] = field(default_factory=list)
+    nodes: int = 0
+    time: float = 0.0
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.time) if self.time > 0 else 0
+
+
+class Searcher:
+
+    def __init__(self,
+                 table: Optional[TranspositionTable] = None,
+                 evaluate: Callable[[Game], int] = tapered_evaluation,
+                 on_iteration: Optional[Callable[[SearchResult], None]] = None,
+                 stop_event: Optional[Any] = None,
+                 book: Optional[OpeningBook] = None,
+                 tablebase: Optional[Tablebase] = None
+                 ) -> None:
+        """
+        Iterative deepening alpha-beta searcher
+        :param table: transposition table to use, a 16 MB table by default
+        :param evaluate: static evaluation in centipawns for the side to move, chess.engine.evaluation by default
+        :param on_iteration: called with the result of every completed depth
+        :param stop_event: threading or multiprocessing Event, the search stops once it is set
+        :param book: opening book, positions found in it are answered with a book move without searching
+        :param tablebase: endgame tables, positions they cover are scored without searching further
+        """
+        self.table: TranspositionTable = table if table is not None else TranspositionTable()
+        self.evaluate: Callable[[Game], int] = evaluate
+        self.on_iteration: Optional[Callable[[SearchResult], None]] = on_iteration
+        self.stop_event: Optional[Any] = stop_event
+        self.book: Optional[OpeningBook] = book
+        self.tablebase: Optional[Tablebase] = tablebase
+
+        self.nodes: int = 0
+        self.stopped: bool = False
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+        self._killers: List[List[Move]] = [[0, 0] for _ in range(MAX_PLY)]
+        self._history: List[List[int]] = [[0] * 4096, [0] * 4096]
+        self._pv: List[List[Move]] = [[] for _ in range(MAX_PLY + 1)]
+        self._root_best: Optional[Tuple[Move, int]] = None
+
+    def stop(self) -> None:
+        """Ask a running search to return as soon as possible, safe to call from another thread"""
+        self.stopped = True
+
+    def search(self, game: Game, limits: Optional[SearchLimits] = None, first_depth: int = 1) -> SearchResult:
+        """
+        Search the position of *game* within *limits*, without limits the
+        search runs until stop() is called or the maximum depth is reached
+        :param first_depth: depth of the first iteration, helper searches of a
+        parallel search start deeper to spread out over the tree
+        :return: best move, score and principal variation of the deepest completed iteration
+        """
+        limits = limits if limits is not None else SearchLimits()
+        start: float = time.perf_counter()
+        self._deadline = start + limits.hard_time if limits.hard_time is not None else None
+        self._node_limit = limits.nodes
+        self.nodes = 0
+        self.stopped = False
+        self._killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._history = [[0] * 4096, [0] * 4096]
+        self.table.new_search()
+
+        if self.book is not None:
+            book_move: Optional[Move] = self.book.choose(game)
+            if book_move is not None:
+                return SearchResult(book_move, 0, 0, [book_move], 0, time.perf_counter() - start)
+        if self.tablebase is not None:
+            tablebase_move: Optional[Move] = self.tablebase.best_move(game)
+            if tablebase_move is not None:
+                return SearchResult(tablebase_move, _tablebase_score(self.tablebase.probe(game), 0), 0,
+                                    [tablebase_move], 0, time.perf_counter() - start)
+
+        root_moves: List[Move] = generate_legal_moves(game)
+        result: SearchResult = SearchResult(root_moves[0] if root_moves else 0, 0, 0)
+        if len(root_moves) <= 1:
+            # nothing to choose between
+            result.pv = root_moves[:1]
+            result.score = self.evaluate(game) if root_moves else self._terminal_score(game, 0)
+            return result
+
+        max_depth: int = min(limits.depth or MAX_PLY - 1, MAX_PLY - 1)
+        for depth in range(min(first_depth, max_depth), max_depth + 1):
+            self._root_best = None
+            score: int = self._negamax(game, depth, -INFINITY, INFINITY, 0)
+            if self.stopped:
+                if self._root_best is not None:
+                    # root moves of the unfinished iteration that were searched fully
+                    # are still sound, the previous best move is always searched first
+                    result.best_move, result.score = self._root_best
+                    result.pv = list(self._pv[0])
+                break
+            result = SearchResult(self._pv[0][0], score, depth, list(self._pv[0]),
+                                  self.nodes, time.perf_counter() - start)
+            if self.on_iteration is not None:
+                self.on_iteration(result)
+            if abs(score) > MATE_THRESHOLD and MATE_SCORE - abs(score) <= depth:
+                break
+            if limits.soft_time is not None and time.perf_counter() - start >= limits.soft_time:
+                break
+
+        result.nodes = self.nodes
+        result.time = time.perf_counter() - start
+        return result
+
+    def _check_limits(self) -> None:
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            self.stopped = True
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            self.stopped = True
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.stopped = True
+
+    def _terminal_score(self, game: Game, ply: int) -> int:
+        return -MATE_SCORE + ply if is_in_check(game.board, game.turn()) else 0
+
+    def _order(self, game: Game, moves: List[Move], table_move: Move, ply: int) -> List[Move]:
+        board: BitBoard = game.board
+        codes: List[int] = board.codes
+        killers: List[Move] = self._killers[ply]
+        history: List[int] = self._history[COLOUR_INDEX[game.turn()]]
+        en_passant: Optional[int] = game.en_passant
+
+        def key(move: Move) -> int:
+            if move == table_move:
+                return _TABLE_MOVE
+            to_sq: int = move >> 6 & 63
+            victim: int = codes[to_sq]
+            if victim >= 0 or move >> 12 or (to_sq == en_passant and codes[move & 63] % 6 == PAWN):
+                # most valuable victim, least valuable attacker
+                value: int = PIECE_VALUES[victim % 6] if victim >= 0 else 0
+                value += PIECE_VALUES[move >> 12] if move >> 12 else 0
+                return _CAPTURE + value * 8 - codes[move & 63] % 6
+            if move == killers[0] or move == killers[1]:
+                return _KILLER + (move == killers[0])
+            return history[move & 0xFFF]
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _is_quiet(self, board: BitBoard, move: Move, en_passant: Optional[int]) -> bool:
+        to_sq: int = move >> 6 & 63
+        return not (board.occupied & SQUARE_BITS[to_sq] or move >> 12 or
+                    (to_sq == en_passant and board.codes[move & 63] % 6 == PAWN))
+
+    def _negamax(self, game: Game, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_limits()
+        if self.stopped:
+            return 0
+        self._pv[ply] = []
+
+        if ply and (game.halfmove_clock >= 100 or game.repetitions()):
+            return 0
+        if self.tablebase is not None and popcount(game.board.occupied) <= 3:
+            result: Optional[TablebaseResult] = self.tablebase.probe(game)
+            if result is not None:
+                return _tablebase_score(result, ply)
+
+        key: int = game.zobrist_key
+        entry = self.table.probe(key)
+        table_move: Move = 0
+        if entry is not None:
+            table_move = entry.move
+            if ply and entry.depth >= depth:
+                score: int = _score_from_table(entry.score, ply)
+                if entry.bound == EXACT or \
+                        (entry.bound == LOWER_BOUND and score >= beta) or \
+                        (entry.bound == UPPER_BOUND and score <= alpha):
+                    return score
+
+        in_check: bool = is_in_check(game.board, game.turn())
+        if in_check and ply < MAX_PLY // 2:
+            depth += 1
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiesce(game, alpha, beta, ply)
+
+        moves: List[Move] = generate_legal_moves(game)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else 0
+
+        board: BitBoard = game.board
+        original_alpha: int = alpha
+        best_score: int = -INFINITY
+        best_move: Move = 0
+        for move in self._order(game, moves, table_move, ply):
+            quiet: bool = self._is_quiet(board, move, game.en_passant)
+            game.make_move(move)
+            score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            game.unmake_move()
+            if self.stopped:
+                return 0
+
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                    if not ply:
+                        self._root_best = (move, score)
+                    if alpha >= beta:
+                        if quiet:
+                            killers: List[Move] = self._killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                            self._history[COLOUR_INDEX[game.turn()]][move & 0xFFF] += depth * depth
+                        break
+
+        if best_score >= beta:
+            bound: int = LOWER_BOUND
+        elif best_score > original_alpha:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.table.store(key, best_move, _score_to_table(best_score, ply), depth, bound)
+        return best_score
+
+    def _quiesce(self, game: Game, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_limits()
+        if self.stopped:
+            return 0
+        self._pv[ply] = []
+
+        board: BitBoard = game.board
+        in_check: bool = is_in_check(board, game.turn())
+        if not in_check:
+            stand_pat: int = self.evaluate(game)
+            if stand_pat >= beta or ply >= MAX_PLY - 1:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+
+        moves: List[Move] = generate_legal_moves(game)
+        if not moves:
+            return -MATE_SCORE + ply if in_check else alpha
+        if not in_check:
+            # only captures and promotions unless every move has to be looked at to escape check
+            en_passant: Optional[int] = game.en_passant
+            moves = [move for move in moves if not self._is_quiet(board, move, en_passant)]
+
+        best_score: int = alpha if not in_check else -INFINITY
+        for move in self._order(game, moves, 0, ply):
+            game.make_move(move)
+            score: int = -self._quiesce(game, -beta, -max(alpha, best_score), ply + 1)
+            game.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                if score >= beta:
+                    break
+        return best_score
+
+
+def _tablebase_score(result: TablebaseResult, ply: int) -> int:
+    """Search score of a tablebase result, wins and losses are mate scores"""
+    if result.wdl == WIN:
+        return MATE_SCORE - ply - result.dtm
+    if result.wdl == LOSS:
+        return -MATE_SCORE + ply + result.dtm
+    return 0
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    """Mate scores are stored relative to the node so they stay valid at other depths"""
+    if score > MATE_THRESHOLD:
+        return score + ply
+    if score < -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    if score > MATE_THRESHOLD:
+        return score - ply
+    if score < -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+
+def search(game: Game, depth: Optional[int] = None, movetime: Optional[float] = None,
+           book: Optional[OpeningBook] = None, tablebase: Optional[Tablebase] = None) -> SearchResult:
+    """
+    Convenience wrapper: search *game* to *depth* plies or for *movetime*
+    seconds, or play from *book* or *tablebase*
+    """
+    limits: SearchLimits = SearchLimits(depth=depth, soft_time=movetime, hard_time=movetime)
+    if movetime is not None:
+        limits.soft_time = movetime / 2
+    return Searcher(book=book, tablebase=tablebase).search(game, limits)
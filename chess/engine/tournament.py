@@ -0,0 +1,373 @@
+"""
+Self-play matches between two engine configurations.
+
+Every opening of the book is played twice, once with each configuration
+as white, so an unbalanced opening favours neither. Games are spread over a
+pool of worker processes and played on Game directly. A game ends when its
+GameStatus is a win or a draw, or when it is adjudicated drawn by
+threefold repetition, the fifty-move rule, insufficient material or a
+move limit.
+
+Results are reported from the point of view of the first configuration:
+the Elo difference with a 95% confidence interval and, when requested, a
+sequential probability ratio test that stops the match as soon as it can
+tell elo0 from elo1 with the given error rates.
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from chess.custom_typehints import Colour, GameStatus
+from chess.engine.evaluation import evaluate
+from chess.engine.search import Searcher, SearchLimits, material_evaluation
+from chess.model.bitboard import BitBoard, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, popcount
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game, is_in_check
+from chess.model.move import to_coords, promotion_type, to_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.transposition import TranspositionTable
+
+EVALUATIONS: Dict[str, Callable[[Game], int]] = {
+    "tapered": evaluate,
+    "material": material_evaluation,
+}
+# squares of one colour, for bishops that can never meet
+LIGHT_SQUARES: int = sum(1 << square for square in range(64) if (square >> 3) % 2 == (square & 7) % 2)
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    name: str = "engine"
+    evaluation: str = "tapered"
+    depth: Optional[int] = None
+    nodes: Optional[int] = None
+    movetime: Optional[float] = None
+    hash_mb: float = 4
+
+    def __post_init__(self) -> None:
+        if self.evaluation not in EVALUATIONS:
+            raise ValueError(f"unknown evaluation {self.evaluation!r}, pick one of {', '.join(EVALUATIONS)}")
+        if self.depth is None and self.nodes is None and self.movetime is None:
+            raise ValueError(f"engine {self.name!r} needs a depth, node or time limit")
+
+    @classmethod
+    def parse(cls, text: str) -> "EngineConfig":
+        """
+        Configuration from "key=value" pairs separated by commas, e.g. "name=new,depth=4,evaluation=material"
+        :raises ValueError: for unknown keys or values
+        """
+        values: Dict[str, object] = {}
+        for pair in filter(None, text.split(",")):
+            key, _, value = pair.partition("=")
+            key = key.strip()
+            if key in ("name", "evaluation"):
+                values[key] = value.strip()
+            elif key in ("depth", "nodes"):
+                values[key] = int(value)
+            elif key in ("movetime", "hash_mb"):
+                values[key] = float(value)
+            else:
+                raise ValueError(f"unknown engine option {key!r}")
+        return cls(**values)
+
+    def limits(self) -> SearchLimits:
+        return SearchLimits(depth=self.depth, nodes=self.nodes, soft_time=self.movetime, hard_time=self.movetime)
+
+    def searcher(self) -> Searcher:
+        return Searcher(table=TranspositionTable(self.hash_mb), evaluate=EVALUATIONS[self.evaluation])
+
+
+@dataclass
+class GameRecord:
+    opening: int
+    fen: str
+    # whether the first configuration played white
+    first_is_white: bool
+    # 1, 0.5 or 0 from white's point of view
+    white_score: float
+    reason: str
+    moves: List[str] = field(default_factory=list)
+
+    @property
+    def first_score(self) -> float:
+        return self.white_score if self.first_is_white else 1 - self.white_score
+
+
+def insufficient_material(board: BitBoard) -> bool:
+    """Whether neither side can possibly mate: bare kings, a single minor piece or bishops on one colour"""
+    pieces: List[int] = board.pieces
+    for piece_type in (PAWN, ROOK, QUEEN):
+        if pieces[piece_type] | pieces[piece_type + 6]:
+            return False
+    knights: int = pieces[KNIGHT] | pieces[KNIGHT + 6]
+    bishops: int = pieces[BISHOP] | pieces[BISHOP + 6]
+    if popcount(knights | bishops) <= 1:
+        return True
+    return not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES)
+
+
+def adjudicate(game: Game, max_plies: int) -> Optional[Tuple[float, str]]:
+    """
+    Result of a finished game from white's point of view
+    :return: (score, reason), None while the game goes on
+    """
+    if game.status is GameStatus.WHITE_WIN:
+        return 1.0, "checkmate"
+    if game.status is GameStatus.BLACK_WIN:
+        return 0.0, "checkmate"
+    if game.status is GameStatus.DRAW:
+        return 0.5, "stalemate"
+    if game.halfmove_clock >= 100:
+        return 0.5, "fifty-move rule"
+    if game.repetitions() >= 2:
+        return 0.5, "threefold repetition"
+    if insufficient_material(game.board):
+        return 0.5, "insufficient material"
+    if len(game.played_moves()) >= max_plies:
+        return 0.5, "move limit"
+    return None
+
+
+def play_game(opening: int, fen: str, first: EngineConfig, second: EngineConfig, first_is_white: bool,
+              max_plies: int = 400) -> GameRecord:
+    """Play one game from *fen*, each configuration with a fresh transposition table"""
+    game: Game = game_from_fen(fen)
+    white, black = (first, second) if first_is_white else (second, first)
+    players: Dict[Colour, Tuple[Searcher, SearchLimits]] = {
+        Colour.WHITE: (white.searcher(), white.limits()),
+        Colour.BLACK: (black.searcher(), black.limits()),
+    }
+    record: GameRecord = GameRecord(opening, fen, first_is_white, 0.5, "")
+    if not generate_legal_moves(game):
+        # the opening itself is already over, Game.move only updates the status of later positions
+        mated: bool = is_in_check(game.board, game.turn())
+        record.white_score = (0.0 if game.turn() is Colour.WHITE else 1.0) if mated else 0.5
+        record.reason = "checkmate" if mated else "stalemate"
+        return record
+    while True:
+        outcome: Optional[Tuple[float, str]] = adjudicate(game, max_plies)
+        if outcome is not None:
+            record.white_score, record.reason = outcome
+            return record
+        searcher, limits = players[game.turn()]
+        move = searcher.search(game, limits).best_move
+        if not move or not game.move(*to_coords(move), promotion_type(move)):
+            # the searcher found nothing to play in a position Game considers open
+            record.white_score, record.reason = 0.5, "no move"
+            return record
+        record.moves.append(to_uci(move))
+
+
+def elo_from_score(score: float) -> float:
+    """Elo difference that gives the expected *score* per game"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return 400 * math.log10(score / (1 - score))
+
+
+def expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+@dataclass
+class Sprt:
+    elo0: float = 0.0
+    elo1: float = 5.0
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    @property
+    def lower_bound(self) -> float:
+        return math.log(self.beta / (1 - self.alpha))
+
+    @property
+    def upper_bound(self) -> float:
+        return math.log((1 - self.beta) / self.alpha)
+
+
+@dataclass
+class MatchResult:
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    reasons: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+    # "H0", "H1" once an SPRT stopped the match
+    decision: Optional[str] = None
+
+    def add(self, record: GameRecord) -> None:
+        score: float = record.first_score
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.reasons[record.reason] = self.reasons.get(record.reason, 0) + 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        """Mean score per game of the first configuration"""
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def _variance(self) -> float:
+        """Variance of the score of one game"""
+        if not self.games:
+            return 0.0
+        return (self.wins + self.draws / 4) / self.games - self.score ** 2
+
+    def elo(self) -> Tuple[float, float]:
+        """
+        Elo difference of the first configuration over the second
+        :return: the estimate and the half width of its 95% confidence interval
+        """
+        elo: float = elo_from_score(self.score)
+        if not self.games:
+            return elo, math.inf
+        margin: float = 1.959964 * math.sqrt(self._variance() / self.games)
+        low: float = elo_from_score(self.score - margin)
+        high: float = elo_from_score(self.score + margin)
+        return elo, (high - low) / 2
+
+    def llr(self, sprt: Sprt) -> float:
+        """Log likelihood ratio of elo1 against elo0, normal approximation of the game scores"""
+        variance: float = self._variance()
+        if not self.games or variance <= 0:
+            return 0.0
+        s0: float = expected_score(sprt.elo0)
+        s1: float = expected_score(sprt.elo1)
+        return (s1 - s0) * (2 * self.score - s0 - s1) / (2 * variance / self.games)
+
+    def summary(self, sprt: Optional[Sprt] = None) -> str:
+        elo, margin = self.elo()
+        line: str = f"games {self.games}: +{self.wins} ={self.draws} -{self.losses}, " \
+                    f"score {self.score:.3f}, elo {elo:+.1f} +/- {margin:.1f}"
+        if sprt is not None:
+            line += f", llr {self.llr(sprt):.2f} ({sprt.lower_bound:.2f}, {sprt.upper_bound:.2f})"
+            if self.decision:
+                line += f" {self.decision} accepted"
+        return line
+
+
+def load_openings(path: str) -> List[str]:
+    """FEN records of a book file, one per line, blank lines and lines starting with # skipped"""
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _schedule(openings: List[str], games: int) -> Iterator[Tuple[int, str, bool]]:
+    """(opening index, fen, first plays white) of every game, both colours of an opening in a row"""
+    for number in range(games):
+        index: int = number // 2 % len(openings)
+        yield index, openings[index], number % 2 == 0
+
+
+def run_match(first: EngineConfig, second: EngineConfig, openings: Optional[Iterable[str]] = None,
+              games: int = 100, workers: Optional[int] = None, sprt: Optional[Sprt] = None,
+              max_plies: int = 400, progress: Optional[Callable[[MatchResult, GameRecord], None]] = None
+              ) -> MatchResult:
+    """
+    Play *first* against *second*
+    :param openings: FEN records to start from, cycled through, the start position by default
+    :param games: number of games, at most, when an SPRT is given
+    :param workers: number of worker processes, one per CPU by default
+    :param sprt: stop once this test accepts either hypothesis
+    :param max_plies: games reaching this many plies are drawn
+    :param progress: called with the running result and the record after every game
+    :return: the result from the point of view of *first*
+    """
+    book: List[str] = list(openings) if openings is not None else [STARTING_FEN]
+    if not book:
+        raise ValueError("the opening book is empty")
+    workers = workers or os.cpu_count() or 1
+    result: MatchResult = MatchResult()
+    start: float = time.perf_counter()
+    schedule: Iterator[Tuple[int, str, bool]] = _schedule(book, games)
+    pending: Dict[Future, int] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < 2 * workers and result.decision is None:
+                try:
+                    index, fen, first_is_white = next(schedule)
+                except StopIteration:
+                    break
+                future: Future = executor.submit(play_game, index, fen, first, second, first_is_white, max_plies)
+                pending[future] = index
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                if result.decision is not None:
+                    # finished after the test decided, the result stays as it was at the decision
+                    continue
+                record: GameRecord = future.result()
+                result.add(record)
+                result.elapsed = time.perf_counter() - start
+                if progress is not None:
+                    progress(result, record)
+                if sprt is not None:
+                    llr: float = result.llr(sprt)
+                    if llr >= sprt.upper_bound:
+                        result.decision = "H1"
+                    elif llr <= sprt.lower_bound:
+                        result.decision = "H0"
+            if result.decision is not None:
+                # games already running are finished by the pool but not counted
+                for future in pending:
+                    future.cancel()
+                break
+    return result
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: tournament <first engine> <second engine> [options]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(prog="python -m chess tournament",
+                                     description="Play two engine configurations against each other")
+    parser.add_argument("first", help='e.g. "name=new,depth=3", keys: name, evaluation, depth, nodes, '
+                                      'movetime, hash_mb')
+    parser.add_argument("second", help='e.g. "name=old,depth=3,evaluation=material"')
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None, help="one per CPU by default")
+    parser.add_argument("--openings", help="file with one FEN per line, the start position by default")
+    parser.add_argument("--max-plies", type=int, default=400, help="plies after which a game is drawn")
+    parser.add_argument("--sprt", metavar="ELO0,ELO1", help="stop early once elo0 or elo1 is accepted")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    options = parser.parse_args(args)
+
+    try:
+        first: EngineConfig = EngineConfig.parse(options.first)
+        second: EngineConfig = EngineConfig.parse(options.second)
+        openings: Optional[List[str]] = load_openings(options.openings) if options.openings else None
+        sprt: Optional[Sprt] = None
+        if options.sprt:
+            elo0, elo1 = (float(value) for value in options.sprt.split(","))
+            sprt = Sprt(elo0, elo1, options.alpha, options.beta)
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+
+    def report(result: MatchResult, record: GameRecord) -> None:
+        print(f"\r{result.summary(sprt)}", end="", flush=True)
+
+    result: MatchResult = run_match(first, second, openings, options.games, options.workers, sprt,
+                                    options.max_plies, progress=report)
+    print(f"\r{result.summary(sprt)}")
+    for reason, count in sorted(result.reasons.items(), key=lambda item: -item[1]):
+        print(f"{reason:>22}: {count}")
+    print(f"{result.games / result.elapsed if result.elapsed else 0:.2f} games/s")
+    return 0
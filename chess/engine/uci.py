@@ -0,0 +1,299 @@
+"""
+Universal Chess Interface front-end, python -m chess uci.
+
+Commands are read from stdin one line at a time and answered on stdout.
+Searches run on a background thread so stop, isready and quit are answered
+while the engine thinks; the thread prints bestmove when its search ends.
+With more than one thread the search is a lazy SMP search over worker
+processes (see chess.engine.parallel), which reports only its final result.
+With the BookFile option set, positions in the opening book (see
+chess.data.book) are answered with a book move without searching. With
+TablebasePath set, endgames the tables cover (see chess.data.tablebase)
+are answered from them and the single threaded search scores positions
+that reach them.
+"""
+import os
+import sys
+import threading
+from typing import List, Optional, TextIO
+
+from chess.custom_typehints import Colour, Move
+from chess.data.book import OpeningBook
+from chess.data.tablebase import Tablebase
+from chess.engine.parallel import ParallelSearcher
+from chess.engine.search import Searcher, SearchLimits, SearchResult, MATE_SCORE, MATE_THRESHOLD, time_for_move
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci, to_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.transposition import TranspositionTable
+
+ENGINE_NAME: str = "chess"
+ENGINE_AUTHOR: str = "lestherll"
+DEFAULT_HASH_MB: int = 16
+MAX_HASH_MB: int = 4096
+MAX_THREADS: int = 256
+
+
+def format_score(score: int) -> str:
+    """UCI score of a search score: centipawns, or moves to mate, negative when being mated"""
+    if score > MATE_THRESHOLD:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score < -MATE_THRESHOLD:
+        return f"mate {-((MATE_SCORE + score + 1) // 2)}"
+    return f"cp {score}"
+
+
+def info_line(result: SearchResult, hashfull: Optional[int] = None) -> str:
+    line: str = f"info depth {result.depth} score {format_score(result.score)} nodes {result.nodes} " \
+                f"nps {result.nps} time {int(result.time * 1000)}"
+    if hashfull is not None:
+        line += f" hashfull {hashfull}"
+    if result.pv:
+        line += " pv " + " ".join(to_uci(move) for move in result.pv)
+    return line
+
+
+class UciEngine:
+
+    def __init__(self, output: Optional[TextIO] = None) -> None:
+        """
+        State of one UCI session
+        :param output: where replies are written, stdout by default
+        """
+        self.output: TextIO = output if output is not None else sys.stdout
+        self.game: Game = Game()
+        self.hash_mb: int = DEFAULT_HASH_MB
+        self.threads: int = 1
+        self.table: TranspositionTable = TranspositionTable(self.hash_mb)
+        self._parallel: Optional[ParallelSearcher] = None
+        self.book: Optional[OpeningBook] = None
+        self.tablebase: Optional[Tablebase] = None
+        self._stop_event: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # whether the running search ends by itself, unlike go infinite
+        self._bounded: bool = False
+        self._output_lock: threading.Lock = threading.Lock()
+
+    def send(self, line: str) -> None:
+        """Write one line, from the command loop or the search thread"""
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line: str) -> bool:
+        """
+        Run one command line
+        :return: False once the session should end
+        """
+        words: List[str] = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send(f"option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebasePath type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.stop()
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            self.table.clear()
+            if self._parallel is not None:
+                self._parallel.clear()
+            self.game = Game()
+        elif command == "position":
+            self.stop()
+            self.set_position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            self.close()
+            return False
+        elif command == "d":
+            self.send(str(self.game.board))
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def set_option(self, args: List[str]) -> None:
+        """setoption name <name> value <value>"""
+        if "name" not in args:
+            return
+        value_at: int = args.index("value") if "value" in args else len(args)
+        name: str = " ".join(args[args.index("name") + 1:value_at]).lower()
+        value: str = " ".join(args[value_at + 1:])
+        try:
+            if name == "hash":
+                self.hash_mb = max(1, min(MAX_HASH_MB, int(value)))
+                self.table = TranspositionTable(self.hash_mb)
+                self._close_parallel()
+            elif name == "threads":
+                self.threads = max(1, min(MAX_THREADS, int(value)))
+                self._close_parallel()
+            elif name == "bookfile":
+                self._close_book()
+                if value and value != "<empty>":
+                    self.book = OpeningBook(value)
+            elif name == "tablebasepath":
+                self._close_tablebase()
+                if value and value != "<empty>":
+                    if not os.path.isdir(value):
+                        raise ValueError(f"no directory {value}")
+                    self.tablebase = Tablebase(value)
+            else:
+                self.send(f"info string unknown option {name}")
+        except (OSError, ValueError):
+            self.send(f"info string invalid value {value!r} for option {name}")
+
+    def set_position(self, args: List[str]) -> None:
+        """position [startpos | fen <fen>] [moves <move> ...]"""
+        moves_at: int = args.index("moves") if "moves" in args else len(args)
+        try:
+            if args and args[0] == "fen":
+                game: Game = game_from_fen(" ".join(args[1:moves_at]))
+            else:
+                game = game_from_fen(STARTING_FEN)
+        except ValueError as error:
+            self.send(f"info string invalid position: {error}")
+            return
+        for text in args[moves_at + 1:]:
+            try:
+                move = from_uci(text)
+            except ValueError:
+                move = None
+            if move is None or move not in generate_legal_moves(game):
+                self.send(f"info string illegal move {text}")
+                break
+            game.make_move(move)
+        self.game = game
+
+    def limits(self, args: List[str]) -> SearchLimits:
+        """Search limits of the arguments of go"""
+        values = {}
+        for i, word in enumerate(args[:-1]):
+            if word in ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo"):
+                try:
+                    values[word] = int(args[i + 1])
+                except ValueError:
+                    pass
+
+        limits: SearchLimits = SearchLimits(depth=values.get("depth"), nodes=values.get("nodes"))
+        if "infinite" in args:
+            return limits
+        if "movetime" in values:
+            limits.soft_time = limits.hard_time = values["movetime"] / 1000
+        else:
+            white: bool = self.game.turn() is Colour.WHITE
+            remaining: Optional[int] = values.get("wtime" if white else "btime")
+            if remaining is not None:
+                limits.soft_time, limits.hard_time = time_for_move(
+                    max(remaining, 0) / 1000, values.get("winc" if white else "binc", 0) / 1000,
+                    values.get("movestogo"))
+        return limits
+
+    def go(self, args: List[str]) -> None:
+        """Start searching the current position on a background thread"""
+        limits: SearchLimits = self.limits(args)
+        self._bounded = limits != SearchLimits()
+        self._stop_event.clear()
+        if self.threads > 1:
+            if self._parallel is None:
+                self._parallel = ParallelSearcher(workers=self.threads, hash_mb=self.hash_mb)
+            # cleared before the search thread starts, so a stop sent right after go is not lost
+            self._parallel.clear_stop()
+        self._thread = threading.Thread(target=self._search, args=(self.game, limits), daemon=True)
+        self._thread.start()
+
+    def _search(self, game: Game, limits: SearchLimits) -> None:
+        book_move: Optional[Move] = self.book.choose(game) if self.book is not None else None
+        if book_move is not None:
+            self.send("info string book move")
+            self.send(f"bestmove {to_uci(book_move)}")
+            return
+        if self.tablebase is not None and self.tablebase.probe(game) is not None:
+            # answered from the tables at the root, with whatever thread count
+            result: SearchResult = Searcher(table=self.table, tablebase=self.tablebase).search(game, limits)
+            self.send("info string tablebase move")
+            self.send(info_line(result))
+        elif self._parallel is not None:
+            result = self._parallel.search(game, limits, clear_stop=False)
+            self.send(info_line(result))
+        else:
+            searcher: Searcher = Searcher(table=self.table, stop_event=self._stop_event, tablebase=self.tablebase,
+                                          on_iteration=lambda iteration: self.send(
+                                              info_line(iteration, self.table.hashfull())))
+            result = searcher.search(game, limits)
+            if not result.depth:
+                # no iteration ran, a mated or stalemated root or a single legal move
+                self.send(info_line(result, self.table.hashfull()))
+        self.send(f"bestmove {to_uci(result.best_move)}" if result.best_move else "bestmove 0000")
+
+    def stop(self) -> None:
+        """Stop a running search and wait for its bestmove"""
+        self._stop_event.set()
+        if self._parallel is not None:
+            self._parallel.stop()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def wait(self) -> None:
+        """Wait until the running search, if any, has finished on its own"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait_if_bounded(self) -> None:
+        if self._bounded:
+            self.wait()
+
+    def _close_parallel(self) -> None:
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def _close_tablebase(self) -> None:
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+
+    def _close_book(self) -> None:
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def close(self) -> None:
+        self._close_parallel()
+        self._close_book()
+        self._close_tablebase()
+
+
+def main(args: List[str], input_stream: Optional[TextIO] = None) -> int:
+    """
+    Command line entry point: uci, then UCI commands on stdin
+    :return: exit status
+    """
+    engine: UciEngine = UciEngine()
+    try:
+        for line in input_stream if input_stream is not None else sys.stdin:
+            if not engine.handle(line):
+                break
+        else:
+            # input ended, e.g. a piped script, let a bounded search print its move
+            engine.wait_if_bounded()
+    finally:
+        engine.stop()
+        engine.close()
+    return 0
@@ -0,0 +1,136 @@
+"""
+Attack tables for the bitboard representation, built once at import.
+
+Knight, king and pawn attacks are looked up by square. Sliding attacks are
+looked up per line (rank, file, diagonal and anti-diagonal): every square has
+a mask of the line squares that can block it and a table indexed by the
+occupancy of that mask, so a rook or bishop costs two lookups and a queen four.
+"""
+from typing import List, Dict, Iterable
+
+from chess.constants import KNIGHT_DIRECTIONS, KING_DIRECTIONS, \
+    WHITE_PAWN_ATTACK_DIRECTIONS, BLACK_PAWN_ATTACK_DIRECTIONS
+from chess.custom_typehints import Coord2D, Square, Bitboard
+
+RANK_DIRECTIONS: List[Coord2D] = [(1, 0), (-1, 0)]
+FILE_DIRECTIONS: List[Coord2D] = [(0, 1), (0, -1)]
+DIAGONAL_DIRECTIONS: List[Coord2D] = [(1, 1), (-1, -1)]
+ANTI_DIAGONAL_DIRECTIONS: List[Coord2D] = [(1, -1), (-1, 1)]
+
+
+def _on_board(x: int, y: int) -> bool:
+    return 0 <= x < 8 and 0 <= y < 8
+
+
+def _step_attacks(square: Square, directions: Iterable[Coord2D]) -> Bitboard:
+    """Squares one step away from *square* in each direction"""
+    x, y = square & 7, square >> 3
+    attacks: Bitboard = 0
+    for dx, dy in directions:
+        if _on_board(x + dx, y + dy):
+            attacks |= 1 << ((y + dy) * 8 + x + dx)
+    return attacks
+
+
+def _ray_attacks(square: Square, occupied: Bitboard, directions: Iterable[Coord2D]) -> Bitboard:
+    """Squares reached by sliding from *square*, stopping on the first occupied square"""
+    x, y = square & 7, square >> 3
+    attacks: Bitboard = 0
+    for dx, dy in directions:
+        i, j = x + dx, y + dy
+        while _on_board(i, j):
+            bit: Bitboard = 1 << (j * 8 + i)
+            attacks |= bit
+            if occupied & bit:
+                break
+            i, j = i + dx, j + dy
+    return attacks
+
+
+def _blocker_mask(square: Square, directions: Iterable[Coord2D]) -> Bitboard:
+    """Squares along the rays of *square* that can block it, board edges excluded"""
+    x, y = square & 7, square >> 3
+    mask: Bitboard = 0
+    for dx, dy in directions:
+        i, j = x + dx, y + dy
+        while _on_board(i + dx, j + dy):
+            mask |= 1 << (j * 8 + i)
+            i, j = i + dx, j + dy
+    return mask
+
+
+def _line_table(directions: List[Coord2D]):
+    """Blocker masks and occupancy indexed attack tables of one line family for every square"""
+    masks: List[Bitboard] = []
+    tables: List[Dict[Bitboard, Bitboard]] = []
+    for square in range(64):
+        mask: Bitboard = _blocker_mask(square, directions)
+        table: Dict[Bitboard, Bitboard] = {}
+        # walk every subset of the mask (Carry-Rippler)
+        subset: Bitboard = 0
+        while True:
+            table[subset] = _ray_attacks(square, subset, directions)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+KNIGHT_ATTACKS: List[Bitboard] = [_step_attacks(square, KNIGHT_DIRECTIONS) for square in range(64)]
+KING_ATTACKS: List[Bitboard] = [_step_attacks(square, KING_DIRECTIONS) for square in range(64)]
+# indexed by colour index first (0 white, 1 black), then by square
+PAWN_ATTACKS: List[List[Bitboard]] = [
+    [_step_attacks(square, WHITE_PAWN_ATTACK_DIRECTIONS) for square in range(64)],
+    [_step_attacks(square, BLACK_PAWN_ATTACK_DIRECTIONS) for square in range(64)],
+]
+
+RANK_MASKS, RANK_ATTACKS = _line_table(RANK_DIRECTIONS)
+FILE_MASKS, FILE_ATTACKS = _line_table(FILE_DIRECTIONS)
+DIAGONAL_MASKS, DIAGONAL_ATTACKS = _line_table(DIAGONAL_DIRECTIONS)
+ANTI_DIAGONAL_MASKS, ANTI_DIAGONAL_ATTACKS = _line_table(ANTI_DIAGONAL_DIRECTIONS)
+
+
+def _ray_squares(square: Square, direction: Coord2D) -> List[Square]:
+    x, y = square & 7, square >> 3
+    dx, dy = direction
+    squares: List[Square] = []
+    i, j = x + dx, y + dy
+    while _on_board(i, j):
+        squares.append(j * 8 + i)
+        i, j = i + dx, j + dy
+    return squares
+
+
+def _alignment_tables():
+    """Squares strictly between two aligned squares and the whole line through them"""
+    between: List[List[Bitboard]] = [[0] * 64 for _ in range(64)]
+    line: List[List[Bitboard]] = [[0] * 64 for _ in range(64)]
+    for families in (RANK_DIRECTIONS, FILE_DIRECTIONS, DIAGONAL_DIRECTIONS, ANTI_DIAGONAL_DIRECTIONS):
+        for square in range(64):
+            full_line: Bitboard = _ray_attacks(square, 0, families) | 1 << square
+            for direction in families:
+                path: Bitboard = 0
+                for target in _ray_squares(square, direction):
+                    between[square][target] = path
+                    line[square][target] = full_line
+                    path |= 1 << target
+    return between, line
+
+
+BETWEEN, LINE = _alignment_tables()
+
+
+def rook_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return RANK_ATTACKS[square][occupied & RANK_MASKS[square]] | \
+           FILE_ATTACKS[square][occupied & FILE_MASKS[square]]
+
+
+def bishop_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return DIAGONAL_ATTACKS[square][occupied & DIAGONAL_MASKS[square]] | \
+           ANTI_DIAGONAL_ATTACKS[square][occupied & ANTI_DIAGONAL_MASKS[square]]
+
+
+def queen_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
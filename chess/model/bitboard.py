@@ -0,0 +1,349 @@
+"""
+Bitboard representation of a chess board. Each piece type of each colour is
+kept as a 64-bit integer where bit ``y * 8 + x`` is set when the piece stands
+on the (x, y) coordinate, so (0, 0) is a8 and (7, 7) is h1.
+"""
+from typing import List, Optional, Iterable, Union, Iterator, Dict, Type, Callable
+
+from chess.custom_typehints import Coord2D, Coord2DSet, Colour, Square, Bitboard
+from chess.model.attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, \
+    rook_attacks, bishop_attacks, queen_attacks
+from chess.model.board import Block
+from chess.model.pieces import Piece, Pawn, Knight, Bishop, Rook, Queen, King
+from chess.model.psqt import MIDGAME_SCORES, ENDGAME_SCORES, PHASES
+from chess.model.zobrist import PIECE_KEYS, PAWN_KEYS
+
+BOARD_LENGTH: int = 8
+
+# colour indices
+WHITE: int = 0
+BLACK: int = 1
+
+# piece type indices, a piece code is piece type + 6 * colour index
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+EMPTY: int = -1
+
+COLOUR_INDEX: Dict[Colour, int] = {Colour.WHITE: WHITE, Colour.BLACK: BLACK}
+INDEX_COLOUR: List[Colour] = [Colour.WHITE, Colour.BLACK]
+PIECE_INDEX: Dict[Type[Piece], int] = {
+    Pawn: PAWN,
+    Knight: KNIGHT,
+    Bishop: BISHOP,
+    Rook: ROOK,
+    Queen: QUEEN,
+    King: KING
+}
+PIECE_TYPES: List[Type[Piece]] = [Pawn, Knight, Bishop, Rook, Queen, King]
+# the shared piece instance of every piece code
+PIECES: List[Piece] = [PIECE_TYPES[code % 6](INDEX_COLOUR[code // 6]) for code in range(12)]
+
+SQUARE_COORDS: List[Coord2D] = [(square & 7, square >> 3) for square in range(64)]
+SQUARE_BITS: List[Bitboard] = [1 << square for square in range(64)]
+
+
+def to_square(coord: Coord2D) -> Square:
+    """Convert an (x, y) coordinate to its bit index"""
+    return coord[1] * BOARD_LENGTH + coord[0]
+
+
+def to_coord(square: Square) -> Coord2D:
+    """Convert a bit index to its (x, y) coordinate"""
+    return SQUARE_COORDS[square]
+
+
+def iter_squares(bitboard: Bitboard) -> Iterator[Square]:
+    """Yield the index of every set bit of *bitboard* from least to most significant"""
+    while bitboard:
+        lowest: Bitboard = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+def popcount(bitboard: Bitboard) -> int:
+    return bin(bitboard).count("1")
+
+
+def piece_code(piece: Piece) -> int:
+    """Index of the bitboard that tracks pieces of the same type and colour as *piece*"""
+    return PIECE_INDEX[type(piece)] + 6 * COLOUR_INDEX[piece.colour]
+
+
+class BitBoard:
+    __slots__ = ("pieces", "occupancy", "occupied", "codes", "squares", "unmoved", "zobrist_key",
+                 "on_mutation", "pawn_key", "midgame_score", "endgame_score", "phase", "attacks_from", "_attack_maps")
+
+    def __init__(self) -> None:
+        """
+        A standard 8x8 chess board backed by twelve bitboards, one per piece
+        type and colour, plus an occupancy mask for each colour. The shared
+        piece objects are kept in a 64 square mailbox next to their codes.
+        """
+        self.pieces: List[Bitboard] = [0] * 12
+        self.occupancy: List[Bitboard] = [0, 0]
+        self.occupied: Bitboard = 0
+        self.codes: List[int] = [EMPTY] * 64
+        self.squares: List[Optional[Piece]] = [None] * 64
+        # squares whose piece has not moved since it was put there
+        self.unmoved: Bitboard = 0
+        # Zobrist key of the piece placement, kept up to date on every change
+        self.zobrist_key: int = 0
+        # called with the board before each change through the public methods,
+        # see chess.model.move_cache.MoveCache.watch
+        self.on_mutation: Optional[Callable[["BitBoard"], None]] = None
+        # Zobrist key of the pawns alone, for caching pawn structure terms
+        self.pawn_key: int = 0
+        # material and piece-square sums from white's point of view and the
+        # game phase, see chess.model.psqt, also kept up to date on every change
+        self.midgame_score: int = 0
+        self.endgame_score: int = 0
+        self.phase: int = 0
+
+        # squares attacked by the piece on each square and the union of
+        # those per colour, the unions are rebuilt lazily after a change
+        self.attacks_from: List[Bitboard] = [0] * 64
+        self._attack_maps: List[Optional[Bitboard]] = [0, 0]
+
+    def __getstate__(self) -> Dict[str, object]:
+        # the mutation hook belongs to this board only, copies and pickles are unwatched
+        return {name: getattr(self, name) for name in self.__slots__ if name != "on_mutation"}
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.on_mutation = None
+
+    def __len__(self) -> int:
+        return BOARD_LENGTH
+
+    def __getitem__(self, pos: Union[int, Block]) -> Union[Block, List[Block]]:
+        """
+        Read-only access in the shape of Board, board[y][x] gives a Block.
+        Assigning to the returned blocks does not change the board.
+        """
+        if isinstance(pos, Block):
+            return self.get_block_from_tuple((pos.x, pos.y))
+        y: int = range(BOARD_LENGTH)[pos]
+        return [Block(x=x, y=y, piece=self.squares[y * BOARD_LENGTH + x]) for x in range(BOARD_LENGTH)]
+
+    def __repr__(self) -> str:
+        return f"BitBoard(pieces={[hex(bitboard) for bitboard in self.pieces]})"
+
+    def __str__(self) -> str:
+        board: List[str] = [" " + "".join([f"{letter:>3}" for letter in "abcdefgh"])]
+        for y in range(BOARD_LENGTH):
+            row: List[Optional[Piece]] = self.squares[y * BOARD_LENGTH:(y + 1) * BOARD_LENGTH]
+            board.append(f"{8 - y:<3}" + "".join([f"{str(p):3}" if p is not None else ".. " for p in row]))
+        return "\n".join(board)
+
+    def _set(self, square: Square, piece: Piece) -> None:
+        code: int = piece_code(piece)
+        bit: Bitboard = SQUARE_BITS[square]
+        self.pieces[code] |= bit
+        self.occupancy[code // 6] |= bit
+        self.occupied |= bit
+        self.codes[square] = code
+        self.squares[square] = piece
+        self.zobrist_key ^= PIECE_KEYS[code][square]
+        self.pawn_key ^= PAWN_KEYS[code][square]
+        self.midgame_score += MIDGAME_SCORES[code][square]
+        self.endgame_score += ENDGAME_SCORES[code][square]
+        self.phase += PHASES[code]
+
+    def _unset(self, square: Square) -> Optional[Piece]:
+        code: int = self.codes[square]
+        if code == EMPTY:
+            return None
+        mask: Bitboard = ~SQUARE_BITS[square]
+        self.pieces[code] &= mask
+        self.occupancy[code // 6] &= mask
+        self.occupied &= mask
+        self.unmoved &= mask
+        self.codes[square] = EMPTY
+        self.zobrist_key ^= PIECE_KEYS[code][square]
+        self.pawn_key ^= PAWN_KEYS[code][square]
+        self.midgame_score -= MIDGAME_SCORES[code][square]
+        self.endgame_score -= ENDGAME_SCORES[code][square]
+        self.phase -= PHASES[code]
+        piece: Optional[Piece] = self.squares[square]
+        self.squares[square] = None
+        return piece
+
+    def _piece_attacks(self, square: Square, code: int) -> Bitboard:
+        piece_type: int = code % 6
+        if piece_type == PAWN:
+            return PAWN_ATTACKS[code // 6][square]
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[square]
+        if piece_type == BISHOP:
+            return bishop_attacks(square, self.occupied)
+        if piece_type == ROOK:
+            return rook_attacks(square, self.occupied)
+        if piece_type == QUEEN:
+            return queen_attacks(square, self.occupied)
+        return KING_ATTACKS[square]
+
+    def _update_attacks(self, *changed: Square) -> None:
+        """
+        Recompute the attacks of the pieces on the changed squares and of every
+        slider whose rays reach one of them, which are the only attacks a
+        placement, removal or move can alter
+        """
+        pieces: List[Bitboard] = self.pieces
+        occupied: Bitboard = self.occupied
+        queens: Bitboard = pieces[QUEEN] | pieces[QUEEN + 6]
+        rooks: Bitboard = pieces[ROOK] | pieces[ROOK + 6] | queens
+        bishops: Bitboard = pieces[BISHOP] | pieces[BISHOP + 6] | queens
+
+        sliders: Bitboard = 0
+        for square in changed:
+            sliders |= rook_attacks(square, occupied) & rooks | bishop_attacks(square, occupied) & bishops
+            code: int = self.codes[square]
+            self.attacks_from[square] = self._piece_attacks(square, code) if code != EMPTY else 0
+            sliders &= ~SQUARE_BITS[square]
+
+        for square in iter_squares(sliders):
+            self.attacks_from[square] = self._piece_attacks(square, self.codes[square])
+        self._attack_maps[0] = self._attack_maps[1] = None
+
+    def attack_map(self, colour: Union[Colour, int]) -> Bitboard:
+        """
+        Every square attacked by the given colour (or colour index), squares of
+        defended allied pieces included
+        """
+        side: int = colour if isinstance(colour, int) else COLOUR_INDEX[colour]
+        attacks: Optional[Bitboard] = self._attack_maps[side]
+        if attacks is None:
+            attacks = 0
+            for square in iter_squares(self.occupancy[side]):
+                attacks |= self.attacks_from[square]
+            self._attack_maps[side] = attacks
+        return attacks
+
+    def is_attacked(self, square: Square, colour: Union[Colour, int]) -> bool:
+        """Whether *square* is attacked by the given colour (or colour index)"""
+        return bool(self.attack_map(colour) & SQUARE_BITS[square])
+
+    def put_square(self, square: Square, piece: Piece, has_moved: bool = False) -> None:
+        """Square index counterpart of put_piece"""
+        if self.on_mutation is not None:
+            self.on_mutation(self)
+        self._unset(square)
+        self._set(square, piece)
+        if not has_moved:
+            self.unmoved |= SQUARE_BITS[square]
+        self._update_attacks(square)
+
+    def move_square(self, from_sq: Square, to_sq: Square) -> None:
+        """Square index counterpart of move_piece"""
+        if self.on_mutation is not None:
+            self.on_mutation(self)
+        piece: Optional[Piece] = self._unset(from_sq)
+        self._unset(to_sq)
+        if piece is not None:
+            self._set(to_sq, piece)
+        self._update_attacks(from_sq, to_sq)
+
+    def remove_square(self, square: Square) -> Optional[Piece]:
+        """Square index counterpart of remove_piece_at, returns the removed piece"""
+        if self.on_mutation is not None:
+            self.on_mutation(self)
+        piece: Optional[Piece] = self._unset(square)
+        if piece is not None:
+            self._update_attacks(square)
+        return piece
+
+    def put_piece(self, to_coord: Coord2D, piece: Piece, has_moved: bool = False) -> None:
+        """
+        Places a piece to the given 2D coordinate (x, y), replacing any piece already there
+        :param to_coord: (x, y) coordinate of where to put the given piece
+        :param piece: piece to be put on the board on to_coord
+        :param has_moved: whether the piece counts as moved, e.g. for castling
+        :return: None
+        """
+        self.put_square(to_square(to_coord), piece, has_moved)
+
+    def has_moved(self, coord: Coord2D) -> bool:
+        """Whether the piece on *coord* moved since it was put on the board"""
+        return not self.unmoved & SQUARE_BITS[to_square(coord)]
+
+    def get_block_from_tuple(self, from_coord: Coord2D) -> Block:
+        return Block(x=from_coord[0], y=from_coord[1], piece=self.squares[to_square(from_coord)])
+
+    def piece_at(self, coord: Coord2D) -> Optional[Piece]:
+        return self.squares[to_square(coord)]
+
+    def move_piece(self, from_coord: Coord2D, to_coord: Coord2D) -> None:
+        """
+        Move a piece from_coord to to_coord on the board. Both 2D coordinates are ordered x,y.
+        Whatever stood on to_coord is replaced.
+        :param from_coord: origin of the piece to be moved
+        :param to_coord: destination of the piece to be moved
+        :return: None
+        """
+        self.move_square(to_square(from_coord), to_square(to_coord))
+
+    def remove_piece_at(self, from_coord: Coord2D) -> None:
+        """
+        Removes a piece at given coordinate
+        :param from_coord: origin of the piece to be removed
+        :return: None
+        """
+        self.remove_square(to_square(from_coord))
+
+    def clear(self) -> None:
+        """
+        Clears the board of pieces
+        :return: None
+        """
+        if self.on_mutation is not None:
+            self.on_mutation(self)
+        for square in iter_squares(self.occupied):
+            self._unset(square)
+        self.unmoved = 0
+        self.attacks_from = [0] * 64
+        self._attack_maps = [0, 0]
+
+    def get_king_location(self, colour: Colour) -> Optional[Coord2D]:
+        king: Bitboard = self.pieces[KING + 6 * COLOUR_INDEX[colour]]
+        if not king:
+            return None
+        return SQUARE_COORDS[(king & -king).bit_length() - 1]
+
+    def get_pieces(self, colour: Colour, piece_type: Type[Piece]) -> Coord2DSet:
+        """
+        Get the pieces of one type and colour that are on the board
+        :param colour: the colour of pieces needed
+        :param piece_type: the type of pieces needed
+        :return: set of 2D tuples of the pieces wanted
+        """
+        bitboard: Bitboard = self.pieces[PIECE_INDEX[piece_type] + 6 * COLOUR_INDEX[colour]]
+        return {SQUARE_COORDS[square] for square in iter_squares(bitboard)}
+
+    def get_pieces_by_colour(self, colour: Colour, exclude_type: Iterable = None) -> Coord2DSet:
+        """
+        Get all pieces that are on the board by colour
+        :param colour: the colour of pieces needed
+        :param exclude_type: excluded type pieces
+        :return: set of 2D tuples that contain all the pieces wanted by colour
+        """
+        offset: int = 6 * COLOUR_INDEX[colour]
+        mask: Bitboard = self.occupancy[offset // 6]
+        for piece_type in exclude_type or []:
+            if piece_type in PIECE_INDEX:
+                mask &= ~self.pieces[PIECE_INDEX[piece_type] + offset]
+        return {SQUARE_COORDS[square] for square in iter_squares(mask)}
+
+    def reverse_pieces(self) -> None:
+        """
+        Reverses the board
+        :return: None
+        """
+        if self.on_mutation is not None:
+            self.on_mutation(self)
+        unmoved: Bitboard = self.unmoved
+        placed: List = [(square, self._unset(square)) for square in list(iter_squares(self.occupied))]
+        for square, piece in placed:
+            self._set(square ^ 56, piece)
+            if unmoved & SQUARE_BITS[square]:
+                self.unmoved |= SQUARE_BITS[square ^ 56]
+        self._update_attacks(*iter_squares(self.occupied))
@@ -1,18 +1,27 @@
-from dataclasses import dataclass
-from typing import Union, List, Any, Optional, Iterable, Tuple, Literal
+from typing import Union, List, Any, Optional, Iterable, Tuple, Literal, Set, Dict, Type
 
 from chess.custom_typehints import Coord2D, Coord2DSet, Colour
 from chess.model.pieces import Piece, King
 
 
-@dataclass
 class Block:
     """
     A block inside a chess board
     """
-    x: int
-    y: int
-    piece: Optional[Piece] = None
+    __slots__ = ("x", "y", "piece")
+
+    def __init__(self, x: int, y: int, piece: Optional[Piece] = None) -> None:
+        self.x: int = x
+        self.y: int = y
+        self.piece: Optional[Piece] = piece
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Block):
+            return NotImplemented
+        return (self.x, self.y, self.piece) == (other.x, other.y, other.piece)
+
+    def __repr__(self) -> str:
+        return f"Block(x={self.x}, y={self.y}, piece={self.piece!r})"
 
     def colour(self) -> Optional[Colour]:
         return None if not self.piece else self.piece.colour
@@ -31,6 +40,11 @@ class Board:
         """
         self.blocks: List[List[Block]] = [[Block(x=i, y=j) for i in range(_length)]
                                           for j in range(_length)]
+        # pieces are shared between boards, so whether one has moved is kept here
+        self.moved: Set[Coord2D] = set()
+        # coordinates of the pieces of each colour by piece type, kept up to
+        # date by the methods below, pieces must not be put on blocks directly
+        self.piece_coords: Dict[Colour, Dict[Type[Piece], Set[Coord2D]]] = {Colour.WHITE: {}, Colour.BLACK: {}}
 
     def __len__(self) -> int:
         return len(self.blocks)
@@ -55,14 +69,34 @@ class Board:
 
         return "\n".join(board)
 
-    def put_piece(self, to_coord: Coord2D, piece: Piece) -> None:
+    def _place(self, coord: Coord2D, piece: Optional[Piece]) -> Optional[Piece]:
+        """Put *piece* (or nothing) on *coord*, keeping piece_coords in step, returns the piece that was there"""
+        block: Block = self.blocks[coord[1]][coord[0]]
+        old: Optional[Piece] = block.piece
+        if old is not None:
+            self.piece_coords[old.colour][type(old)].discard((block.x, block.y))
+        if piece is not None:
+            self.piece_coords[piece.colour].setdefault(type(piece), set()).add((block.x, block.y))
+        block.piece = piece
+        return old
+
+    def put_piece(self, to_coord: Coord2D, piece: Piece, has_moved: bool = False) -> None:
         """
         Places a piece to the given 2D coordinate (x, y)
         :param to_coord: (x, y) coordinate of where to put the given piece
         :param piece: piece to be put on the board on to_coord
+        :param has_moved: whether the piece counts as moved, e.g. for castling
         :return: None
         """
-        self.blocks[to_coord[1]][to_coord[0]].piece = piece
+        self._place(to_coord, piece)
+        if has_moved:
+            self.moved.add(tuple(to_coord))
+        else:
+            self.moved.discard(tuple(to_coord))
+
+    def has_moved(self, coord: Coord2D) -> bool:
+        """Whether the piece on *coord* moved since it was put on the board"""
+        return tuple(coord) in self.moved
 
     def get_block_from_tuple(self, from_coord: Coord2D) -> Block:
         return self.blocks[from_coord[1]][from_coord[0]]
@@ -74,9 +108,10 @@ class Board:
         :param to_coord: destination of the piece to be moved
         :return: None
         """
-        piece: Optional[Piece] = self.blocks[from_coord[1]][from_coord[0]].piece
-        self.blocks[from_coord[1]][from_coord[0]].piece = None
-        self.blocks[to_coord[1]][to_coord[0]].piece = piece
+        piece: Optional[Piece] = self._place(from_coord, None)
+        self._place(to_coord, piece)
+        self.moved.discard(tuple(from_coord))
+        self.moved.add(tuple(to_coord))
 
     def remove_piece_at(self, from_coord: Coord2D) -> None:
         """
@@ -84,7 +119,8 @@ class Board:
         :param from_coord: origin of the piece to be removed
         :return: None
         """
-        self.blocks[from_coord[1]][from_coord[0]].piece = None
+        self._place(from_coord, None)
+        self.moved.discard(tuple(from_coord))
 
     def clear(self) -> None:
         """
@@ -94,13 +130,21 @@ class Board:
         for row in self.blocks:
             for block in row:
                 block.piece = None
+        self.moved.clear()
+        self.piece_coords = {Colour.WHITE: {}, Colour.BLACK: {}}
 
-    def get_king_location(self, colour: Colour) -> Coord2D:
-        for row in self.blocks:
-            for block in row:
-                # if block.piece is not None:
-                if isinstance(block.piece, King) and block.colour() is colour:
-                    return block.x, block.y
+    def get_king_location(self, colour: Colour) -> Optional[Coord2D]:
+        kings: Coord2DSet = self.piece_coords[colour].get(King, set())
+        return next(iter(kings)) if kings else None
+
+    def get_pieces(self, colour: Colour, piece_type: Type[Piece]) -> Coord2DSet:
+        """
+        Get the pieces of one type and colour that are on the board
+        :param colour: the colour of pieces needed
+        :param piece_type: the type of pieces needed
+        :return: set of 2D tuples of the pieces wanted
+        """
+        return set(self.piece_coords[colour].get(piece_type, ()))
 
     def get_pieces_by_colour(self, colour: Colour, exclude_type: Iterable = None) -> Coord2DSet:
         """
@@ -115,10 +159,9 @@ class Board:
             exclude_type = []
 
         coords: Coord2DSet = set()
-        for j, row in enumerate(self.blocks):
-            for i, block in enumerate(row):
-                if block.colour() == colour and type(block.piece) not in exclude_type:
-                    coords.add((i, j))
+        for piece_type, type_coords in self.piece_coords[colour].items():
+            if piece_type not in exclude_type:
+                coords |= type_coords
         return coords
 
     def reverse_pieces(self) -> None:
@@ -130,6 +173,10 @@ class Board:
         for j in range(length // 2):
             for b0, b1 in zip(self.blocks[j], self.blocks[length - j - 1]):
                 b0.piece, b1.piece = b1.piece, b0.piece
+        self.moved = {(x, length - y - 1) for x, y in self.moved}
+        self.piece_coords = {colour: {piece_type: {(x, length - y - 1) for x, y in coords}
+                                      for piece_type, coords in by_type.items()}
+                             for colour, by_type in self.piece_coords.items()}
         # print(self.blocks)
 
 
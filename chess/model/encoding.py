@@ -0,0 +1,93 @@
+"""
+Fixed width binary encoding of positions, 32 bytes each.
+
+Layout, little-endian:
+    bytes 0-7   occupancy bitboard
+    bytes 8-23  piece code (0-11, see chess.model.bitboard) of every occupied
+                square in ascending square order, two per byte, low nibble first
+    byte 24     bit 0 black to move, bits 1-4 castling rights
+    byte 25     en passant file + 1, 0 when there is no en passant square
+    byte 26     halfmove clock
+    bytes 27-28 fullmove number
+    bytes 29-31 reserved, zero
+
+A legal position has at most 32 pieces so the piece codes always fit. Fixed
+width records can be sliced straight out of a file or a mmap without any
+parsing to find where a record ends.
+"""
+import struct
+from typing import Iterator, Optional, Union
+
+from chess.custom_typehints import Colour
+from chess.model.bitboard import BitBoard, PIECES, iter_squares
+from chess.model.fen import make_game
+from chess.model.game import Game
+
+POSITION_BYTES: int = 32
+MAX_PIECES: int = 32
+
+_LAYOUT: struct.Struct = struct.Struct("<Q16sBBBH3x")
+
+
+def encode_position(game: Game) -> bytes:
+    """
+    Pack the position of *game* into POSITION_BYTES bytes
+    :raises ValueError: when the board holds more than 32 pieces
+    :return: the encoded position
+    """
+    board: BitBoard = game.board
+    codes = board.codes
+    occupied: int = board.occupied
+    nibbles: bytearray = bytearray(16)
+    for i, square in enumerate(iter_squares(occupied)):
+        if i == MAX_PIECES:
+            raise ValueError("cannot encode a position with more than 32 pieces")
+        nibbles[i >> 1] |= codes[square] << (4 * (i & 1))
+
+    flags: int = (game.turn() is Colour.BLACK) | game.castling_rights << 1
+    en_passant: int = (game.en_passant & 7) + 1 if game.en_passant is not None else 0
+    fullmove_number: int = (game.turn_number - 1) // 2 + 1
+    return _LAYOUT.pack(occupied, bytes(nibbles), flags, en_passant,
+                        min(game.halfmove_clock, 255), min(fullmove_number, 0xFFFF))
+
+
+def decode_position(data: Union[bytes, bytearray, memoryview]) -> Game:
+    """
+    Rebuild a game from the output of encode_position
+    :raises ValueError: when *data* is not a valid encoded position
+    :return: game in the encoded position
+    """
+    if len(data) != POSITION_BYTES:
+        raise ValueError(f"encoded position must be {POSITION_BYTES} bytes, got {len(data)}")
+    occupied, nibbles, flags, en_passant, halfmove_clock, fullmove_number = _LAYOUT.unpack(data)
+
+    board: BitBoard = BitBoard()
+    for i, square in enumerate(iter_squares(occupied)):
+        if i == MAX_PIECES:
+            raise ValueError("encoded position has more than 32 pieces")
+        code: int = nibbles[i >> 1] >> (4 * (i & 1)) & 0xF
+        if code >= 12:
+            raise ValueError(f"invalid piece code {code} on square {square}")
+        board.put_square(square, PIECES[code], has_moved=True)
+
+    is_white_turn: bool = not flags & 1
+    en_passant_square: Optional[int] = None
+    if en_passant:
+        if en_passant > 8:
+            raise ValueError(f"invalid en passant file {en_passant - 1}")
+        # the skipped square is on the 3rd rank of the side that just moved
+        en_passant_square = (2 if is_white_turn else 5) * 8 + en_passant - 1
+    return make_game(board, is_white_turn, flags >> 1 & 0xF, en_passant_square,
+                     halfmove_clock, max(1, fullmove_number))
+
+
+def iter_positions(data: Union[bytes, bytearray, memoryview]) -> Iterator[Game]:
+    """
+    Decode consecutive encoded positions, e.g. a whole file read or mapped into memory
+    :raises ValueError: when the length of *data* is not a multiple of POSITION_BYTES
+    """
+    if len(data) % POSITION_BYTES:
+        raise ValueError(f"data length {len(data)} is not a multiple of {POSITION_BYTES}")
+    view: memoryview = memoryview(data)
+    for offset in range(0, len(view), POSITION_BYTES):
+        yield decode_position(view[offset:offset + POSITION_BYTES])
@@ -0,0 +1,201 @@
+"""
+Forsyth-Edwards Notation import and export for Board and Game
+"""
+from typing import Dict, Type, Optional, List, Union, Tuple
+
+from chess.constants import WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from chess.custom_typehints import Colour, GameStatus
+from chess.model.bitboard import BitBoard, PAWN, KING, ROOK, PIECES, PIECE_TYPES, iter_squares
+from chess.model.board import Board
+from chess.model.game import Game, CASTLING_SQUARES
+from chess.model.move import FILES, parse_square, square_name
+from chess.model.pieces import Piece, Pawn, Rook, Knight, Bishop, Queen, King
+
+STARTING_FEN: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+fen_pieces: Dict[str, Type[Piece]] = {
+    "k": King,
+    "q": Queen,
+    "b": Bishop,
+    "n": Knight,
+    "r": Rook,
+    "p": Pawn
+}
+castling_letters: Dict[str, int] = {
+    "K": WHITE_KINGSIDE,
+    "Q": WHITE_QUEENSIDE,
+    "k": BLACK_KINGSIDE,
+    "q": BLACK_QUEENSIDE
+}
+# piece code of each FEN letter, see chess.model.bitboard
+fen_codes: Dict[str, int] = {letter.upper(): PIECE_TYPES.index(piece) for letter, piece in fen_pieces.items()}
+fen_codes.update({letter.lower(): code + 6 for letter, code in fen_codes.items()})
+
+
+def game_from_fen(fen: str) -> Game:
+    """
+    Build a game from a FEN record
+    :param fen: placement, side to move, castling rights, en passant square
+    and optionally the halfmove clock and fullmove number
+    :raises ValueError: when the record is malformed
+    :return: game in the described position
+    """
+    placement, is_white_turn, rights, en_passant, halfmove_clock, fullmove_number = _parse_fen(fen)
+    board: BitBoard = BitBoard()
+    for square, code in placement:
+        board.put_square(square, PIECES[code], has_moved=True)
+    return make_game(board, is_white_turn, rights, en_passant, halfmove_clock, fullmove_number)
+
+
+def load_fen(game: Game, fen: str) -> Game:
+    """
+    Set up an existing game in the position of a FEN record, reusing its
+    board instead of allocating a new one. The move history is dropped.
+    :param game: game to overwrite, left untouched when the record is malformed
+    :param fen: FEN record, see game_from_fen
+    :raises ValueError: when the record is malformed
+    :return: the same game
+    """
+    placement, is_white_turn, rights, en_passant, halfmove_clock, fullmove_number = _parse_fen(fen)
+    board: BitBoard = game.board
+    board.clear()
+    for square, code in placement:
+        board.put_square(square, PIECES[code], has_moved=True)
+    _mark_unmoved(board, rights)
+    game.moves_made.clear()
+    game._undo_stack.clear()
+    game._key_history.clear()
+    game.status = GameStatus.NORMAL
+    game._is_white_turn = is_white_turn
+    game.castling_rights = rights & game._castling_rights_from_board()
+    _set_state(game, is_white_turn, en_passant, halfmove_clock, fullmove_number)
+    return game
+
+
+def make_game(board: BitBoard, is_white_turn: bool, castling_rights: int, en_passant: Optional[int],
+              halfmove_clock: int = 0, fullmove_number: int = 1) -> Game:
+    """
+    Wrap a board and the position state in a Game, the unmoved flags of the
+    board are set to agree with the castling rights and pawn rows
+    """
+    _mark_unmoved(board, castling_rights)
+    game: Game = Game(board=board, is_white_turn=is_white_turn)
+    game.castling_rights = castling_rights & game.castling_rights
+    _set_state(game, is_white_turn, en_passant, halfmove_clock, fullmove_number)
+    return game
+
+
+def _set_state(game: Game, is_white_turn: bool, en_passant: Optional[int], halfmove_clock: int,
+               fullmove_number: int) -> None:
+    game.en_passant = en_passant
+    game.halfmove_clock = halfmove_clock
+    game.turn_number = 2 * (fullmove_number - 1) + (1 if is_white_turn else 2)
+
+
+def _parse_fen(fen: str) -> Tuple[List[Tuple[int, int]], bool, int, Optional[int], int, int]:
+    """
+    Split a FEN record into (square, piece code) pairs, whether white is to
+    move, castling rights, en passant square, halfmove clock and fullmove number
+    :raises ValueError: when the record is malformed
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+    placement, side, castling, en_passant = fields[:4]
+
+    rows = placement.split("/")
+    if len(rows) != 8:
+        raise ValueError(f"FEN placement needs 8 rows: {placement!r}")
+    pieces: List[Tuple[int, int]] = []
+    for y, row in enumerate(rows):
+        x: int = 0
+        for char in row:
+            if char.isdigit():
+                x += int(char)
+            elif char in fen_codes and x < 8:
+                pieces.append((y * 8 + x, fen_codes[char]))
+                x += 1
+            else:
+                raise ValueError(f"invalid FEN row {row!r}")
+        if x != 8:
+            raise ValueError(f"FEN row {row!r} does not cover 8 squares")
+
+    if side not in ("w", "b"):
+        raise ValueError(f"invalid side to move {side!r}")
+    rights: int = 0
+    if castling != "-":
+        for char in castling:
+            if char not in castling_letters:
+                raise ValueError(f"invalid castling rights {castling!r}")
+            rights |= castling_letters[char]
+    # a pawn that just moved two squares leaves the square behind it on the 6th or 3rd rank
+    if en_passant != "-" and (len(en_passant) != 2 or en_passant[0] not in FILES
+                              or en_passant[1] != ("6" if side == "w" else "3")):
+        raise ValueError(f"invalid en passant square {en_passant!r}")
+    en_passant_square: Optional[int] = None if en_passant == "-" else parse_square(en_passant)
+    if en_passant_square is not None and not can_take_en_passant(dict(pieces), side == "w", en_passant_square):
+        raise ValueError("no pawn can be taken en passant")
+    try:
+        halfmove_clock: int = int(fields[4]) if len(fields) > 4 else 0
+        fullmove_number: int = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"invalid FEN state fields: {fen!r}")
+    if halfmove_clock < 0 or fullmove_number < 1:
+        raise ValueError(f"FEN move clocks out of range: {fen!r}")
+    return pieces, side == "w", rights, en_passant_square, halfmove_clock, fullmove_number
+
+
+def can_take_en_passant(codes: Dict[int, int], is_white_turn: bool, en_passant: int) -> bool:
+    """
+    Whether a pawn of the side not to move can have just skipped *en_passant*
+    :param codes: piece code of each occupied square
+    :param is_white_turn: whether white is to move
+    :param en_passant: square the pawn skipped
+    :return: True when the pawn stands just beyond the square and both the
+    square and the one the pawn started from are empty
+    """
+    step: int = 8 if is_white_turn else -8
+    return codes.get(en_passant + step) == PAWN + (6 if is_white_turn else 0) \
+        and en_passant not in codes and en_passant - step not in codes
+
+
+def board_to_fen(board: Union[Board, BitBoard]) -> str:
+    """Piece placement field of FEN for an 8x8 *board*"""
+    rows: List[str] = []
+    for y in range(8):
+        row: str = ""
+        empty: int = 0
+        for block in board[y]:
+            piece: Optional[Piece] = block.piece
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            row += str(piece)
+        rows.append(row + (str(empty) if empty else ""))
+    return "/".join(rows)
+
+
+def game_to_fen(game: Game) -> str:
+    """Full FEN record of the position of *game*, move clocks included"""
+    castling: str = "".join(letter for letter, flag in castling_letters.items() if game.castling_rights & flag)
+    en_passant: str = square_name(game.en_passant) if game.en_passant is not None else "-"
+    fullmove_number: int = (game.turn_number - 1) // 2 + 1
+    return f"{board_to_fen(game.board)} {'w' if game.turn() is Colour.WHITE else 'b'} {castling or '-'} " \
+           f"{en_passant} {game.halfmove_clock} {fullmove_number}"
+
+
+def _mark_unmoved(board: BitBoard, rights: int) -> None:
+    """Mark pawns still on their starting row and kings and rooks that can castle as unmoved"""
+    unmoved: int = 0
+    for square in iter_squares(board.pieces[PAWN] | board.pieces[PAWN + 6]):
+        if (square >> 3) == (6 if board.codes[square] < 6 else 1):
+            unmoved |= 1 << square
+    for side, (king_square, rooks) in enumerate(CASTLING_SQUARES):
+        for rook_square, flag in rooks:
+            if rights & flag and board.codes[king_square] == KING + 6 * side and \
+                    board.codes[rook_square] == ROOK + 6 * side:
+                unmoved |= 1 << king_square | 1 << rook_square
+    board.unmoved = unmoved
@@ -1,13 +1,38 @@
-from typing import Tuple, Set, List
+from typing import Tuple, List, Optional, Union, Type
 
-from chess.custom_typehints import Colour, GameStatus, Coord2D, Coord2DSet
-from chess.model.board import Board, Block, letter_to_coord
-from chess.model.move_generator import generate_move, get_attack_coords
-from chess.model.pieces import Pawn, Rook, Knight, Bishop, Queen, King
+from chess.constants import WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE, ALL_CASTLING
+from chess.custom_typehints import Colour, GameStatus, Coord2D, Square, Move
+from chess.model.attacks import PAWN_ATTACKS
+from chess.model.bitboard import BitBoard, COLOUR_INDEX, PIECES, PAWN, ROOK, KING
+from chess.model.board import Board, letter_to_coord
+from chess.model.move import to_move, to_coords
+from chess.model.move_generator import get_attack_coords, legal_move_set
+from chess.model.pieces import Piece, Pawn, Rook, Knight, Bishop, Queen, King
 from chess.model.player import Player
+from chess.model.zobrist import BLACK_TO_MOVE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
 
+# castling rights kept after a move touches a square, a king or rook
+# leaving (or a rook being captured on) its home square drops the right
+CASTLING_MASK: List[int] = [ALL_CASTLING] * 64
+CASTLING_MASK[0] &= ~BLACK_QUEENSIDE
+CASTLING_MASK[4] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[7] &= ~BLACK_KINGSIDE
+CASTLING_MASK[56] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[60] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[63] &= ~WHITE_KINGSIDE
+
+# king square, then (rook square, castling flag) pairs for each colour index
+CASTLING_SQUARES = [
+    (60, ((63, WHITE_KINGSIDE), (56, WHITE_QUEENSIDE))),
+    (4, ((7, BLACK_KINGSIDE), (0, BLACK_QUEENSIDE))),
+]
+
+
+def is_in_check(board: Union[Board, BitBoard], colour: Colour) -> bool:
+    if isinstance(board, BitBoard):
+        side: int = COLOUR_INDEX[colour]
+        return bool(board.pieces[KING + 6 * side] & board.attack_map(side ^ 1))
 
-def is_in_check(board: Board, colour: Colour) -> bool:
     enemy_colour: Colour = Colour.WHITE if colour == Colour.BLACK else Colour.BLACK
     king_loc: Coord2D = board.get_king_location(colour)
     return king_loc in get_attack_coords(board=board, colour=enemy_colour)
@@ -15,16 +40,29 @@ def is_in_check(board: Board, colour: Colour) -> bool:
 
 class Game:
 
-    def __init__(self, board: Board = None, is_white_turn: bool = True) -> None:
-        if not board:
-            self.board: Board = Board()
+    def __init__(self, board: Optional[BitBoard] = None, is_white_turn: bool = True) -> None:
+        """
+        A game of chess, set up in the starting position unless a board is given
+        :param board: board holding the position to play from
+        :param is_white_turn: whether white is the side to move
+        """
+        self.board: BitBoard = board if board is not None else BitBoard()
         self.black_player: Player = Player("BLACK", Colour.BLACK)
         self.white_player: Player = Player("WHITE", Colour.WHITE)
         self._is_white_turn: bool = is_white_turn
-        self.moves_made: List = []
+        self.moves_made: List[Tuple[Coord2D, Coord2D]] = []
         self.turn_number: int = 1
         self.status: GameStatus = GameStatus.NORMAL
-        self._setup()
+        if board is None:
+            self._setup()
+
+        self.castling_rights: int = self._castling_rights_from_board()
+        # square a pawn skipped over with its last move, it can be taken there en passant
+        self.en_passant: Optional[Square] = None
+        self.halfmove_clock: int = 0
+        self._undo_stack: List[tuple] = []
+        # Zobrist key of the position before each move made
+        self._key_history: List[int] = []
 
     def _setup(self) -> None:
         for i in range(8):
@@ -43,6 +81,49 @@ class Game:
         self.board.put_piece((4, 0), King(Colour.BLACK))
         self.board.put_piece((4, 7), King(Colour.WHITE))
 
+    def _castling_rights_from_board(self) -> int:
+        """Castling rights implied by unmoved kings and rooks on their home squares"""
+        board: BitBoard = self.board
+        rights: int = 0
+        for side, (king_square, rooks) in enumerate(CASTLING_SQUARES):
+            if board.codes[king_square] != KING + 6 * side or not board.unmoved >> king_square & 1:
+                continue
+            for rook_square, flag in rooks:
+                if board.codes[rook_square] == ROOK + 6 * side and board.unmoved >> rook_square & 1:
+                    rights |= flag
+        return rights
+
+    @property
+    def zobrist_key(self) -> int:
+        """
+        64-bit hash of the position: piece placement, side to move, castling
+        rights and the en passant file when a pawn can actually take there.
+        The placement part is maintained by the board on every change, so
+        this costs a few XORs.
+        """
+        key: int = self.board.zobrist_key ^ CASTLING_KEYS[self.castling_rights]
+        if not self._is_white_turn:
+            key ^= BLACK_TO_MOVE_KEY
+        if self.en_passant is not None:
+            side: int = 0 if self._is_white_turn else 1
+            if PAWN_ATTACKS[side ^ 1][self.en_passant] & self.board.pieces[PAWN + 6 * side]:
+                key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        return key
+
+    def repetitions(self) -> int:
+        """
+        How many times the current position occurred earlier in the game,
+        looking back no further than the last capture or pawn move
+        """
+        key: int = self.zobrist_key
+        history: List[int] = self._key_history
+        stop: int = max(-1, len(history) - self.halfmove_clock - 1)
+        return sum(1 for i in range(len(history) - 2, stop, -2) if history[i] == key)
+
+    def played_moves(self) -> List[Move]:
+        """Moves played with make_move and not taken back, oldest first"""
+        return [record[0] for record in self._undo_stack]
+
     def turn(self) -> Colour:
         return Colour.WHITE if self._is_white_turn else Colour.BLACK
 
@@ -50,45 +131,134 @@ class Game:
         """Colour variant of the current player's enemy"""
         return Colour.BLACK if self._is_white_turn else Colour.WHITE
 
-    # TODO: pieces can block check paths from enemy and consume them if possible
-    # TODO: when in check, player can only move king or block the check
-    # TODO: rook pair also moves when the king castles
-    # TODO: pieces can be consumed  and must be put somewhere
-    def move(self, from_coord: Coord2D, to_coord: Coord2D) -> None:
+    def make_move(self, move: Move) -> None:
+        """
+        Play *move* for the side to move without validating it. Captures,
+        en passant, castling rook movement and promotion are applied and an
+        undo record is pushed so unmake_move can take the move back.
+        :param move: encoded move, see chess.model.move
+        :return: None
+        """
+        board: BitBoard = self.board
+        from_sq: Square = move & 63
+        to_sq: Square = move >> 6 & 63
+        promotion: int = move >> 12
+        piece: Piece = board.squares[from_sq]
+        code: int = board.codes[from_sq]
+        piece_type: int = code % 6
 
-        block: Block = self.board.get_block_from_tuple(from_coord)
-        current_mover: Colour = self.turn()
+        captured_sq: Square = to_sq
+        if piece_type == PAWN and to_sq == self.en_passant:
+            # the pawn taken en passant stands behind the destination
+            captured_sq = to_sq + 8 if code < 6 else to_sq - 8
+        captured: Optional[Piece] = board.squares[captured_sq]
 
-        if block.piece is None:
-            print(f"there's no piece at {from_coord}")
-        elif block.piece.colour != self.turn():
-            print(f"it's not {block.piece.colour}'s turn")
+        self._key_history.append(self.zobrist_key)
+        self._undo_stack.append((move, piece, captured, captured_sq, board.unmoved, self.castling_rights,
+                                 self.en_passant, self.halfmove_clock, self.status))
+
+        if piece_type == KING and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            board.move_square(rook_from, rook_to)
+        if captured_sq != to_sq:
+            board.remove_square(captured_sq)
+        if promotion:
+            board.remove_square(from_sq)
+            board.put_square(to_sq, PIECES[promotion + (code - piece_type)], has_moved=True)
         else:
-            move_set: Coord2DSet = generate_move(board=self.board, from_coord=from_coord)
-            if to_coord in move_set:
-                self.board.move_piece(from_coord, to_coord)
-                self.moves_made.append((from_coord, to_coord))
-                self.turn_number += 1
-
-                # TODO: draw states
-                # TODO: win states
-                if is_in_check(self.board, self._enemy()):
-
-                    # update check status
-                    if current_mover is Colour.WHITE:
-                        self.status = GameStatus.WHITE_CHECKS_BLACK
-                    else:
-                        self.status = GameStatus.BLACK_CHECKS_WHITE
-
-                    # generate move for the enemy king
-                    # pieces cannot block checks yet
-                    if not generate_move(board=self.board, from_coord=self.board.get_king_location(self._enemy())):
-                        self.status = GameStatus.WHITE_WIN if current_mover is Colour.WHITE else GameStatus.BLACK_WIN
-                else:
-                    self.status = GameStatus.NORMAL
-
-                block.piece.has_moved = True
-                self._is_white_turn = not self._is_white_turn
+            board.move_square(from_sq, to_sq)
+
+        self.castling_rights &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        self.en_passant = (from_sq + to_sq) // 2 if piece_type == PAWN and abs(to_sq - from_sq) == 16 else None
+        self.halfmove_clock = 0 if piece_type == PAWN or captured is not None else self.halfmove_clock + 1
+        self.moves_made.append(to_coords(move))
+        self.turn_number += 1
+        self._is_white_turn = not self._is_white_turn
+
+    def unmake_move(self) -> Move:
+        """
+        Take back the last move played with make_move and restore the state before it
+        :return: the move taken back
+        """
+        move, piece, captured, captured_sq, unmoved, self.castling_rights, \
+            self.en_passant, self.halfmove_clock, self.status = self._undo_stack.pop()
+        board: BitBoard = self.board
+        from_sq: Square = move & 63
+        to_sq: Square = move >> 6 & 63
+
+        if move >> 12:
+            board.remove_square(to_sq)
+            board.put_square(from_sq, piece)
+        else:
+            board.move_square(to_sq, from_sq)
+        if captured is not None:
+            board.put_square(captured_sq, captured)
+        if board.codes[from_sq] % 6 == KING and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            board.move_square(rook_to, rook_from)
+        board.unmoved = unmoved
+
+        self.moves_made.pop()
+        self._key_history.pop()
+        self.turn_number -= 1
+        self._is_white_turn = not self._is_white_turn
+        return move
+
+    def _update_status(self, current_mover: Colour) -> None:
+        in_check: bool = is_in_check(self.board, self.turn())
+        # cached, the next call to move validates against the same set
+        if legal_move_set(self):
+            if not in_check:
+                self.status = GameStatus.NORMAL
+            elif current_mover is Colour.WHITE:
+                self.status = GameStatus.WHITE_CHECKS_BLACK
+            else:
+                self.status = GameStatus.BLACK_CHECKS_WHITE
+        elif in_check:
+            self.status = GameStatus.WHITE_WIN if current_mover is Colour.WHITE else GameStatus.BLACK_WIN
+        else:
+            # stalemate
+            self.status = GameStatus.DRAW
+
+    def move_refusal(self, from_coord: Coord2D, to_coord: Coord2D,
+                     promotion: Optional[Type[Piece]] = None) -> Optional[str]:
+        """
+        Why move would refuse to play from_coord to to_coord
+        :return: the reason, None when the move is legal for the side to move
+        """
+        piece: Optional[Piece] = self.board.piece_at(from_coord)
+        if piece is None:
+            return f"there's no piece at {from_coord}"
+        if piece.colour != self.turn():
+            return f"it's not {piece.colour}'s turn"
+        if self._to_move(piece, from_coord, to_coord, promotion) not in legal_move_set(self):
+            return f"{from_coord} to {to_coord} is not a legal move"
+        return None
+
+    @staticmethod
+    def _to_move(piece: Piece, from_coord: Coord2D, to_coord: Coord2D, promotion: Optional[Type[Piece]]) -> Move:
+        if not isinstance(piece, Pawn) or to_coord[1] not in (0, 7):
+            promotion = None
+        elif promotion is None:
+            promotion = Queen
+        return to_move(from_coord, to_coord, promotion)
+
+    def move(self, from_coord: Coord2D, to_coord: Coord2D, promotion: Optional[Type[Piece]] = None) -> bool:
+        """
+        Move the piece on from_coord to to_coord if the move is legal for the side to move
+        :param from_coord: origin of the piece to be moved
+        :param to_coord: destination of the piece to be moved
+        :param promotion: piece type a pawn reaching the last row becomes, Queen by default
+        :return: whether the move was played, see move_refusal for why it was not
+        """
+        refusal: Optional[str] = self.move_refusal(from_coord, to_coord, promotion)
+        if refusal is not None:
+            print(refusal)
+            return False
+        current_mover: Colour = self.turn()
+        self.make_move(self._to_move(self.board.piece_at(from_coord), from_coord, to_coord, promotion))
+        self._update_status(current_mover)
+        return True
 
     def run(self, debug: bool = False):
         while self.status not in (GameStatus.BLACK_WIN, GameStatus.WHITE_WIN, GameStatus.DRAW):
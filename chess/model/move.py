@@ -0,0 +1,75 @@
+"""
+Compact integer encoding of a move: the origin square in bits 0-5, the
+destination square in bits 6-11 and the promotion piece type (0 for none)
+in bits 12-14. Squares are bit indices as used by BitBoard.
+"""
+from typing import Optional, Tuple, Type
+
+from chess.custom_typehints import Coord2D, Square, Move
+from chess.model.bitboard import SQUARE_COORDS, PIECE_INDEX, PIECE_TYPES, KNIGHT, BISHOP, ROOK, QUEEN, to_square
+from chess.model.pieces import Piece
+
+NULL_MOVE: Move = 0
+PROMOTION_LETTERS: str = " nbrq"
+FILES: str = "abcdefgh"
+
+
+def encode_move(from_sq: Square, to_sq: Square, promotion: int = 0) -> Move:
+    return from_sq | to_sq << 6 | promotion << 12
+
+
+def move_from(move: Move) -> Square:
+    return move & 63
+
+
+def move_to(move: Move) -> Square:
+    return move >> 6 & 63
+
+
+def move_promotion(move: Move) -> int:
+    """Piece type index the pawn promotes to, 0 when the move is not a promotion"""
+    return move >> 12
+
+
+def to_move(from_coord: Coord2D, to_coord: Coord2D, promotion: Optional[Type[Piece]] = None) -> Move:
+    return encode_move(to_square(from_coord), to_square(to_coord), PIECE_INDEX[promotion] if promotion else 0)
+
+
+def to_coords(move: Move) -> Tuple[Coord2D, Coord2D]:
+    return SQUARE_COORDS[move & 63], SQUARE_COORDS[move >> 6 & 63]
+
+
+def promotion_type(move: Move) -> Optional[Type[Piece]]:
+    return PIECE_TYPES[move >> 12] if move >> 12 else None
+
+
+def square_name(square: Square) -> str:
+    """Algebraic name of a square, 0 is a8 and 63 is h1"""
+    return f"{FILES[square & 7]}{8 - (square >> 3)}"
+
+
+def parse_square(name: str) -> Square:
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+def to_uci(move: Move) -> str:
+    """Long algebraic notation of a move, e.g. e2e4 or a7a8q"""
+    promotion: int = move >> 12
+    return square_name(move & 63) + square_name(move >> 6 & 63) + (PROMOTION_LETTERS[promotion] if promotion else "")
+
+
+def from_uci(text: str) -> Move:
+    """
+    Parse long algebraic notation into a move
+    :raises ValueError: when *text* is not in the form e2e4 or a7a8q
+    """
+    text = text.strip().lower()
+    if len(text) not in (4, 5) or text[0] not in FILES or text[2] not in FILES or \
+            text[1] not in "12345678" or text[3] not in "12345678":
+        raise ValueError(f"invalid move {text!r}")
+    promotion: int = 0
+    if len(text) == 5:
+        promotion = PROMOTION_LETTERS.find(text[4])
+        if promotion not in (KNIGHT, BISHOP, ROOK, QUEEN):
+            raise ValueError(f"invalid promotion in move {text!r}")
+    return encode_move(parse_square(text[:2]), parse_square(text[2:4]), promotion)
@@ -0,0 +1,126 @@
+"""
+Least recently used cache of the move sets generate_move returns and of
+the legal moves Game.move validates against.
+
+Entries are keyed by everything the moves depend on: the Zobrist key of the
+placement, the unmoved bitboard for castling, the square and the last move
+for en passant, or the key of the whole game state for legal moves. A
+changed board looks up other keys, so entries never go stale and stay
+shared by every game in the same position. Each entry also records the
+placement key it belongs to. invalidate is the API for dropping entries,
+of one placement or all of them. A board can also be watched, then its
+mutation hook drops the entries of each position it leaves.
+"""
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple, TYPE_CHECKING
+
+from chess.custom_typehints import Coord2DSet
+
+if TYPE_CHECKING:
+    from chess.model.bitboard import BitBoard
+
+
+class MoveCache:
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        :param capacity: number of move sets kept, 0 disables the cache
+        """
+        if capacity < 0:
+            raise ValueError("move cache capacity cannot be negative")
+        self.capacity: int = capacity
+        # cached moves and the placement key they belong to
+        self._entries: "OrderedDict[Hashable, Tuple[frozenset, Optional[int]]]" = OrderedDict()
+        # keys of the entries of each placement, for dropping them on a mutation
+        self._positions: Dict[int, Set[Hashable]] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        """Number of move sets currently cached"""
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        probes: int = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def get(self, key: Hashable) -> Optional[Coord2DSet]:
+        """
+        Look up the moves cached for *key* and mark them as recently used
+        :return: a copy of the cached set, the caller may change it, or None
+        """
+        entry: Optional[Tuple[frozenset, Optional[int]]] = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return set(entry[0])
+
+    def put(self, key: Hashable, moves: Coord2DSet, position: Optional[int] = None) -> None:
+        """
+        Cache *moves* for *key*, evicting the least recently used entry when full
+        :param position: Zobrist key of the placement the moves belong to, see invalidate
+        """
+        if not self.capacity:
+            return
+        self._forget(key)
+        self._entries[key] = (frozenset(moves), position)
+        if position is not None:
+            self._positions.setdefault(position, set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._forget(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _forget(self, key: Hashable) -> None:
+        entry: Optional[Tuple[frozenset, Optional[int]]] = self._entries.pop(key, None)
+        if entry is not None and entry[1] is not None:
+            keys: Set[Hashable] = self._positions[entry[1]]
+            keys.discard(key)
+            if not keys:
+                del self._positions[entry[1]]
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity, dropping the least recently used entries that no longer fit"""
+        if capacity < 0:
+            raise ValueError("move cache capacity cannot be negative")
+        self.capacity = capacity
+        while len(self._entries) > capacity:
+            self._forget(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, position: Optional[int] = None) -> None:
+        """
+        Drop cached move sets
+        :param position: Zobrist key of a placement to drop the entries of, every entry by default
+        """
+        if position is None:
+            self._entries.clear()
+            self._positions.clear()
+            return
+        for key in self._positions.pop(position, ()):
+            del self._entries[key]
+
+    def watch(self, board: "BitBoard") -> None:
+        """
+        Have *board* drop the entries of its position whenever it is changed,
+        for callers that are done with each position they leave. Boards are
+        not watched by default, entries of a left position may still be
+        needed by another game.
+        """
+        if board.on_mutation is None:
+            board.on_mutation = self.board_changed
+
+    def board_changed(self, board: "BitBoard") -> None:
+        """Mutation hook of watched boards, called before the change"""
+        if self._positions:
+            self.invalidate(board.zobrist_key)
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+
+# used by generate_move for bitboard boards
+MOVE_CACHE: MoveCache = MoveCache()
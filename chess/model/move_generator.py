@@ -1,12 +1,21 @@
 from itertools import chain
-from typing import List, Tuple, Literal, Optional, Union, Set, Dict, Callable, Type, Iterable
-
-from chess.custom_typehints import Coord2DSet, Coord2D, Colour
+from typing import List, Tuple, Literal, Optional, Union, Set, Dict, Callable, Type, Iterable, TYPE_CHECKING
+
+from chess.constants import WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from chess.custom_typehints import Coord2DSet, Coord2D, Colour, Square, Bitboard, Move
+from chess.model.attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE, \
+    rook_attacks, bishop_attacks, queen_attacks
+from chess.model.bitboard import BitBoard, COLOUR_INDEX, SQUARE_COORDS, SQUARE_BITS, \
+    PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, to_square, iter_squares
 from chess.model.board import Block, Board
+from chess.model.move_cache import MOVE_CACHE
 from chess.model.pieces import Piece, Pawn, Rook, Bishop, Queen, King, Knight
 
 from chess.constants import *
 
+if TYPE_CHECKING:
+    from chess.model.game import Game
+
 
 def out_of_bounds(from_coord: Coord2D, bound_range: int) -> bool:
     """
@@ -61,7 +70,7 @@ def _generate_coord_moveset(board: Board,
 def _generate_pawn_moves(board: Board, from_coord: Coord2D, last_move: Tuple[Coord2D, Coord2D] = tuple()) -> Coord2DSet:
     x, y = from_coord
     piece_to_move: Piece = board[y][x].piece
-    move_range: int = 1 if piece_to_move.has_moved else 2
+    move_range: int = 1 if board.has_moved(from_coord) else 2
 
     side: Literal[1, -1] = -1
     directions: Coord2DSet = WHITE_PAWN_DIRECTIONS
@@ -149,7 +158,7 @@ def _generate_king_moves(board: Board, from_coord: Coord2D) -> Coord2DSet:
     enemy_colour: Colour = Colour.WHITE if board[y][x].colour() == Colour.BLACK else Colour.BLACK
 
     castle_move: Coord2DSet = set()
-    if len(board) == 8 and not board[y][x].piece.has_moved:
+    if len(board) == 8 and not board.has_moved(from_coord):
         # enforce castling only for standard board size
         # check if:
         # 1. king has not moved
@@ -177,6 +186,90 @@ def _generate_king_moves(board: Board, from_coord: Coord2D) -> Coord2DSet:
     return (generated_normal_moves | castle_move) - normal_enemy_moves - enemy_pawn_diag_moves
 
 
+def _to_coords(bitboard: Bitboard) -> Coord2DSet:
+    return {SQUARE_COORDS[square] for square in iter_squares(bitboard)}
+
+
+def _king_danger(board: BitBoard, side: int, king_square: Square) -> Bitboard:
+    """
+    Squares the king of colour index *side* cannot step on. The enemy attack
+    map is extended through the king for sliders that already check it, so
+    the king cannot escape along the checking ray.
+    """
+    danger: Bitboard = board.attack_map(side ^ 1)
+    if danger & SQUARE_BITS[king_square]:
+        offset: int = 6 * (side ^ 1)
+        queens: Bitboard = board.pieces[QUEEN + offset]
+        occupied: Bitboard = board.occupied & ~SQUARE_BITS[king_square]
+        for square in iter_squares(board.pieces[ROOK + offset] | queens):
+            if board.attacks_from[square] & SQUARE_BITS[king_square]:
+                danger |= rook_attacks(square, occupied)
+        for square in iter_squares(board.pieces[BISHOP + offset] | queens):
+            if board.attacks_from[square] & SQUARE_BITS[king_square]:
+                danger |= bishop_attacks(square, occupied)
+    return danger
+
+
+def _bitboard_pawn_moves(board: BitBoard, square: Square, last_move: Tuple[Coord2D, Coord2D]) -> Bitboard:
+    side: int = board.codes[square] // 6
+    step: int = 8 if side else -8
+
+    targets: Bitboard = PAWN_ATTACKS[side][square] & board.occupancy[side ^ 1]
+    push: Square = square + step
+    if 0 <= push < 64 and not board.occupied & SQUARE_BITS[push]:
+        targets |= SQUARE_BITS[push]
+        push += step
+        if board.unmoved & SQUARE_BITS[square] and 0 <= push < 64 and not board.occupied & SQUARE_BITS[push]:
+            targets |= SQUARE_BITS[push]
+
+    if len(last_move) == 2 and all([len(coord) == 2 for coord in last_move]):
+        en_passant: Union[Coord2D, Tuple[()]] = _en_passant_move(board, SQUARE_COORDS[square], last_move)
+        if en_passant:
+            targets |= SQUARE_BITS[to_square(en_passant)]
+    return targets
+
+
+def _bitboard_king_moves(board: BitBoard, square: Square) -> Bitboard:
+    side: int = board.codes[square] // 6
+    targets: Bitboard = KING_ATTACKS[square] & ~board.occupancy[side]
+
+    x: int = square & 7
+    if board.unmoved & SQUARE_BITS[square]:
+        # same castling conditions as the list based board: the king has not
+        # moved and an allied rook stands behind an empty gap
+        rook: Bitboard = board.pieces[ROOK + 6 * side]
+        if x >= 4 and rook & SQUARE_BITS[square - 4] and \
+                not board.occupied & (SQUARE_BITS[square - 1] | SQUARE_BITS[square - 2] | SQUARE_BITS[square - 3]):
+            targets |= SQUARE_BITS[square - 2]
+        if x <= 4 and rook & SQUARE_BITS[square + 3] and \
+                not board.occupied & (SQUARE_BITS[square + 1] | SQUARE_BITS[square + 2]):
+            targets |= SQUARE_BITS[square + 2]
+
+    # verify that king can't move into places they can get checked
+    return targets & ~_king_danger(board, side, square)
+
+
+def _generate_bitboard_move(board: BitBoard, square: Square, last_move: Tuple[Coord2D, Coord2D]) -> Coord2DSet:
+    """Table driven counterpart of the generators above for BitBoard"""
+    code: int = board.codes[square]
+    piece_type: int = code % 6
+    own: Bitboard = board.occupancy[code // 6]
+
+    if piece_type == PAWN:
+        targets: Bitboard = _bitboard_pawn_moves(board, square, last_move)
+    elif piece_type == KNIGHT:
+        targets = KNIGHT_ATTACKS[square] & ~own
+    elif piece_type == BISHOP:
+        targets = bishop_attacks(square, board.occupied) & ~own
+    elif piece_type == ROOK:
+        targets = rook_attacks(square, board.occupied) & ~own
+    elif piece_type == QUEEN:
+        targets = queen_attacks(square, board.occupied) & ~own
+    else:
+        targets = _bitboard_king_moves(board, square)
+    return _to_coords(targets)
+
+
 # map piece type to correct generation method
 piece_type_moves: Dict[Type[Piece], Callable[[Board, Coord2D], Coord2DSet]] = {
     Pawn: _generate_pawn_moves,
@@ -189,7 +282,21 @@ piece_type_moves: Dict[Type[Piece], Callable[[Board, Coord2D], Coord2DSet]] = {
 
 
 def generate_move(board: Board, from_coord: Coord2D, last_move: Tuple[Coord2D, Coord2D] = tuple()) -> Coord2DSet:
-    """Generate moveset(of Coord2DSet annotation) for a piece on the board"""
+    """
+    Generate moveset(of Coord2DSet annotation) for a piece on the board,
+    the moves on a BitBoard are memoised in chess.model.move_cache.MOVE_CACHE
+    """
+    if isinstance(board, BitBoard):
+        square: Square = to_square(from_coord)
+        if board.codes[square] < 0:
+            return set()
+        key = (board.zobrist_key, board.unmoved, square, tuple(tuple(coord) for coord in last_move))
+        move_set: Optional[Coord2DSet] = MOVE_CACHE.get(key)
+        if move_set is None:
+            move_set = _generate_bitboard_move(board, square, last_move)
+            MOVE_CACHE.put(key, move_set, position=board.zobrist_key)
+        return move_set
+
     x, y = from_coord
     piece_to_move: Optional[Piece] = board[y][x].piece
 
@@ -231,12 +338,170 @@ def _get_pawn_diag_attack(board: Board, colour: Colour) -> Coord2DSet:
     :param colour: colour of the pawns
     :return: coordinate diagonal to all possible diagonal destinations of all pawns for a colour
     """
+    if isinstance(board, BitBoard):
+        side: int = COLOUR_INDEX[colour]
+        attacks: Bitboard = 0
+        for square in iter_squares(board.pieces[PAWN + 6 * side]):
+            attacks |= PAWN_ATTACKS[side][square]
+        return _to_coords(attacks & ~board.occupied)
+
     pawn_dir: Coord2DSet = BLACK_PAWN_ATTACK_DIRECTIONS if colour == Colour.BLACK else WHITE_PAWN_ATTACK_DIRECTIONS
 
     move_set: List[Coord2DSet] = []
-    for i, j in board.get_pieces_by_colour(colour, exclude_type=[Rook, Knight, Bishop, Queen, King]):
+    for i, j in board.get_pieces(colour, Pawn):
         move_set.append(_generate_coord_moveset(board=board,
                                                 from_coord=(i, j),
                                                 directions=pawn_dir,
                                                 move_range=1))
     return set(chain(*move_set))
+
+
+# every bit set, the target mask when the side to move is not in check
+FULL_BOARD: Bitboard = (1 << 64) - 1
+PROMOTION_ROWS: List[Bitboard] = [0xFF, 0xFF << 56]
+# rows a pawn of each colour index may double push from
+DOUBLE_PUSH_ROWS: List[Bitboard] = [0xFF << 48, 0xFF << 8]
+# king square, rook square, castling flag, squares to be empty, squares the king crosses
+CASTLING_PATHS: List[List[Tuple[Square, Square, int, Bitboard, Tuple[Square, Square]]]] = [
+    [(60, 63, WHITE_KINGSIDE, 0b11 << 61, (61, 62)),
+     (60, 56, WHITE_QUEENSIDE, 0b111 << 57, (59, 58))],
+    [(4, 7, BLACK_KINGSIDE, 0b11 << 5, (5, 6)),
+     (4, 0, BLACK_QUEENSIDE, 0b111 << 1, (3, 2))],
+]
+
+
+def _add_pawn_moves(moves: List[Move], from_sq: Square, targets: Bitboard, promotion_row: Bitboard) -> None:
+    for to_sq in iter_squares(targets):
+        move: Move = from_sq | to_sq << 6
+        if SQUARE_BITS[to_sq] & promotion_row:
+            moves.extend((move | QUEEN << 12, move | ROOK << 12, move | BISHOP << 12, move | KNIGHT << 12))
+        else:
+            moves.append(move)
+
+
+def generate_legal_moves(position: "Game") -> List[Move]:
+    """
+    Generate every legal move of the side to move. Pins, check evasions,
+    castling through attacked squares, en passant and promotions are all
+    taken into account.
+    :param position: game holding the board, side to move, castling rights and en passant square
+    :return: list of encoded moves, see chess.model.move
+    """
+    board: BitBoard = position.board
+    side: int = COLOUR_INDEX[position.turn()]
+    enemy: int = side ^ 1
+    offset: int = 6 * side
+    enemy_offset: int = 6 * enemy
+    pieces: List[Bitboard] = board.pieces
+    own: Bitboard = board.occupancy[side]
+    them: Bitboard = board.occupancy[enemy]
+    occupied: Bitboard = board.occupied
+    moves: List[Move] = []
+
+    king: Bitboard = pieces[KING + offset]
+    if not king:
+        return moves
+    king_sq: Square = king.bit_length() - 1
+
+    enemy_queens: Bitboard = pieces[QUEEN + enemy_offset]
+    enemy_rooks: Bitboard = pieces[ROOK + enemy_offset] | enemy_queens
+    enemy_bishops: Bitboard = pieces[BISHOP + enemy_offset] | enemy_queens
+    checkers: Bitboard = KNIGHT_ATTACKS[king_sq] & pieces[KNIGHT + enemy_offset] | \
+        PAWN_ATTACKS[side][king_sq] & pieces[PAWN + enemy_offset] | \
+        rook_attacks(king_sq, occupied) & enemy_rooks | \
+        bishop_attacks(king_sq, occupied) & enemy_bishops
+
+    for to_sq in iter_squares(KING_ATTACKS[king_sq] & ~own & ~_king_danger(board, side, king_sq)):
+        moves.append(king_sq | to_sq << 6)
+
+    if checkers & (checkers - 1):
+        # double check, only the king can move
+        return moves
+    if checkers:
+        # capture the checker or block the ray between it and the king
+        target_mask: Bitboard = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+    else:
+        target_mask = FULL_BOARD
+
+    # an allied piece alone between the king and an enemy slider is pinned to that line
+    pinned: Bitboard = 0
+    pin_lines: Dict[Square, Bitboard] = {}
+    snipers: Bitboard = rook_attacks(king_sq, 0) & enemy_rooks | bishop_attacks(king_sq, 0) & enemy_bishops
+    for sniper in iter_squares(snipers):
+        blockers: Bitboard = BETWEEN[king_sq][sniper] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+            pin_lines[blockers.bit_length() - 1] = LINE[king_sq][sniper]
+
+    not_own: Bitboard = ~own & target_mask
+    for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+        for from_sq in iter_squares(pieces[piece_type + offset]):
+            if piece_type == KNIGHT:
+                if SQUARE_BITS[from_sq] & pinned:
+                    # a pinned knight can never stay on its line
+                    continue
+                targets: Bitboard = KNIGHT_ATTACKS[from_sq] & not_own
+            elif piece_type == BISHOP:
+                targets = bishop_attacks(from_sq, occupied) & not_own
+            elif piece_type == ROOK:
+                targets = rook_attacks(from_sq, occupied) & not_own
+            else:
+                targets = queen_attacks(from_sq, occupied) & not_own
+            if SQUARE_BITS[from_sq] & pinned:
+                targets &= pin_lines[from_sq]
+            for to_sq in iter_squares(targets):
+                moves.append(from_sq | to_sq << 6)
+
+    step: int = 8 if side else -8
+    empty: Bitboard = ~occupied
+    promotion_row: Bitboard = PROMOTION_ROWS[side]
+    pawn_attacks: List[Bitboard] = PAWN_ATTACKS[side]
+    for from_sq in iter_squares(pieces[PAWN + offset]):
+        targets = pawn_attacks[from_sq] & them
+        push: Square = from_sq + step
+        if 0 <= push < 64 and SQUARE_BITS[push] & empty:
+            targets |= SQUARE_BITS[push]
+            if SQUARE_BITS[from_sq] & DOUBLE_PUSH_ROWS[side] and SQUARE_BITS[push + step] & empty:
+                targets |= SQUARE_BITS[push + step]
+        targets &= target_mask
+        if SQUARE_BITS[from_sq] & pinned:
+            targets &= pin_lines[from_sq]
+        _add_pawn_moves(moves, from_sq, targets, promotion_row)
+
+    en_passant: Optional[Square] = position.en_passant
+    # only with an enemy pawn behind the square, so a bad state never takes our own piece
+    if en_passant is not None and pieces[PAWN + enemy_offset] & SQUARE_BITS[en_passant - step]:
+        captured_sq: Square = en_passant - step
+        for from_sq in iter_squares(PAWN_ATTACKS[enemy][en_passant] & pieces[PAWN + offset]):
+            # play the capture on the occupancy and look for any attacker of the king,
+            # this covers pins along the row that both pawns leave at once
+            after: Bitboard = occupied ^ SQUARE_BITS[from_sq] ^ SQUARE_BITS[captured_sq] | SQUARE_BITS[en_passant]
+            if not (rook_attacks(king_sq, after) & enemy_rooks or
+                    bishop_attacks(king_sq, after) & enemy_bishops or
+                    KNIGHT_ATTACKS[king_sq] & pieces[KNIGHT + enemy_offset] or
+                    PAWN_ATTACKS[side][king_sq] & pieces[PAWN + enemy_offset] & ~SQUARE_BITS[captured_sq]):
+                moves.append(from_sq | en_passant << 6)
+
+    if not checkers and position.castling_rights:
+        attacked: Bitboard = board.attack_map(enemy)
+        for home_sq, rook_sq, flag, gap, crossed in CASTLING_PATHS[side]:
+            if position.castling_rights & flag and king_sq == home_sq and \
+                    board.codes[rook_sq] == ROOK + offset and not occupied & gap and \
+                    not attacked & (SQUARE_BITS[crossed[0]] | SQUARE_BITS[crossed[1]]):
+                moves.append(home_sq | crossed[1] << 6)
+
+    return moves
+
+
+def legal_move_set(position: "Game") -> Set[Move]:
+    """
+    Legal moves of the side to move as a set, memoised in
+    chess.model.move_cache.MOVE_CACHE by the key of the game state
+    """
+    board: BitBoard = position.board
+    key = ("legal", position.zobrist_key, board.unmoved)
+    moves: Optional[Set[Move]] = MOVE_CACHE.get(key)
+    if moves is None:
+        moves = set(generate_legal_moves(position))
+        MOVE_CACHE.put(key, moves, position=board.zobrist_key)
+    return moves
@@ -0,0 +1,74 @@
+"""
+Perft: count the leaf nodes of the legal move tree to a fixed depth. The
+counts are known for many positions, so this checks the move generator and
+measures its throughput at the same time.
+"""
+import sys
+import time
+from typing import Dict, List
+
+from chess.custom_typehints import Move
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.move import to_uci
+from chess.model.move_generator import generate_legal_moves
+
+
+def perft(game: Game, depth: int) -> int:
+    """Number of leaf nodes *depth* plies below the current position"""
+    if depth <= 0:
+        return 1
+    moves: List[Move] = generate_legal_moves(game)
+    if depth == 1:
+        return len(moves)
+    nodes: int = 0
+    for move in moves:
+        game.make_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game: Game, depth: int) -> Dict[Move, int]:
+    """Leaf node count below each legal root move"""
+    counts: Dict[Move, int] = {}
+    for move in generate_legal_moves(game):
+        game.make_move(move)
+        counts[move] = perft(game, depth - 1)
+        game.unmake_move()
+    return counts
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: perft [--divide] <depth> [fen]
+    :return: exit status
+    """
+    show_divide: bool = "--divide" in args
+    args = [arg for arg in args if arg != "--divide"]
+    if not args or not args[0].isdigit():
+        print("usage: python -m chess perft [--divide] <depth> [fen]", file=sys.stderr)
+        return 2
+    depth: int = int(args[0])
+    fen: str = " ".join(args[1:]) or STARTING_FEN
+    try:
+        game: Game = game_from_fen(fen)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    start: float = time.perf_counter()
+    if show_divide:
+        counts: Dict[Move, int] = divide(game, depth)
+        for move, count in sorted(counts.items(), key=lambda item: to_uci(item[0])):
+            print(f"{to_uci(move)}: {count}")
+        nodes: int = sum(counts.values())
+        print()
+    else:
+        nodes = perft(game, depth)
+    elapsed: float = time.perf_counter() - start
+
+    print(f"nodes: {nodes}")
+    print(f"time: {elapsed:.3f}s")
+    print(f"nps: {nodes / elapsed if elapsed > 0 else 0:.0f}")
+    return 0
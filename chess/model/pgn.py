@@ -0,0 +1,276 @@
+"""
+Portable Game Notation reading and writing.
+
+read_games streams games out of a file one at a time, holding no more than
+the game being parsed in memory, so archives of any size can be replayed.
+Files ending in .gz, .bz2 or .zst are decompressed on the fly, the last one
+needs the optional zstandard package. Moves are kept as SAN text until
+replay turns them into a Game through the legal move generator.
+"""
+import bz2
+import gzip
+import io
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Iterator, Iterable, Optional, TextIO, Union
+
+from chess.model.bitboard import BitBoard, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from chess.model.fen import STARTING_FEN, game_from_fen, game_to_fen
+from chess.model.game import Game, is_in_check
+from chess.model.move import move_from, move_to, move_promotion, parse_square, square_name, PROMOTION_LETTERS
+from chess.model.move_generator import generate_legal_moves
+from chess.custom_typehints import Move
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+SAN_LETTERS: str = " NBRQK"
+SAN_PIECES: Dict[str, int] = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+LINE_LENGTH: int = 80
+
+_TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$")
+# comments, variations, move numbers, NAGs and results between moves
+_TOKEN = re.compile(r"\{[^}]*\}?|;.*|\(|\)|\$\d+|\d+\.+|\.+|[^\s{}();$]+")
+
+
+@dataclass
+class PgnGame:
+    headers: Dict[str, str] = field(default_factory=dict)
+    moves: List[str] = field(default_factory=list)
+    result: str = "*"
+
+    def replay(self) -> Game:
+        """
+        Play the moves of the record from its FEN tag or the starting position
+        :raises ValueError: when a move is illegal or ambiguous
+        :return: game after the last move
+        """
+        game: Game = game_from_fen(self.headers.get("FEN", STARTING_FEN))
+        for san in self.moves:
+            game.make_move(parse_san(game, san))
+        return game
+
+
+def open_text(path: str, mode: str = "r") -> TextIO:
+    """
+    Open a PGN file as text, decompressing by extension (.gz, .bz2, .zst)
+    :param mode: "r", "w" or "a"
+    :raises ImportError: for .zst files when zstandard is not installed
+    """
+    mode = mode.rstrip("t") + "t"
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8", errors="replace")
+    if path.endswith(".bz2"):
+        return bz2.open(path, mode, encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("reading .zst files needs the zstandard package")
+        return zstandard.open(path, mode, encoding="utf-8", errors="replace")
+    return open(path, mode, encoding="utf-8", errors="replace")
+
+
+def read_games(source: Union[str, Iterable[str]]) -> Iterator[PgnGame]:
+    """
+    Stream the games of a PGN file
+    :param source: path of a (possibly compressed) file, or any iterable of
+    lines such as an open text file
+    :return: iterator over the games in file order
+    """
+    if isinstance(source, str):
+        with open_text(source) as handle:
+            yield from read_games(handle)
+        return
+
+    game: PgnGame = PgnGame()
+    in_movetext: bool = False
+    # nesting depth of variations and whether a brace comment is still open
+    depth: int = 0
+    in_comment: bool = False
+    for line in source:
+        line = line.strip()
+        if in_comment:
+            end: int = line.find("}")
+            if end < 0:
+                continue
+            in_comment = False
+            line = line[end + 1:]
+        if not in_movetext and line.startswith("["):
+            _read_tag(game, line)
+            continue
+        if line.startswith("%") or not line:
+            continue
+        if in_movetext and line.startswith("[") and depth == 0:
+            # a tag section without a result terminating the previous game
+            yield game
+            game, in_movetext = PgnGame(), False
+            _read_tag(game, line)
+            continue
+
+        in_movetext = True
+        for token in _TOKEN.findall(line):
+            if token[0] == "{":
+                in_comment = not token.endswith("}")
+            elif token == "(":
+                depth += 1
+            elif token == ")":
+                depth = max(0, depth - 1)
+            elif depth or token[0] in ";$." or token[0].isdigit() and token.endswith("."):
+                continue
+            elif token in RESULTS:
+                game.result = token
+                yield game
+                game, in_movetext, depth = PgnGame(), False, 0
+            else:
+                game.moves.append(token)
+    if in_movetext or game.headers:
+        yield game
+
+
+def _read_tag(game: PgnGame, line: str) -> None:
+    match = _TAG.match(line)
+    if match:
+        game.headers[match.group(1)] = re.sub(r"\\(.)", r"\1", match.group(2))
+
+
+def parse_san(game: Game, san: str, moves: Optional[List[Move]] = None) -> Move:
+    """
+    Legal move of the side to move written as *san* in Standard Algebraic Notation
+    :param moves: legal moves of the position when the caller already has them
+    :raises ValueError: when no legal move or more than one matches
+    """
+    text: str = san.rstrip("+#!?")
+    moves = moves if moves is not None else generate_legal_moves(game)
+    board: BitBoard = game.board
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        for move in moves:
+            from_sq: int = move_from(move)
+            if board.codes[from_sq] % 6 == KING and move_to(move) - from_sq == (2 if len(text) == 3 else -2):
+                return move
+        raise ValueError(f"illegal castling {san!r}")
+
+    match = _SAN.match(text)
+    if not match:
+        raise ValueError(f"invalid SAN {san!r}")
+    letter, file, rank, destination, promotion = match.groups()
+    piece_type: int = SAN_PIECES[letter] if letter else PAWN
+    to_sq: int = parse_square(destination)
+    promotion_type: int = PROMOTION_LETTERS.index(promotion.lower()) if promotion else 0
+
+    found: List[Move] = []
+    for move in moves:
+        from_sq = move_from(move)
+        if move_to(move) != to_sq or board.codes[from_sq] % 6 != piece_type or \
+                move_promotion(move) != promotion_type:
+            continue
+        if file and from_sq & 7 != ord(file) - ord("a") or rank and 8 - (from_sq >> 3) != int(rank):
+            continue
+        found.append(move)
+    if len(found) != 1:
+        raise ValueError(f"{'ambiguous' if found else 'illegal'} move {san!r} in {game_to_fen(game)}")
+    return found[0]
+
+
+def move_to_san(game: Game, move: Move) -> str:
+    """SAN of the legal *move* in the position of *game*, check and mate marks included"""
+    board: BitBoard = game.board
+    from_sq: int = move_from(move)
+    to_sq: int = move_to(move)
+    piece_type: int = board.codes[from_sq] % 6
+    capture: bool = board.codes[to_sq] >= 0 or piece_type == PAWN and to_sq == game.en_passant
+
+    if piece_type == KING and abs(to_sq - from_sq) == 2:
+        san: str = "O-O" if to_sq > from_sq else "O-O-O"
+    elif piece_type == PAWN:
+        san = (square_name(from_sq)[0] + "x" if capture else "") + square_name(to_sq)
+        if move_promotion(move):
+            san += "=" + SAN_LETTERS[move_promotion(move)]
+    else:
+        # disambiguate by file, then rank, then both
+        others: List[int] = [move_from(other) for other in generate_legal_moves(game)
+                             if other != move and move_to(other) == to_sq and
+                             board.codes[move_from(other)] % 6 == piece_type]
+        origin: str = ""
+        if others:
+            name: str = square_name(from_sq)
+            if all(other & 7 != from_sq & 7 for other in others):
+                origin = name[0]
+            elif all(other >> 3 != from_sq >> 3 for other in others):
+                origin = name[1]
+            else:
+                origin = name
+        san = SAN_LETTERS[piece_type] + origin + ("x" if capture else "") + square_name(to_sq)
+
+    game.make_move(move)
+    if is_in_check(game.board, game.turn()):
+        san += "#" if not generate_legal_moves(game) else "+"
+    game.unmake_move()
+    return san
+
+
+def game_to_pgn(game: Game, headers: Optional[Dict[str, str]] = None, result: str = "*") -> str:
+    """
+    PGN record of the moves played in *game*, the game itself is left as it was
+    :param headers: tags to write, the seven tag roster is filled in with "?"
+    and a FEN tag is added when the game did not start from the starting position
+    :param result: game termination marker, one of RESULTS
+    """
+    moves: List[Move] = game.played_moves()
+    status = game.status
+    for _ in moves:
+        game.unmake_move()
+    start_fen: str = game_to_fen(game)
+    first_number: int = (game.turn_number - 1) // 2 + 1
+    black_first: bool = game.turn_number % 2 == 0
+
+    tags: Dict[str, str] = {tag: "?" for tag in SEVEN_TAG_ROSTER}
+    tags.update(headers or {})
+    tags["Result"] = result
+    if start_fen != STARTING_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = start_fen
+
+    tokens: List[str] = []
+    for ply, move in enumerate(moves):
+        white_to_move: bool = (ply % 2 == 1) == black_first
+        if white_to_move:
+            tokens.append(f"{first_number + (ply + black_first) // 2}.")
+        elif ply == 0:
+            tokens.append(f"{first_number}...")
+        tokens.append(move_to_san(game, move))
+        game.make_move(move)
+    game.status = status
+    tokens.append(result)
+
+    output: io.StringIO = io.StringIO()
+    for tag, value in tags.items():
+        value = value.replace("\\", "\\\\").replace('"', '\\"')
+        output.write(f'[{tag} "{value}"]\n')
+    output.write("\n")
+    line: str = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            output.write(line + "\n")
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    output.write(line + "\n")
+    return output.getvalue()
+
+
+def write_games(destination: Union[str, TextIO], records: Iterable[str], mode: str = "w") -> int:
+    """
+    Write PGN records one after another, e.g. the output of game_to_pgn
+    :param destination: path of a (possibly compressed) file or an open text file
+    :param mode: "w" to overwrite or "a" to append to a path
+    :return: number of games written
+    """
+    if isinstance(destination, str):
+        with open_text(destination, mode) as handle:
+            return write_games(handle, records)
+    count: int = 0
+    for record in records:
+        destination.write(record.rstrip("\n") + "\n\n")
+        count += 1
+    return count
@@ -1,10 +1,37 @@
+from typing import Dict, Tuple, Type
+
 from ..custom_typehints import Colour
 
+# one shared instance per piece type and colour
+_flyweights: Dict[Tuple[Type["Piece"], Colour], "Piece"] = {}
+
 
 class Piece:
-    def __init__(self, colour: Colour, has_moved: bool = False) -> None:
-        self.colour: Colour = colour
-        self.has_moved = has_moved
+    """
+    Pieces are immutable flyweights: Pawn(Colour.WHITE) always returns the
+    same object, so boards only hold references to at most twelve pieces.
+    Whether a piece has moved is tracked by the board it stands on.
+    """
+    __slots__ = ("colour",)
+
+    def __new__(cls, colour: Colour) -> "Piece":
+        piece: Piece = _flyweights.get((cls, colour))
+        if piece is None:
+            piece = object.__new__(cls)
+            object.__setattr__(piece, "colour", colour)
+            _flyweights[cls, colour] = piece
+        return piece
+
+    def __init__(self, colour: Colour) -> None:
+        # colour is set once by __new__
+        pass
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f"{type(self).__name__} pieces are shared and cannot be changed")
+
+    def __reduce__(self):
+        # unpickling and copying go through the constructor and get the shared instance back
+        return type(self), (self.colour,)
 
     def __repr__(self) -> str:
         return f"Piece(colour={self.colour})"
@@ -15,27 +42,27 @@ class Piece:
 
 # TODO: Promotion to other piece types
 class Pawn(Piece):
-    pass
+    __slots__ = ()
 
 
 class Rook(Piece):
-    pass
+    __slots__ = ()
 
 
 class Knight(Piece):
-    pass
+    __slots__ = ()
 
 
 class Bishop(Piece):
-    pass
+    __slots__ = ()
 
 
 class Queen(Piece):
-    pass
+    __slots__ = ()
 
 
 class King(Piece):
-    pass
+    __slots__ = ()
 
 
 piece_notation = {
@@ -0,0 +1,150 @@
+"""
+Fixed size transposition table keyed by 64-bit position hashes (see
+Game.zobrist_key).
+
+Entries live in one preallocated array of unsigned 64-bit words, two words
+per entry: the key XORed with the data and the packed data itself. An entry
+torn by a concurrent writer then fails the key check instead of returning
+mixed up data, which lets worker processes share one table without locks.
+Each bucket holds two entries: a depth-preferred slot that keeps the deepest
+result of the current search and an always-replace slot for everything else.
+"""
+from array import array
+from typing import Optional, NamedTuple, Union
+
+from chess.custom_typehints import Move
+
+# bound types, 0 marks an empty entry
+EXACT: int = 1
+LOWER_BOUND: int = 2
+UPPER_BOUND: int = 3
+
+ENTRY_WORDS: int = 2
+BUCKET_ENTRIES: int = 2
+BUCKET_BYTES: int = ENTRY_WORDS * BUCKET_ENTRIES * 8
+
+SCORE_LIMIT: int = 32767
+_KEY_MASK: int = (1 << 64) - 1
+
+
+class TableEntry(NamedTuple):
+    move: Move
+    score: int
+    depth: int
+    bound: int
+
+
+def _pack(move: Move, score: int, depth: int, bound: int, generation: int) -> int:
+    score = max(-SCORE_LIMIT, min(SCORE_LIMIT, score)) + SCORE_LIMIT
+    return move & 0xFFFF | score << 16 | (depth & 0xFF) << 32 | bound << 40 | generation << 42
+
+
+def table_bytes(size_mb: float) -> int:
+    """Bytes a table of *size_mb* megabytes occupies, a whole number of buckets"""
+    return max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES) * BUCKET_BYTES
+
+
+class TranspositionTable:
+
+    def __init__(self, size_mb: float = 16, buffer: Optional[Union[bytearray, memoryview]] = None) -> None:
+        """
+        A transposition table using at most *size_mb* megabytes
+        :param size_mb: memory budget, rounded down to a whole number of buckets
+        :param buffer: writable buffer to keep the entries in, e.g. the buf of a
+        multiprocessing.shared_memory.SharedMemory, its size overrides size_mb
+        """
+        if buffer is None:
+            self._words: Union[array, memoryview] = array("Q", bytes(table_bytes(size_mb)))
+        else:
+            view: memoryview = memoryview(buffer)
+            self._words = view[:len(view) // BUCKET_BYTES * BUCKET_BYTES].cast("B").cast("Q")
+        self.buckets: int = len(self._words) // (ENTRY_WORDS * BUCKET_ENTRIES)
+        if not self.buckets:
+            raise ValueError("transposition table buffer is smaller than one bucket")
+        self.generation: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.collisions: int = 0
+        self.stores: int = 0
+
+    def __len__(self) -> int:
+        """Number of entries the table can hold"""
+        return self.buckets * BUCKET_ENTRIES
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._words) * 8
+
+    @property
+    def hit_rate(self) -> float:
+        probes: int = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def new_search(self) -> None:
+        """Age the stored entries so the depth-preferred slots can be reclaimed"""
+        self.generation = (self.generation + 1) & 63
+
+    def clear(self) -> None:
+        words = self._words
+        for i in range(len(words)):
+            words[i] = 0
+        self.generation = 0
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key: int) -> Optional[TableEntry]:
+        """
+        Look up the entry stored for *key*
+        :return: the stored entry or None when the position is not in the table
+        """
+        words = self._words
+        index: int = (key % self.buckets) * 4
+        occupied: bool = False
+        for slot in (index, index + 2):
+            data: int = words[slot + 1]
+            if data:
+                if words[slot] ^ data == key:
+                    self.hits += 1
+                    return TableEntry(data & 0xFFFF, (data >> 16 & 0xFFFF) - SCORE_LIMIT,
+                                      data >> 32 & 0xFF, data >> 40 & 3)
+                occupied = True
+        # another position already lives in the bucket
+        self.collisions += occupied
+        self.misses += 1
+        return None
+
+    def store(self, key: int, move: Move, score: int, depth: int, bound: int) -> None:
+        """
+        Store a search result for *key*. The depth-preferred slot takes it when
+        it is at least as deep as the slot's entry, when that entry is from an
+        older search or already belongs to *key*; otherwise it goes to the
+        always-replace slot.
+        """
+        key &= _KEY_MASK
+        words = self._words
+        index: int = (key % self.buckets) * 4
+
+        slot: int = index + 2
+        preferred: int = words[index + 1]
+        if not preferred or words[index] ^ preferred == key or depth >= preferred >> 32 & 0xFF or \
+                preferred >> 42 != self.generation:
+            slot = index
+        old: int = words[slot + 1]
+        if not move and old and words[slot] ^ old == key:
+            # keep the best move found by an earlier search of the position
+            move = old & 0xFFFF
+
+        data: int = _pack(move, score, depth, bound, self.generation)
+        words[slot] = key ^ data
+        words[slot + 1] = data
+        self.stores += 1
+
+    def hashfull(self) -> int:
+        """Permille of the first thousand entries used by the current search, as reported over UCI"""
+        words = self._words
+        sample: int = min(1000, len(self))
+        used: int = 0
+        for entry in range(sample):
+            data: int = words[entry * 2 + 1]
+            used += bool(data) and data >> 42 == self.generation
+        return used * 1000 // sample
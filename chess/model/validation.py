@@ -0,0 +1,136 @@
+"""
+Batch validation of (FEN, move) pairs.
+
+A MoveValidator keeps one Game and loads each position into it in place, so
+a batch allocates no boards after the first. The legal moves of the loaded
+position are kept while the next pairs share its FEN, and validate_moves
+orders a batch by FEN so that repeated positions are only set up once.
+Large batches can be split into chunks and handed to a process pool.
+"""
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
+
+from chess.custom_typehints import Colour, Move
+from chess.model.bitboard import BitBoard, KING, popcount
+from chess.model.fen import load_fen
+from chess.model.game import Game, is_in_check
+from chess.model.move import from_uci
+from chess.model.move_generator import generate_legal_moves
+
+DEFAULT_CHUNK_SIZE: int = 512
+
+
+@dataclass(frozen=True)
+class ValidationResult:
+    fen: str
+    move: str
+    legal: bool
+    # why the move was rejected, None when it is legal
+    error: Optional[str] = None
+    # Zobrist key of the position after the move, see Game.zobrist_key
+    zobrist_key: Optional[int] = None
+    # whether the move gives check, mate or stalemate
+    check: bool = False
+    checkmate: bool = False
+    stalemate: bool = False
+
+
+class MoveValidator:
+
+    def __init__(self) -> None:
+        """Validates moves on a single reused game, one position at a time"""
+        self.game: Game = Game(board=BitBoard())
+        self._fen: Optional[str] = None
+        self._legal_moves: Set[Move] = set()
+
+    def load(self, fen: str) -> None:
+        """
+        Set up the position of *fen* unless it is already loaded
+        :raises ValueError: when the record is malformed or the position cannot occur
+        """
+        if fen == self._fen:
+            return
+        self._fen = None
+        game: Game = load_fen(self.game, fen)
+        board: BitBoard = game.board
+        if popcount(board.pieces[KING]) != 1 or popcount(board.pieces[KING + 6]) != 1:
+            raise ValueError("each side needs exactly one king")
+        if is_in_check(board, Colour.BLACK if game.turn() is Colour.WHITE else Colour.WHITE):
+            raise ValueError("the side not to move is in check")
+        self._legal_moves = set(generate_legal_moves(game))
+        self._fen = fen
+
+    def validate(self, fen: str, move: str) -> ValidationResult:
+        """
+        Check whether *move* is legal in the position of *fen*
+        :param fen: FEN record of the position
+        :param move: move in long algebraic notation, e.g. e2e4 or a7a8q
+        :return: result of the check, never raises on bad input
+        """
+        try:
+            self.load(fen)
+        except ValueError as error:
+            return ValidationResult(fen, move, False, f"invalid position: {error}")
+        try:
+            encoded: Move = from_uci(move)
+        except ValueError as error:
+            return ValidationResult(fen, move, False, str(error))
+        if encoded not in self._legal_moves:
+            return ValidationResult(fen, move, False, "illegal move")
+
+        game: Game = self.game
+        game.make_move(encoded)
+        try:
+            check: bool = is_in_check(game.board, game.turn())
+            has_reply: bool = bool(generate_legal_moves(game))
+            return ValidationResult(fen, move, True, zobrist_key=game.zobrist_key, check=check,
+                                    checkmate=check and not has_reply, stalemate=not check and not has_reply)
+        finally:
+            game.unmake_move()
+
+
+# validator of each pool worker, kept between the chunks it is given
+_worker: threading.local = threading.local()
+
+
+def _validate_chunk(pairs: List[Tuple[str, str]]) -> List[ValidationResult]:
+    validator: Optional[MoveValidator] = getattr(_worker, "validator", None)
+    if validator is None:
+        validator = _worker.validator = MoveValidator()
+    return [validator.validate(fen, move) for fen, move in pairs]
+
+
+def validate_moves(pairs: Iterable[Tuple[str, str]], workers: int = 1, executor: Optional[Executor] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[ValidationResult]:
+    """
+    Validate many (FEN, move) pairs
+    :param pairs: FEN record and long algebraic move of each candidate
+    :param workers: number of processes to spread the batch over, ignored when an executor is given
+    :param executor: pool to run chunks of the batch in, kept open for the next batch
+    :param chunk_size: number of pairs handed to a worker at a time
+    :return: one result per pair, in the order of *pairs*
+    """
+    pairs = list(pairs)
+    # pairs sharing a position are validated one after another
+    order: List[int] = sorted(range(len(pairs)), key=lambda i: pairs[i][0])
+    chunks: List[List[Tuple[str, str]]] = [[pairs[i] for i in order[start:start + chunk_size]]
+                                           for start in range(0, len(order), chunk_size)]
+
+    if executor is not None:
+        chunk_results = list(executor.map(_validate_chunk, chunks))
+    elif workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+            chunk_results = list(pool.map(_validate_chunk, chunks))
+    else:
+        validator: MoveValidator = MoveValidator()
+        chunk_results = [[validator.validate(fen, move) for fen, move in chunk] for chunk in chunks]
+
+    results: List[Optional[ValidationResult]] = [None] * len(pairs)
+    position: int = 0
+    for chunk in chunk_results:
+        for result in chunk:
+            results[order[position]] = result
+            position += 1
+    return results
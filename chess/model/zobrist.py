@@ -0,0 +1,23 @@
+"""
+Zobrist keys. A position hash is the XOR of one random 64-bit key per
+(piece code, square) pair on the board, a key for black to move, a key for
+the castling rights and a key for the en passant file, so every change to a
+position updates its hash with a few XORs.
+
+The pawn key hashes the pawns alone with the same piece keys, evaluation
+caches pawn structure terms by it.
+"""
+from random import Random
+from typing import List
+
+# fixed seed so hashes are stable across processes and runs
+_random: Random = Random(0x5EED_C4E55)
+
+PIECE_KEYS: List[List[int]] = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+BLACK_TO_MOVE_KEY: int = _random.getrandbits(64)
+# indexed by the castling rights bitmask
+CASTLING_KEYS: List[int] = [0] + [_random.getrandbits(64) for _ in range(15)]
+# indexed by the file of the en passant square
+EN_PASSANT_KEYS: List[int] = [_random.getrandbits(64) for _ in range(8)]
+# PIECE_KEYS for pawn codes and zeros for every other piece, XORed into the pawn key
+PAWN_KEYS: List[List[int]] = [PIECE_KEYS[code] if code % 6 == 0 else [0] * 64 for code in range(12)]
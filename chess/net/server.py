@@ -0,0 +1,434 @@
+"""
+Asyncio server hosting many games at once over a line based TCP protocol.
+
+Every game lives in the one event loop; moves are checked and played with
+Game.move, which is quick, and a refused move is reported with the reason
+Game.move_refusal gives. Engine replies are searched in an executor, a
+process pool by default, so a search never stalls the loop; each worker
+keeps one searcher and transposition table for all the moves it plays. Positions in
+the opening book, when one is given, are answered in the loop at once.
+Finished games and games nobody touched for a while are evicted by a
+periodic sweep.
+
+Commands, one per line, words separated by spaces:
+
+    new [white|black] [engine]  start a game and take a side, white by default,
+                                with engine the server plays the other side
+    join <id>                   take the free side of a game, or watch it
+    leave <id>                  stop playing or watching a game
+    move <id> <uci>             play a move, e.g. e2e4 or a7a8q
+    state <id>                  ask for the current state of a game
+    ping                        answered with pong
+    quit                        close the connection
+
+Replies and pushed updates:
+
+    game <id> <white|black|watching>    after new and join
+    state <id> <status> <last move or -> <fen>
+                                        after every move, to everyone in the game
+    closed <id>                         the game was evicted
+    error <message>
+    error <id> engine failed            the engine search crashed, it is
+                                        retried once on a fresh pool when
+                                        the pool broke, else the game is
+                                        closed
+"""
+import argparse
+import asyncio
+import itertools
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Set
+
+from chess.custom_typehints import Colour, GameStatus, Move
+from chess.data.book import OpeningBook
+from chess.model.fen import game_from_fen, game_to_fen
+from chess.model.game import Game
+from chess.model.move import from_uci, to_uci, to_coords, promotion_type
+
+FINISHED: Set[GameStatus] = {GameStatus.WHITE_WIN, GameStatus.BLACK_WIN, GameStatus.DRAW}
+COLOUR_NAMES: Dict[str, Colour] = {"white": Colour.WHITE, "black": Colour.BLACK}
+# bytes a client may leave unread before it is disconnected
+MAX_PENDING_BYTES: int = 1 << 20
+# transposition table size of each engine worker
+ENGINE_HASH_MB: int = 16
+# engine searches of a game retried on a fresh pool after the pool broke
+MAX_ENGINE_RETRIES: int = 1
+
+
+# searcher of each executor worker, kept between the moves it is asked for
+_worker: threading.local = threading.local()
+
+
+def init_engine_worker(hash_mb: int = ENGINE_HASH_MB) -> None:
+    """Executor initializer, gives the worker one searcher and transposition table for all its moves"""
+    from chess.engine.search import Searcher
+    from chess.model.transposition import TranspositionTable
+
+    _worker.searcher = Searcher(table=TranspositionTable(hash_mb))
+
+
+def engine_reply(fen: str, movetime: float, depth: Optional[int] = None) -> Optional[str]:
+    """
+    Search the position for the engine's move, run in the executor
+    :return: the move in UCI notation, None when there is no legal move
+    """
+    from chess.engine.search import SearchLimits
+
+    if getattr(_worker, "searcher", None) is None:
+        init_engine_worker()
+    limits: SearchLimits = SearchLimits(depth=depth) if depth else \
+        SearchLimits(soft_time=movetime / 2, hard_time=movetime)
+    result = _worker.searcher.search(game_from_fen(fen), limits)
+    return to_uci(result.best_move) if result.best_move else None
+
+
+class Connection:
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer: asyncio.StreamWriter = writer
+        self.games: Set[int] = set()
+
+    def send(self, line: str) -> None:
+        """Queue a line for the client, dropping clients that stopped reading"""
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+            self.writer.close()
+            return
+        self.writer.write(line.encode() + b"\n")
+
+
+class GameSession:
+
+    def __init__(self, game_id: int, game: Game, engine_colour: Optional[Colour], now: float) -> None:
+        self.id: int = game_id
+        self.game: Game = game
+        self.engine_colour: Optional[Colour] = engine_colour
+        self.players: Dict[Colour, Connection] = {}
+        self.watchers: Set[Connection] = set()
+        self.last_active: float = now
+        self.engine_task: Optional[asyncio.Task] = None
+        # engine searches that failed since the engine last moved
+        self.engine_failures: int = 0
+
+    def connections(self) -> Set[Connection]:
+        return set(self.players.values()) | self.watchers
+
+    def state_line(self) -> str:
+        moves = self.game.played_moves()
+        last: str = to_uci(moves[-1]) if moves else "-"
+        return f"state {self.id} {self.game.status.name.lower()} {last} {game_to_fen(self.game)}"
+
+    def finished(self) -> bool:
+        return self.game.status in FINISHED
+
+
+class GameServer:
+
+    def __init__(self,
+                 executor: Optional[Executor] = None,
+                 engine_movetime: float = 1.0,
+                 engine_depth: Optional[int] = None,
+                 idle_timeout: float = 1800,
+                 finished_timeout: float = 60,
+                 sweep_interval: float = 10,
+                 book: Optional[OpeningBook] = None,
+                 workers: Optional[int] = None
+                 ) -> None:
+        """
+        Server state for any number of games, start it with start
+        :param executor: where engine searches run, a process pool by default
+        :param engine_movetime: seconds the engine searches per move
+        :param engine_depth: fixed engine search depth instead of the move time
+        :param idle_timeout: seconds without a move after which a game is evicted
+        :param finished_timeout: seconds a finished game is kept for a last look
+        :param sweep_interval: seconds between eviction sweeps
+        :param book: opening book the engine plays from before searching
+        :param workers: processes of the default pool, one per CPU by default
+        """
+        self._executor: Optional[Executor] = executor
+        self._own_executor: bool = executor is None
+        self.engine_movetime: float = engine_movetime
+        self.engine_depth: Optional[int] = engine_depth
+        self.idle_timeout: float = idle_timeout
+        self.finished_timeout: float = finished_timeout
+        self.sweep_interval: float = sweep_interval
+        self.book: Optional[OpeningBook] = book
+        self.workers: Optional[int] = workers
+
+        self.sessions: Dict[int, GameSession] = {}
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self._connections: Set[Connection] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Start listening, port 0 picks a free port"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=init_engine_worker)
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for game_id in list(self.sessions):
+            self.evict(game_id)
+        if self._server is not None:
+            self._server.close()
+            for connection in self._connections:
+                connection.writer.close()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection: Connection = Connection(writer)
+        self._connections.add(connection)
+        self._handlers.add(asyncio.current_task())
+        try:
+            while not writer.is_closing():
+                try:
+                    line: bytes = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                words: List[str] = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                if words[0] == "quit":
+                    break
+                self.handle_command(connection, words)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in list(connection.games):
+                self.leave(connection, game_id)
+            writer.close()
+            self._connections.discard(connection)
+            self._handlers.discard(asyncio.current_task())
+
+    def handle_command(self, connection: Connection, words: List[str]) -> None:
+        """Run one command of a client, replies are queued on its connection"""
+        command, args = words[0], words[1:]
+        try:
+            if command == "new":
+                self.new_game(connection, args)
+            elif command == "ping":
+                connection.send("pong")
+            elif command in ("join", "leave", "move", "state"):
+                if not args or not args[0].isdigit() or int(args[0]) not in self.sessions:
+                    raise ValueError("unknown game")
+                game_id: int = int(args[0])
+                if command == "join":
+                    self.join(connection, game_id)
+                elif command == "leave":
+                    self.leave(connection, game_id)
+                elif command == "move":
+                    if len(args) != 2:
+                        raise ValueError("usage: move <id> <uci>")
+                    self.play(connection, game_id, args[1])
+                else:
+                    connection.send(self.sessions[game_id].state_line())
+            else:
+                raise ValueError(f"unknown command {command}")
+        except ValueError as error:
+            connection.send(f"error {error}")
+
+    def new_game(self, connection: Connection, args: List[str]) -> GameSession:
+        colour: Colour = Colour.WHITE
+        engine: bool = False
+        for arg in args:
+            if arg in COLOUR_NAMES:
+                colour = COLOUR_NAMES[arg]
+            elif arg == "engine":
+                engine = True
+            else:
+                raise ValueError(f"unknown option {arg}")
+
+        engine_colour: Optional[Colour] = None
+        if engine:
+            engine_colour = Colour.BLACK if colour is Colour.WHITE else Colour.WHITE
+        session: GameSession = GameSession(next(self._ids), Game(), engine_colour, self._now())
+        self.sessions[session.id] = session
+        session.players[colour] = connection
+        connection.games.add(session.id)
+        connection.send(f"game {session.id} {colour.name.lower()}")
+        connection.send(session.state_line())
+        self._engine_turn(session)
+        return session
+
+    def join(self, connection: Connection, game_id: int) -> None:
+        session: GameSession = self.sessions[game_id]
+        seat: str = "watching"
+        if connection not in session.connections():
+            for colour in (Colour.WHITE, Colour.BLACK):
+                if colour not in session.players and colour is not session.engine_colour:
+                    session.players[colour] = connection
+                    seat = colour.name.lower()
+                    break
+            else:
+                session.watchers.add(connection)
+        connection.games.add(game_id)
+        connection.send(f"game {game_id} {seat}")
+        connection.send(session.state_line())
+
+    def leave(self, connection: Connection, game_id: int) -> None:
+        connection.games.discard(game_id)
+        session: Optional[GameSession] = self.sessions.get(game_id)
+        if session is None:
+            return
+        session.watchers.discard(connection)
+        for colour, player in list(session.players.items()):
+            if player is connection:
+                del session.players[colour]
+
+    def play(self, connection: Connection, game_id: int, uci: str) -> None:
+        """
+        Play a move for the side the connection holds
+        :raises ValueError: when the move cannot be played
+        """
+        session: GameSession = self.sessions[game_id]
+        game: Game = session.game
+        if session.finished():
+            raise ValueError("the game is over")
+        if session.players.get(game.turn()) is not connection:
+            raise ValueError("not your turn")
+        self._move(session, uci)
+        self._engine_turn(session)
+
+    def _move(self, session: GameSession, uci: str) -> None:
+        move = from_uci(uci)
+        from_coord, to_coord = to_coords(move)
+        refusal: Optional[str] = session.game.move_refusal(from_coord, to_coord, promotion_type(move))
+        if refusal is not None or not session.game.move(from_coord, to_coord, promotion_type(move)):
+            raise ValueError(refusal or f"illegal move {uci}")
+        session.last_active = self._now()
+        state: str = session.state_line()
+        for connection in session.connections():
+            connection.send(state)
+
+    def _engine_turn(self, session: GameSession) -> None:
+        if session.engine_colour is session.game.turn() and not session.finished() and session.engine_task is None:
+            session.engine_task = asyncio.get_running_loop().create_task(self._engine_move(session))
+
+    async def _engine_move(self, session: GameSession) -> None:
+        book_move: Optional[Move] = self.book.choose(session.game) if self.book is not None else None
+        if book_move is not None:
+            session.engine_task = None
+            self._move(session, to_uci(book_move))
+            return
+        fen: str = game_to_fen(session.game)
+        executor: Optional[Executor] = self._executor
+        error: Optional[Exception] = None
+        uci: Optional[str] = None
+        try:
+            uci = await asyncio.get_running_loop().run_in_executor(
+                executor, engine_reply, fen, self.engine_movetime, self.engine_depth)
+        except Exception as caught:
+            error = caught
+        finally:
+            session.engine_task = None
+        if self.sessions.get(session.id) is not session:
+            return
+        if error is not None:
+            self._engine_failed(session, executor, error)
+        elif uci is not None:
+            session.engine_failures = 0
+            self._move(session, uci)
+
+    def _engine_failed(self, session: GameSession, executor: Optional[Executor], error: Exception) -> None:
+        """Tell the game, then retry the search on a fresh pool when our pool broke, or close the game"""
+        for connection in session.connections():
+            connection.send(f"error {session.id} engine failed")
+        session.engine_failures += 1
+        if isinstance(error, BrokenExecutor) and self._own_executor and \
+                session.engine_failures <= MAX_ENGINE_RETRIES:
+            # the other games searching on the broken pool fail as well, replace it only once
+            if executor is self._executor:
+                executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(self.workers, initializer=init_engine_worker)
+            self._engine_turn(session)
+        else:
+            self.evict(session.id)
+
+    def evict(self, game_id: int) -> None:
+        session: Optional[GameSession] = self.sessions.pop(game_id, None)
+        if session is None:
+            return
+        if session.engine_task is not None:
+            session.engine_task.cancel()
+        for connection in session.connections():
+            connection.games.discard(game_id)
+            connection.send(f"closed {game_id}")
+
+    def sweep(self) -> List[int]:
+        """
+        Evict finished games after finished_timeout and every game after idle_timeout
+        :return: ids of the evicted games
+        """
+        now: float = self._now()
+        evicted: List[int] = []
+        for game_id, session in list(self.sessions.items()):
+            idle: float = now - session.last_active
+            if session.engine_task is None and \
+                    (idle > self.idle_timeout or session.finished() and idle > self.finished_timeout):
+                self.evict(game_id)
+                evicted.append(game_id)
+        return evicted
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+
+async def serve(host: str, port: int, **options) -> None:
+    server: GameServer = GameServer(**options)
+    listener: asyncio.AbstractServer = await server.start(host, port)
+    print(f"serving games on {host}:{server.port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(args: List[str]) -> int:
+    """
+    Command line entry point: serve [--host HOST] [--port PORT] [--workers N] [--movetime SECONDS] [--book FILE]
+    :return: exit status
+    """
+    parser = argparse.ArgumentParser(prog="python -m chess serve", description="Host games over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="engine processes, one per CPU by default")
+    parser.add_argument("--movetime", type=float, default=1.0, help="engine seconds per move")
+    parser.add_argument("--idle-timeout", type=float, default=1800, help="seconds before an idle game is evicted")
+    parser.add_argument("--book", default=None, help="opening book file, see python -m chess book")
+    options = parser.parse_args(args)
+
+    book: Optional[OpeningBook] = OpeningBook(options.book) if options.book else None
+    try:
+        asyncio.run(serve(options.host, options.port, workers=options.workers, engine_movetime=options.movetime,
+                          idle_timeout=options.idle_timeout, book=book))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if book is not None:
+            book.close()
+    return 0
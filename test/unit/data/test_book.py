@@ -0,0 +1,111 @@
+import os
+import random
+import struct
+import tempfile
+from typing import List
+from unittest import TestCase
+
+from chess.data.book import ENTRY_BYTES, OpeningBook, build_book, decode_book_move, encode_book_move, main
+from chess.engine.search import Searcher, SearchLimits, SearchResult
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci, to_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.pgn import PgnGame
+
+KIWIPETE: str = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+GAMES: List[PgnGame] = [
+    PgnGame(moves=["e4", "e5", "Nf3", "Nc6"], result="1-0"),
+    PgnGame(moves=["e4", "c5", "Nf3"], result="1-0"),
+    PgnGame(moves=["e4", "e5", "Nf3", "Nf6"], result="1/2-1/2"),
+    PgnGame(moves=["d4", "d5"], result="0-1"),
+    PgnGame(moves=["d4", "Nf6"], result="*"),
+]
+
+
+class TestOpeningBook(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, "book.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_move_encoding(self):
+        game: Game = game_from_fen(KIWIPETE)
+        # polyglot numbers rows from white's side, e2e4 is from row 1 to row 3
+        self.assertEqual(4 | 3 << 3 | 4 << 6 | 1 << 9, encode_book_move(Game(), from_uci("e2e4")))
+        # castling is stored as the king taking its rook
+        self.assertEqual(encode_book_move(game, from_uci("e1h1")), encode_book_move(game, from_uci("e1g1")))
+        for move in generate_legal_moves(game) + [from_uci("a7a8q")]:
+            with self.subTest(move=to_uci(move)):
+                self.assertEqual(move, decode_book_move(game, encode_book_move(game, move)))
+
+    def test_build_and_probe(self):
+        # moves that only lost, c5 and Nc6, weigh nothing and are dropped
+        self.assertEqual(8, build_book(GAMES, self.path))
+        self.assertEqual(8 * ENTRY_BYTES, os.path.getsize(self.path))
+        with OpeningBook(self.path) as book:
+            self.assertEqual(8, len(book))
+            game: Game = Game()
+            # two wins and a draw for e4, a loss and an unknown result for d4
+            self.assertEqual([(from_uci("e2e4"), 5), (from_uci("d2d4"), 1)], book.moves(game))
+            self.assertEqual(from_uci("e2e4"), book.choose(game, best=True))
+            game.make_move(from_uci("d2d4"))
+            # d5 only won for black, g8f6 had an unknown result
+            self.assertEqual([(from_uci("d7d5"), 2), (from_uci("g8f6"), 1)], book.moves(game))
+            game.make_move(from_uci("d7d5"))
+            self.assertEqual([], book.moves(game))
+            self.assertIsNone(book.choose(game))
+
+    def test_sorted_for_binary_search(self):
+        build_book(GAMES, self.path)
+        with open(self.path, "rb") as handle:
+            data: bytes = handle.read()
+        keys: List[int] = [struct.unpack_from(">Q", data, offset)[0] for offset in range(0, len(data), ENTRY_BYTES)]
+        self.assertEqual(sorted(keys), keys)
+        with OpeningBook(self.path) as book:
+            for key in keys:
+                self.assertTrue(all(entry.key == key for entry in book.entries(key)))
+            self.assertEqual([], book.entries(0))
+            self.assertEqual([], book.entries((1 << 64) - 1))
+
+    def test_weighted_choice(self):
+        build_book(GAMES, self.path)
+        with OpeningBook(self.path) as book:
+            rng: random.Random = random.Random(7)
+            picks: List[str] = [to_uci(book.choose(Game(), rng)) for _ in range(600)]
+        self.assertEqual({"e2e4", "d2d4"}, set(picks))
+        self.assertGreater(picks.count("e2e4"), 3 * picks.count("d2d4"))
+
+    def test_max_ply_and_min_weight(self):
+        self.assertEqual(2, build_book(GAMES, self.path, max_ply=1))
+        self.assertEqual(4, build_book(GAMES, self.path, min_weight=2))
+
+    def test_empty_and_invalid(self):
+        self.assertEqual(0, build_book([], self.path))
+        with OpeningBook(self.path) as book:
+            self.assertEqual(0, len(book))
+            self.assertIsNone(book.choose(Game()))
+        with open(self.path, "wb") as handle:
+            handle.write(b"\0" * 15)
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+    def test_pgn_file_and_command(self):
+        pgn: str = os.path.join(self.directory.name, "games.pgn")
+        with open(pgn, "w") as handle:
+            handle.write('[Event "?"]\n\n1. e4 e5 2. Nf3 1-0\n\n[Event "?"]\n\n1. e4 c5 1/2-1/2\n')
+        self.assertEqual(0, main([self.path, pgn, "--max-ply", "2"]))
+        with OpeningBook(self.path) as book:
+            self.assertEqual([(from_uci("e2e4"), 3)], book.moves(Game()))
+
+    def test_searcher_plays_book_moves(self):
+        build_book(GAMES, self.path)
+        with OpeningBook(self.path) as book:
+            result: SearchResult = Searcher(book=book).search(Game(), SearchLimits(depth=3))
+            self.assertIn(to_uci(result.best_move), ("e2e4", "d2d4"))
+            self.assertEqual((0, 0), (result.depth, result.nodes))
+            # out of book the searcher searches
+            result = Searcher(book=book).search(game_from_fen(KIWIPETE), SearchLimits(depth=1))
+            self.assertEqual(1, result.depth)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from chess.data.database import PositionDatabase, MIN_CAPACITY
+from chess.model.fen import STARTING_FEN, game_to_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.pgn import PgnGame
+
+
+class TestPositionDatabase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path: str = os.path.join(self.directory.name, "positions")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_add_and_lookup(self):
+        game: Game = Game()
+        with PositionDatabase(self.path, writable=True) as database:
+            self.assertIsNone(database.lookup(game))
+            database.add(game, "1-0")
+            database.add(game, "1/2-1/2")
+            game.make_move(from_uci("e2e4"))
+            database.add(game, "0-1")
+            self.assertEqual(2, len(database))
+
+        with PositionDatabase(self.path) as database:
+            entry = database.lookup(Game())
+            self.assertEqual((2, 1, 1, 0), entry[2:])
+            self.assertEqual(STARTING_FEN, game_to_fen(entry.game()))
+            self.assertIn(game.zobrist_key, database)
+            self.assertNotIn(game.zobrist_key ^ 1, database)
+            with self.assertRaises(PermissionError):
+                database.add(game)
+
+    def test_add_game(self):
+        record: PgnGame = PgnGame(moves=["e4", "e5", "Nf3", "Nc6"], result="1-0")
+        with PositionDatabase(self.path, writable=True) as database:
+            self.assertEqual(5, database.add_game(record))
+            database.add_game(PgnGame(moves=["Nf3", "Nc6", "e4", "e5"], result="0-1"))
+            # the transposition leads to the same final position
+            self.assertEqual(8, len(database))
+            final = database.lookup(record.replay())
+            self.assertEqual((2, 1, 0, 1), final[2:])
+
+    def test_index_grows_and_rebuilds(self):
+        keys = []
+        with PositionDatabase(self.path, writable=True) as database:
+            # walk through many distinct positions, more than the initial index holds
+            for move in generate_legal_moves(Game()):
+                game: Game = Game()
+                game.make_move(move)
+                for reply in generate_legal_moves(game):
+                    game.make_move(reply)
+                    for third in generate_legal_moves(game)[:2]:
+                        game.make_move(third)
+                        database.add(game)
+                        keys.append(game.zobrist_key)
+                        game.unmake_move()
+                    game.unmake_move()
+            count: int = len(database)
+            self.assertGreater(count, MIN_CAPACITY // 2)
+
+        os.remove(self.path + ".idx")
+        with self.assertRaises(FileNotFoundError):
+            PositionDatabase(self.path)
+        with PositionDatabase(self.path, writable=True) as database:
+            self.assertEqual(count, len(database))
+            self.assertTrue(all(key in database for key in keys))
+            self.assertEqual(count, len(list(database)))
+
+    def test_reserve(self):
+        with PositionDatabase(self.path, writable=True, expected_positions=5000) as database:
+            capacity: int = database._capacity
+            self.assertGreaterEqual(capacity, 10000)
+            game: Game = Game()
+            for move in generate_legal_moves(game):
+                game.make_move(move)
+                database.add(game)
+                game.unmake_move()
+            # no rehash while adding fewer positions than reserved
+            self.assertEqual(capacity, database._capacity)
+            self.assertEqual(20, len(database))
+        self.assertEqual(24 + 16 * capacity, os.path.getsize(self.path + ".idx"))
+        with PositionDatabase(self.path) as database:
+            self.assertEqual(20, len(database))
+            self.assertRaises(PermissionError, database.reserve, 10)
+
+    def test_not_a_database(self):
+        with open(self.path + ".dat", "wb") as handle:
+            handle.write(b"x" * 64)
+        with self.assertRaises(ValueError):
+            PositionDatabase(self.path)
@@ -0,0 +1,94 @@
+import gzip
+import os
+import tempfile
+from typing import List
+from unittest import TestCase, mock
+
+from chess.data import replay
+from chess.data.replay import run_batch, position_lines, shard_path, BatchSummary, _replay_chunk
+from chess.model.pgn import PgnGame
+
+GAME: str = """[Event "{number}"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 {result}
+
+"""
+ILLEGAL: str = """[Event "bad"]
+
+1. e4 e5 2. Ke3 *
+
+"""
+
+
+def _crash_once(index, games, output_dir, compress):
+    # takes the worker process down the first time chunk 1 is replayed
+    marker: str = os.path.join(output_dir, "crashed")
+    if index == 1 and not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return _replay_chunk(index, games, output_dir, compress)
+
+
+class TestReplay(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_dir: str = os.path.join(self.directory.name, "games")
+        self.output_dir: str = os.path.join(self.directory.name, "positions")
+        os.makedirs(os.path.join(self.input_dir, "nested"))
+        with open(os.path.join(self.input_dir, "a.pgn"), "w") as handle:
+            handle.write("".join(GAME.format(number=i, result="1-0") for i in range(3)) + ILLEGAL)
+        with gzip.open(os.path.join(self.input_dir, "nested", "b.pgn.gz"), "wt") as handle:
+            handle.write("".join(GAME.format(number=i, result="*") for i in range(2)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_shards(self) -> List[str]:
+        lines: List[str] = []
+        for name in sorted(os.listdir(self.output_dir)):
+            if name.startswith("positions-"):
+                with open(os.path.join(self.output_dir, name)) as handle:
+                    lines.extend(handle)
+        return lines
+
+    def test_position_lines(self):
+        record: PgnGame = PgnGame(moves=["e4", "e5", "Qh5", "Nc6", "Bc4", "Nf6", "Qxf7#"])
+        lines: List[str] = list(position_lines(record))
+        self.assertEqual(8, len(lines))
+        fen, key, side, legal, check = lines[0].rstrip("\n").split("\t")
+        self.assertEqual(("w", "20", "0"), (side, legal, check))
+        self.assertEqual(16, len(key))
+        self.assertEqual(["b", "0", "1"], lines[-1].rstrip("\n").split("\t")[2:])
+
+    def test_run_batch(self):
+        seen: List[int] = []
+        summary: BatchSummary = run_batch(self.input_dir, self.output_dir, workers=2, chunk_size=2,
+                                          progress=lambda totals: seen.append(totals.chunks))
+        self.assertEqual(6, summary.games)
+        self.assertEqual(3, summary.chunks)
+        self.assertEqual([1, 2, 3], seen)
+        self.assertEqual([], summary.failed_chunks)
+        # the illegal king move is reported, the positions before it are kept
+        self.assertEqual(1, len(summary.errors))
+        self.assertIn("a.pgn:4", summary.errors[0])
+        self.assertEqual(5 * 7 + 3, summary.positions)
+        self.assertEqual(summary.positions, len(self.read_shards()))
+
+        # a rerun skips the shards that are already complete
+        summary = run_batch(self.input_dir, self.output_dir, workers=1, chunk_size=2)
+        self.assertEqual(3, summary.skipped_chunks)
+        self.assertEqual(0, summary.positions)
+
+    def test_compressed_shards(self):
+        summary: BatchSummary = run_batch(self.input_dir, self.output_dir, workers=1, chunk_size=10, compress=True)
+        with gzip.open(shard_path(self.output_dir, 0, compress=True), "rt") as handle:
+            self.assertEqual(summary.positions, len(handle.readlines()))
+
+    def test_worker_crash_is_retried(self):
+        with mock.patch.object(replay, "_replay_chunk", _crash_once):
+            summary: BatchSummary = run_batch(self.input_dir, self.output_dir, workers=2, chunk_size=2)
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, "crashed")))
+        self.assertEqual([], summary.failed_chunks)
+        self.assertEqual(6, summary.games)
+        self.assertEqual(summary.positions, len(self.read_shards()))
@@ -0,0 +1,171 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+from typing import List, Optional
+from unittest import TestCase
+
+from chess.custom_typehints import Colour
+from chess.data.tablebase import DRAW, LOSS, WIN, TABLE_SIZE, Tablebase, TablebaseResult, build_tables, main
+from chess.engine.search import MATE_SCORE, Searcher, SearchLimits, SearchResult
+from chess.model.fen import game_from_fen
+from chess.model.attacks import KING_ATTACKS
+from chess.model.game import Game, is_in_check
+from chess.model.move import to_uci
+from chess.model.move_generator import generate_legal_moves
+
+
+def _fen(pieces: dict, white_to_move: bool) -> str:
+    """FEN record of a position given as {square: letter}, square 0 being a8"""
+    rows: List[str] = []
+    for y in range(8):
+        row: str = ""
+        empty: int = 0
+        for x in range(8):
+            letter: Optional[str] = pieces.get(y * 8 + x)
+            if letter is None:
+                empty += 1
+                continue
+            row += (str(empty) if empty else "") + letter
+            empty = 0
+        rows.append(row + (str(empty) if empty else ""))
+    return f"{'/'.join(rows)} {'w' if white_to_move else 'b'} - - 0 1"
+
+
+class TestTablebase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        build_tables(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.tablebase: Tablebase = Tablebase(self.directory.name)
+
+    def tearDown(self):
+        self.tablebase.close()
+
+    def probe(self, fen: str) -> Optional[TablebaseResult]:
+        return self.tablebase.probe(game_from_fen(fen))
+
+    def test_known_positions(self):
+        self.assertEqual(["KQK", "KRK", "KPK"], self.tablebase.tables)
+        # mate in one with the queen, and the position after it
+        self.assertEqual(TablebaseResult(WIN, 1), self.probe("k7/8/1K6/8/8/8/8/2Q5 w - - 0 1"))
+        self.assertEqual(TablebaseResult(LOSS, 0), self.probe("k1Q5/8/1K6/8/8/8/8/8 b - - 0 1"))
+        self.assertEqual(TablebaseResult(WIN, 13), self.probe("8/8/8/4k3/8/8/8/4K2Q w - - 0 1"))
+        # stalemates and the lone king taking the pawn
+        self.assertEqual(TablebaseResult(DRAW, 0), self.probe("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1"))
+        self.assertEqual(TablebaseResult(DRAW, 0), self.probe("8/8/8/8/8/k7/p7/K7 w - - 0 1"))
+        self.assertEqual(TablebaseResult(DRAW, 0), self.probe("4k3/4P3/4K3/8/8/8/8/8 b - - 0 1"))
+        self.assertEqual(TablebaseResult(LOSS, 24), self.probe("4k3/8/4K3/4P3/8/8/8/8 b - - 0 1"))
+        self.assertEqual(TablebaseResult(WIN, 21), self.probe("4k3/8/4K3/4P3/8/8/8/8 w - - 0 1"))
+        # the same positions with the colours reversed
+        self.assertEqual(TablebaseResult(LOSS, 24), self.probe("8/8/8/8/4p3/4k3/8/4K3 w - - 0 1"))
+        self.assertEqual(TablebaseResult(LOSS, 0), self.probe("8/8/8/8/8/1k6/8/K1q5 w - - 0 1"))
+
+    def test_not_covered(self):
+        self.assertIsNone(self.probe("8/8/8/4k3/8/8/8/4K3 w - - 0 1"))
+        self.assertIsNone(self.probe("8/8/8/4k3/8/8/8/4KN2 w - - 0 1"))
+        self.assertIsNone(self.probe("4k3/8/8/8/8/8/8/4K2R w K - 0 1"))
+        self.assertIsNone(self.tablebase.probe(Game()))
+        self.assertIsNone(self.tablebase.best_move(Game()))
+        with Tablebase(self.directory.name + "/missing") as empty:
+            self.assertEqual([], empty.tables)
+            self.assertIsNone(empty.probe(game_from_fen("8/8/8/4k3/8/8/8/4K2Q w - - 0 1")))
+
+    def test_consistent_with_move_generator(self):
+        rng: random.Random = random.Random(3)
+        for letter in "QRP":
+            checked: int = 0
+            while checked < 150:
+                squares: List[int] = rng.sample(range(64), 3)
+                if letter == "P" and not 8 <= squares[2] < 56:
+                    continue
+                fen: str = _fen(dict(zip(squares, ("K", "k", letter))), rng.random() < 0.5)
+                game: Game = game_from_fen(fen)
+                # adjacent kings or the side not to move in check
+                if KING_ATTACKS[squares[0]] >> squares[1] & 1 or \
+                        is_in_check(game.board, Colour.BLACK if game.turn() is Colour.WHITE else Colour.WHITE):
+                    continue
+                result: Optional[TablebaseResult] = self.tablebase.probe(game)
+                moves = generate_legal_moves(game)
+                children: List[TablebaseResult] = []
+                for move in moves:
+                    game.make_move(move)
+                    children.append(self.tablebase.probe(game) or TablebaseResult(DRAW, 0))
+                    game.unmake_move()
+                with self.subTest(fen=fen):
+                    losses: List[int] = [child.dtm for child in children if child.wdl == LOSS]
+                    if losses:
+                        self.assertEqual(TablebaseResult(WIN, 1 + min(losses)), result)
+                    elif children and all(child.wdl == WIN for child in children):
+                        self.assertEqual(TablebaseResult(LOSS, 1 + max(child.dtm for child in children)), result)
+                    elif children:
+                        self.assertEqual(DRAW, result.wdl)
+                checked += 1
+
+    def test_best_move(self):
+        game: Game = game_from_fen("k7/8/1K6/8/8/8/8/2Q5 w - - 0 1")
+        self.assertEqual("c1c8", to_uci(self.tablebase.best_move(game)))
+        # played out, the best moves mate in the announced number of plies
+        game = game_from_fen("8/8/8/4k3/8/8/8/4K2R w - - 0 1")
+        plies: int = self.tablebase.probe(game).dtm
+        for _ in range(plies):
+            game.make_move(self.tablebase.best_move(game))
+        self.assertEqual(TablebaseResult(LOSS, 0), self.tablebase.probe(game))
+        self.assertEqual([], generate_legal_moves(game))
+        self.assertIsNone(self.tablebase.best_move(game))
+
+    def test_page_cache(self):
+        with Tablebase(self.directory.name, cache_pages=2) as tablebase:
+            game: Game = game_from_fen("8/8/8/4k3/8/8/8/4K2Q w - - 0 1")
+            tablebase.probe(game)
+            tablebase.probe(game)
+            self.assertEqual((1, 1, 0), (tablebase.hits, tablebase.misses, tablebase.evictions))
+            self.assertEqual(0.5, tablebase.hit_rate)
+            # black to move and the other tables are on other pages
+            tablebase.probe(game_from_fen("8/8/8/4k3/8/8/8/4K2Q b - - 0 1"))
+            tablebase.probe(game_from_fen("8/8/8/4k3/8/8/8/4K2R w - - 0 1"))
+            self.assertEqual((3, 1), (tablebase.misses, tablebase.evictions))
+            tablebase.clear_cache()
+            tablebase.probe(game)
+            self.assertEqual(4, tablebase.misses)
+        self.assertRaises(ValueError, Tablebase, self.directory.name, 0)
+
+    def test_bad_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "KRK.tb"), "wb") as handle:
+                handle.write(b"\0" * (TABLE_SIZE + 16))
+            self.assertRaises(ValueError, Tablebase, directory)
+        self.assertRaises(ValueError, build_tables, self.directory.name, ["KBNK"])
+
+    def test_search(self):
+        # answered at the root with the exact mate distance
+        result: SearchResult = Searcher(tablebase=self.tablebase).search(
+            game_from_fen("8/8/8/4k3/8/8/8/4K2Q w - - 0 1"), SearchLimits(depth=1))
+        self.assertEqual(MATE_SCORE - 13, result.score)
+        self.assertEqual(0, result.nodes)
+
+        # taking the knight leads into a won KQK ending
+        result = Searcher(tablebase=self.tablebase).search(
+            game_from_fen("8/8/8/1n2k3/8/8/8/1Q2K3 w - - 0 1"), SearchLimits(depth=2))
+        self.assertEqual("b1b5", to_uci(result.best_move))
+        self.assertGreater(result.score, MATE_SCORE - 100)
+
+    def test_main(self):
+        output: io.StringIO = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(0, main([self.directory.name, "--probe", "8/8/8/4k3/8/8/8/4K2Q w - - 0 1"]))
+            self.assertEqual(1, main([self.directory.name, "--probe", "8/8/8/4k3/8/8/8/4K3 w - - 0 1"]))
+            with tempfile.TemporaryDirectory() as directory:
+                self.assertEqual(0, main([directory, "--tables", "KQK"]))
+                self.assertEqual(["KQK.tb"], os.listdir(directory))
+        lines: List[str] = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("win dtm 13 best "))
+        self.assertEqual("not in the tablebase", lines[1])
@@ -0,0 +1,79 @@
+from random import Random
+from typing import List
+from unittest import TestCase, skipUnless
+
+from chess.custom_typehints import Colour
+from chess.model.board import Board
+from chess.model.fen import STARTING_FEN, game_from_fen, game_to_fen
+from chess.model.game import Game
+from chess.model.move_generator import generate_legal_moves, generate_move, get_attack_coords
+from chess.model.pieces import King, Rook
+
+try:
+    import numpy
+    from chess.data.tensor import bitboard_array, boards_to_tensor, fens_to_tensor, attack_masks, \
+        destination_masks, mobility
+except ImportError:
+    numpy = None
+
+
+def random_games(count: int, seed: int = 7) -> List[Game]:
+    """Positions from random play, reloaded without castling rights and en passant squares"""
+    rng: Random = Random(seed)
+    games: List[Game] = []
+    for _ in range(count):
+        game: Game = Game()
+        for _ in range(rng.randrange(60)):
+            moves = generate_legal_moves(game)
+            if not moves:
+                break
+            game.make_move(rng.choice(moves))
+        fields = game_to_fen(game).split()
+        fields[2:4] = ["-", "-"]
+        games.append(game_from_fen(" ".join(fields)))
+    return games
+
+
+@skipUnless(numpy, "numpy is not installed")
+class TestTensor(TestCase):
+
+    def test_planes(self):
+        tensor = fens_to_tensor([STARTING_FEN])
+        self.assertEqual((1, 12, 8, 8), tensor.shape)
+        self.assertEqual(32, tensor.sum())
+        # white pawns on the seventh row from the top, the black king on e8
+        self.assertTrue(tensor[0, 0, 6].all())
+        self.assertTrue(tensor[0, 11, 0, 4])
+        self.assertTrue((tensor == boards_to_tensor([Game().board])).all())
+
+        board: Board = Board()
+        board.put_piece((4, 7), King(Colour.WHITE))
+        board.put_piece((0, 0), Rook(Colour.BLACK))
+        planes = boards_to_tensor([board])[0]
+        self.assertTrue(planes[5, 7, 4] and planes[9, 0, 0])
+        self.assertEqual(2, planes.sum())
+
+        with self.assertRaises(ValueError):
+            fens_to_tensor(["8/8/8 w - - 0 1"])
+
+    def test_matches_move_generator(self):
+        games: List[Game] = random_games(40)
+        bitboards = bitboard_array([game.board for game in games])
+        attacked = attack_masks(bitboards)
+        destinations = destination_masks(bitboards)
+        counts = mobility(bitboards)
+        for i, game in enumerate(games):
+            for side, colour in enumerate((Colour.WHITE, Colour.BLACK)):
+                self.assertEqual(game.board.attack_map(side), int(attacked[i, side]))
+                coords = get_attack_coords(game.board, colour)
+                self.assertEqual(sum(1 << (y * 8 + x) for x, y in coords), int(destinations[i, side]))
+                expected: int = sum(len(generate_move(game.board, coord))
+                                    for coord in game.board.get_pieces_by_colour(colour))
+                self.assertEqual(expected, counts[i, side])
+
+    def test_mobility_by_piece_type(self):
+        counts = mobility(bitboard_array([Game().board]), by_piece_type=True)
+        self.assertEqual((1, 2, 6), counts.shape)
+        # sixteen pawn moves and four knight moves for each side
+        self.assertEqual([16, 4, 0, 0, 0, 0], counts[0, 0].tolist())
+        self.assertEqual(counts[0, 0].tolist(), counts[0, 1].tolist())
@@ -0,0 +1,149 @@
+from random import Random
+from unittest import TestCase
+
+from chess.engine.evaluation import evaluate, pawn_structure, king_safety, mobility, PawnHashTable, \
+    PAWN_TABLE, cached_pawn_structure
+from chess.engine.search import Searcher, SearchLimits
+from chess.model.bitboard import BitBoard
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.psqt import score_codes, MAX_PHASE
+from chess.model.zobrist import PIECE_KEYS
+
+
+def mirror_fen(fen: str) -> str:
+    """The same position with the colours swapped and the board flipped vertically"""
+    placement, side, castling, en_passant, *clocks = fen.split(" ")
+    placement = "/".join(reversed(placement.split("/"))).swapcase()
+    castling = "".join(sorted(castling.swapcase())) if castling != "-" else "-"
+    en_passant = en_passant[0] + str(9 - int(en_passant[1])) if en_passant != "-" else "-"
+    return " ".join([placement, "b" if side == "w" else "w", castling, en_passant] + clocks)
+
+
+POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "6k1/5ppp/8/8/3P4/8/5PPP/6K1 b - - 0 1",
+]
+
+
+class TestEvaluation(TestCase):
+
+    def test_start_position_is_balanced(self):
+        self.assertEqual(0, evaluate(Game()))
+
+    def test_incremental_scores_match_full_scan(self):
+        random: Random = Random(3)
+        game: Game = Game()
+        for _ in range(200):
+            moves = generate_legal_moves(game)
+            if not moves or random.random() < 0.2 and game.played_moves():
+                game.unmake_move()
+            else:
+                game.make_move(random.choice(moves))
+            board: BitBoard = game.board
+            self.assertEqual(score_codes(board.codes), (board.midgame_score, board.endgame_score, board.phase))
+
+    def test_pawn_key_tracks_pawns_only(self):
+        random: Random = Random(4)
+        game: Game = Game()
+        for _ in range(200):
+            moves = generate_legal_moves(game)
+            if not moves or random.random() < 0.2 and game.played_moves():
+                game.unmake_move()
+            else:
+                game.make_move(random.choice(moves))
+            key: int = 0
+            for square, code in enumerate(game.board.codes):
+                if code in (0, 6):
+                    key ^= PIECE_KEYS[code][square]
+            self.assertEqual(key, game.board.pawn_key)
+
+        # piece moves leave the pawn key alone
+        knights: Game = game_from_fen(POSITIONS[1])
+        pawn_key: int = knights.board.pawn_key
+        knights.make_move(from_uci("f3g5"))
+        self.assertEqual(pawn_key, knights.board.pawn_key)
+        self.assertNotEqual(pawn_key, game_from_fen(POSITIONS[0]).board.pawn_key)
+
+    def test_pawn_hash_table(self):
+        table: PawnHashTable = PawnHashTable(entries=4)
+        self.assertEqual(4, len(table))
+        self.assertIsNone(table.probe(5))
+        table.store(5, (1, 2))
+        self.assertEqual((1, 2), table.probe(5))
+        # 9 lands in the slot of 5 and replaces it
+        table.store(9, (3, 4))
+        self.assertIsNone(table.probe(5))
+        self.assertEqual((3, 4), table.probe(9))
+        self.assertEqual((2, 2), (table.hits, table.misses))
+        self.assertEqual(0.5, table.hit_rate)
+        table.clear()
+        self.assertEqual((0, 0, 0.0), (table.hits, table.misses, table.hit_rate))
+        self.assertRaises(ValueError, PawnHashTable, 0)
+
+    def test_cached_pawn_structure(self):
+        table: PawnHashTable = PawnHashTable()
+        for fen in POSITIONS:
+            board: BitBoard = game_from_fen(fen).board
+            expected = pawn_structure(board.pieces[0], board.pieces[6])
+            self.assertEqual(expected, cached_pawn_structure(board, table))
+            self.assertEqual(expected, cached_pawn_structure(board, table))
+        self.assertEqual(len(POSITIONS), table.hits)
+
+        # pawns change rarely inside a search, most lookups hit
+        PAWN_TABLE.clear()
+        Searcher().search(game_from_fen(POSITIONS[2]), SearchLimits(nodes=10000))
+        self.assertGreater(PAWN_TABLE.hit_rate, 0.9)
+
+    def test_scores_restored_after_unmake(self):
+        game: Game = game_from_fen(POSITIONS[2])
+        before = (game.board.midgame_score, game.board.endgame_score, game.board.phase)
+        for move in generate_legal_moves(game):
+            game.make_move(move)
+            game.unmake_move()
+            self.assertEqual(before, (game.board.midgame_score, game.board.endgame_score, game.board.phase))
+
+    def test_mirrored_positions_score_the_same(self):
+        for fen in POSITIONS:
+            with self.subTest(fen=fen):
+                self.assertEqual(evaluate(game_from_fen(fen)), evaluate(game_from_fen(mirror_fen(fen))))
+
+    def test_side_to_move_flips_sign(self):
+        white: Game = game_from_fen("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+        black: Game = game_from_fen("4k3/8/8/8/8/8/8/3QK3 b - - 0 1")
+        self.assertGreater(evaluate(white), 800)
+        self.assertEqual(evaluate(white), -evaluate(black))
+
+    def test_phase(self):
+        self.assertEqual(MAX_PHASE, Game().board.phase)
+        self.assertEqual(0, game_from_fen("4k3/pppp4/8/8/8/8/PPPP4/4K3 w - - 0 1").board.phase)
+
+    def test_pawn_structure(self):
+        # doubled and isolated c pawns for white, nothing wrong with black's
+        weak: Game = game_from_fen("4k3/pp6/8/8/8/2P5/2P5/4K3 w - - 0 1")
+        midgame, endgame = pawn_structure(weak.board.pieces[0], weak.board.pieces[6])
+        self.assertLess(midgame, 0)
+        self.assertLess(endgame, 0)
+
+        # a passed pawn is worth more the further it has gone
+        far: Game = game_from_fen("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        near: Game = game_from_fen("4k3/8/8/8/8/8/1P6/4K3 w - - 0 1")
+        self.assertGreater(pawn_structure(far.board.pieces[0], 0)[1], pawn_structure(near.board.pieces[0], 0)[1])
+
+    def test_king_safety(self):
+        sheltered: Game = game_from_fen("6k1/8/8/8/8/8/5PPP/6K1 w - - 0 1")
+        exposed: Game = game_from_fen("6k1/8/8/8/5PPP/8/8/6K1 w - - 0 1")
+        self.assertGreater(king_safety(sheltered.board), king_safety(exposed.board))
+
+        attacked: Game = game_from_fen("6k1/8/8/8/8/5nq1/5PPP/6K1 w - - 0 1")
+        self.assertLess(king_safety(attacked.board), king_safety(sheltered.board))
+
+    def test_mobility(self):
+        free: Game = game_from_fen("4k3/8/8/8/3N4/8/8/4K3 w - - 0 1")
+        cornered: Game = game_from_fen("4k3/8/8/8/8/8/8/N3K3 w - - 0 1")
+        self.assertGreater(mobility(free.board)[0], mobility(cornered.board)[0])
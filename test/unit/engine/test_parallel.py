@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from chess.engine.parallel import ParallelSearcher, measure_scaling
+from chess.engine.search import SearchLimits, SearchResult, MATE_SCORE
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import to_uci
+from chess.model.move_generator import generate_legal_moves
+
+
+class TestParallelSearch(TestCase):
+
+    def test_search_with_shared_table(self):
+        with ParallelSearcher(workers=2, hash_mb=1) as searcher:
+            game: Game = Game()
+            result: SearchResult = searcher.search(game, SearchLimits(depth=3))
+            self.assertIn(result.best_move, generate_legal_moves(game))
+            self.assertGreaterEqual(result.depth, 3)
+
+            game = game_from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+            result = searcher.search(game, SearchLimits(depth=3))
+            self.assertEqual("a1a8", to_uci(result.best_move))
+            self.assertEqual(MATE_SCORE - 1, result.score)
+
+    def test_stop_before_search(self):
+        with ParallelSearcher(workers=2, hash_mb=1) as searcher:
+            searcher.clear_stop()
+            searcher.stop()
+            # without limits the search only ends because the stop is kept
+            result: SearchResult = searcher.search(Game(), clear_stop=False)
+            self.assertIn(result.best_move, generate_legal_moves(Game()))
+
+    def test_measure_scaling(self):
+        rows = measure_scaling(Game(), 2, [1, 2], hash_mb=1)
+        self.assertListEqual([1, 2], [row[0] for row in rows])
+        self.assertEqual(1.0, rows[0][3])
+        self.assertTrue(all(row[2] > 0 for row in rows))
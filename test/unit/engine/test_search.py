@@ -0,0 +1,74 @@
+import time
+from unittest import TestCase
+
+from chess.engine.search import Searcher, SearchLimits, SearchResult, MATE_SCORE, time_for_move, \
+    material_evaluation
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import to_uci, from_uci, to_coords
+
+
+class TestSearch(TestCase):
+
+    def test_finds_mate_in_one(self):
+        game: Game = game_from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        result: SearchResult = Searcher().search(game, SearchLimits(depth=3))
+        self.assertEqual("a1a8", to_uci(result.best_move))
+        self.assertEqual(MATE_SCORE - 1, result.score)
+
+    def test_finds_mate_in_two(self):
+        game: Game = game_from_fen("k7/8/2K5/8/8/8/8/7R w - - 0 1")
+        result: SearchResult = Searcher().search(game, SearchLimits(depth=4))
+        self.assertEqual(MATE_SCORE - 3, result.score)
+        self.assertEqual(3, len(result.pv))
+
+    def test_wins_hanging_queen(self):
+        game: Game = game_from_fen("4k3/8/8/3q4/8/8/8/3RK3 w - - 0 1")
+        result: SearchResult = Searcher().search(game, SearchLimits(depth=2))
+        self.assertEqual("d1d5", to_uci(result.best_move))
+        self.assertGreater(result.score, 400)
+
+    def test_pv_is_playable(self):
+        game: Game = Game()
+        result: SearchResult = Searcher().search(game, SearchLimits(depth=3))
+        self.assertEqual(result.best_move, result.pv[0])
+        for move in result.pv:
+            game.move(*to_coords(move))
+        self.assertEqual(len(result.pv) + 1, game.turn_number)
+
+    def test_node_and_time_limits(self):
+        searcher: Searcher = Searcher()
+        result: SearchResult = searcher.search(Game(), SearchLimits(nodes=500))
+        self.assertLess(searcher.nodes, 1500)
+        self.assertNotEqual(0, result.best_move)
+
+        start: float = time.perf_counter()
+        result = searcher.search(Game(), SearchLimits(soft_time=0.05, hard_time=0.2))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertGreaterEqual(result.depth, 1)
+
+    def test_single_reply_and_terminal_positions(self):
+        # checked king with one escape
+        game: Game = game_from_fen("k7/8/8/8/8/8/1r6/K7 w - - 0 1")
+        result: SearchResult = Searcher().search(game, SearchLimits(depth=5))
+        self.assertEqual("a1b2", to_uci(result.best_move))
+
+        # stalemate has no move to return
+        game = game_from_fen("k7/8/1Q6/8/8/8/8/K7 b - - 0 1")
+        result = Searcher().search(game, SearchLimits(depth=2))
+        self.assertEqual(0, result.best_move)
+        self.assertEqual(0, result.score)
+
+    def test_repetition_is_a_draw(self):
+        game: Game = Game()
+        for move in ["g1f3", "g8f6", "f3g1", "f6g8", "g1f3", "g8f6", "f3g1"]:
+            game.make_move(from_uci(move))
+        self.assertEqual(1, game.repetitions())
+        game.make_move(from_uci("f6g8"))
+        self.assertEqual(2, game.repetitions())
+
+    def test_helpers(self):
+        self.assertEqual(0, material_evaluation(Game()))
+        soft, hard = time_for_move(60, 1)
+        self.assertLess(soft, hard)
+        self.assertLessEqual(hard, 30)
@@ -0,0 +1,114 @@
+import math
+import os
+import tempfile
+from unittest import TestCase
+
+from chess.engine.tournament import EngineConfig, GameRecord, MatchResult, Sprt, adjudicate, elo_from_score, \
+    insufficient_material, load_openings, play_game, run_match
+from chess.model.fen import game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+
+MATE_IN_ONE: str = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+class TestTournament(TestCase):
+
+    def test_engine_config(self):
+        config: EngineConfig = EngineConfig.parse("name=old,depth=3,evaluation=material,hash_mb=1")
+        self.assertEqual(EngineConfig("old", "material", depth=3, hash_mb=1), config)
+        self.assertEqual(3, config.limits().depth)
+        self.assertRaises(ValueError, EngineConfig.parse, "depth=3,colour=red")
+        self.assertRaises(ValueError, EngineConfig.parse, "depth=3,evaluation=magic")
+        # a configuration without any limit would search forever
+        self.assertRaises(ValueError, EngineConfig.parse, "name=slow")
+
+    def test_insufficient_material(self):
+        for fen, expected in (("8/8/4k3/8/8/3K4/8/8 w - - 0 1", True),
+                              ("8/8/4k3/8/8/3KN3/8/8 w - - 0 1", True),
+                              ("8/8/4kb2/8/8/3KB3/8/8 w - - 0 1", True),
+                              ("8/8/4k1b1/8/8/3KB3/8/8 w - - 0 1", False),
+                              ("8/8/4kn2/8/8/3KN3/8/8 w - - 0 1", False),
+                              ("8/8/4k3/8/8/3KP3/8/8 w - - 0 1", False)):
+            with self.subTest(fen=fen):
+                self.assertEqual(expected, insufficient_material(game_from_fen(fen).board))
+
+    def test_adjudicate(self):
+        self.assertIsNone(adjudicate(Game(), 400))
+        self.assertEqual((0.5, "fifty-move rule"), adjudicate(game_from_fen("8/8/4k3/8/8/3KR3/8/8 w - - 100 80"), 400))
+        self.assertEqual((0.5, "insufficient material"), adjudicate(game_from_fen("8/8/4k3/8/8/3K4/8/8 w - - 0 1"), 400))
+
+        game: Game = Game()
+        for move in ("g1f3", "g8f6", "f3g1", "f6g8") * 2:
+            game.make_move(from_uci(move))
+        self.assertEqual((0.5, "threefold repetition"), adjudicate(game, 400))
+        self.assertEqual((0.5, "move limit"), adjudicate(game_from_fen(MATE_IN_ONE), 0))
+
+    def test_play_game(self):
+        engine: EngineConfig = EngineConfig(depth=2, hash_mb=1)
+        record: GameRecord = play_game(0, MATE_IN_ONE, engine, engine, True)
+        self.assertEqual((1.0, "checkmate", ["a1a8"]), (record.white_score, record.reason, record.moves))
+        self.assertEqual(1.0, record.first_score)
+        self.assertEqual(0.0, play_game(0, MATE_IN_ONE, engine, engine, False).first_score)
+
+        # an opening that is already mate
+        record = play_game(0, "R5k1/5ppp/8/8/8/8/8/6K1 b - - 1 1", engine, engine, False)
+        self.assertEqual((1.0, "checkmate", 1.0), (record.white_score, record.reason, 1 - record.first_score))
+
+        record = play_game(0, "4k3/8/8/8/8/8/PPPPPPPP/RNBQKBNR w KQ - 0 1", engine, engine, True, max_plies=4)
+        self.assertEqual((0.5, "move limit", 4), (record.white_score, record.reason, len(record.moves)))
+
+    def test_elo(self):
+        result: MatchResult = MatchResult(wins=30, draws=40, losses=30)
+        elo, margin = result.elo()
+        self.assertAlmostEqual(0, elo)
+        self.assertGreater(margin, 0)
+        self.assertAlmostEqual(-elo_from_score(0.75), elo_from_score(0.25))
+        self.assertAlmostEqual(191, elo_from_score(0.75), places=0)
+
+        # more games, tighter error bars
+        self.assertLess(MatchResult(wins=300, draws=400, losses=300).elo()[1], margin)
+        self.assertEqual(math.inf, MatchResult().elo()[1])
+
+    def test_sprt(self):
+        sprt: Sprt = Sprt(elo0=0, elo1=10)
+        self.assertLess(sprt.lower_bound, 0)
+        self.assertGreater(sprt.upper_bound, 0)
+        strong: MatchResult = MatchResult(wins=700, draws=600, losses=500)
+        weak: MatchResult = MatchResult(wins=500, draws=600, losses=700)
+        self.assertGreater(strong.llr(sprt), sprt.upper_bound)
+        self.assertLess(weak.llr(sprt), sprt.lower_bound)
+        self.assertEqual(0, MatchResult().llr(sprt))
+
+    def test_run_match(self):
+        first: EngineConfig = EngineConfig("first", depth=1, hash_mb=1)
+        second: EngineConfig = EngineConfig("second", "material", depth=1, hash_mb=1)
+        records = []
+        result: MatchResult = run_match(first, second, [MATE_IN_ONE], games=4, workers=1, max_plies=6,
+                                        progress=lambda running, record: records.append(record))
+        self.assertEqual(4, result.games)
+        # both configurations mate in one with white
+        self.assertEqual((2, 0, 2), (result.wins, result.draws, result.losses))
+        self.assertEqual({"checkmate": 4}, result.reasons)
+        # each opening is played with both colours
+        self.assertEqual(2, sum(record.first_is_white for record in records))
+
+        # a decided SPRT stops the match before all games are played
+        sprt: Sprt = Sprt(elo0=0, elo1=5, alpha=0.5, beta=0.5)
+        llrs = []
+        stopped: MatchResult = run_match(first, second, [MATE_IN_ONE], games=1000, workers=2, sprt=sprt,
+                                         progress=lambda running, record: llrs.append(running.llr(sprt)))
+        self.assertIsNotNone(stopped.decision)
+        self.assertLess(stopped.games, 1000)
+        # games that finish after the decision are left out
+        self.assertEqual(len(llrs), stopped.games)
+        self.assertEqual(llrs[-1], stopped.llr(sprt))
+        self.assertTrue(all(sprt.lower_bound < llr < sprt.upper_bound for llr in llrs[:-1]))
+
+    def test_load_openings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "book.epd")
+            with open(path, "w") as file:
+                file.write(f"# a comment\n\n{MATE_IN_ONE}\n")
+            self.assertEqual([MATE_IN_ONE], load_openings(path))
+        self.assertRaises(ValueError, run_match, EngineConfig(depth=1), EngineConfig(depth=1), [])
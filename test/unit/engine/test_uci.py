@@ -0,0 +1,162 @@
+import io
+import os
+import tempfile
+import time
+from typing import List
+from unittest import TestCase, mock
+
+from chess.data.book import build_book
+from chess.data.tablebase import build_tables
+from chess.engine.search import MATE_SCORE, SearchLimits
+from chess.engine.uci import UciEngine, format_score, main
+from chess.model.fen import game_to_fen
+from chess.model.pgn import PgnGame
+
+
+class TestUci(TestCase):
+
+    def setUp(self):
+        self.output: io.StringIO = io.StringIO()
+        self.engine: UciEngine = UciEngine(output=self.output)
+
+    def tearDown(self):
+        self.engine.handle("quit")
+
+    def lines(self) -> List[str]:
+        return self.output.getvalue().splitlines()
+
+    def test_handshake(self):
+        self.engine.handle("uci")
+        self.engine.handle("isready")
+        lines: List[str] = self.lines()
+        self.assertTrue(lines[0].startswith("id name"))
+        self.assertIn("option name Hash type spin default 16 min 1 max 4096", lines)
+        self.assertEqual(["uciok", "readyok"], lines[-2:])
+
+    def test_position(self):
+        self.engine.handle("position startpos moves e2e4 e7e5 g1f3")
+        self.assertEqual("rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2",
+                         game_to_fen(self.engine.game))
+
+        fen: str = "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"
+        self.engine.handle(f"position fen {fen}")
+        self.assertEqual(fen, game_to_fen(self.engine.game))
+        self.engine.handle(f"position fen {fen} moves e2e4 e8d8")
+        self.assertEqual("3k4/8/8/8/4P3/8/8/4K3 w - - 1 2", game_to_fen(self.engine.game))
+
+        # moves after an illegal one are ignored
+        self.engine.handle("position startpos moves e2e4 e2e4 d2d4")
+        self.assertEqual(["info string illegal move e2e4"], self.lines())
+        self.assertEqual("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1", game_to_fen(self.engine.game))
+
+    def test_go_depth(self):
+        self.engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.engine.handle("go depth 3")
+        self.engine.wait()
+        lines: List[str] = self.lines()
+        self.assertEqual("bestmove a1a8", lines[-1])
+        self.assertTrue(any(" score mate 1 " in line for line in lines))
+
+    def test_stop_is_answered_at_once(self):
+        self.engine.handle("position startpos")
+        self.engine.handle("go infinite")
+        time.sleep(0.2)
+        # isready is answered while the search runs
+        self.engine.handle("isready")
+        self.assertIn("readyok", self.lines())
+        start: float = time.perf_counter()
+        self.engine.handle("stop")
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(self.lines()[-1].startswith("bestmove "))
+
+    def test_options(self):
+        self.engine.handle("setoption name Hash value 1")
+        self.assertEqual(1, self.engine.hash_mb)
+        self.assertLessEqual(self.engine.table.size_bytes, 1 << 20)
+        self.engine.handle("setoption name Threads value 2")
+        self.assertEqual(2, self.engine.threads)
+        self.engine.handle("setoption name Threads value many")
+        self.engine.handle("setoption name Ponder value true")
+        self.assertEqual(["info string invalid value 'many' for option threads",
+                          "info string unknown option ponder"], self.lines())
+
+    def test_book_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "book.bin")
+            build_book([PgnGame(moves=["d4"], result="1-0")], path)
+            self.engine.handle(f"setoption name BookFile value {path}")
+            self.engine.handle("position startpos")
+            self.engine.handle("go depth 5")
+            self.engine.wait()
+            self.assertEqual(["info string book move", "bestmove d2d4"], self.lines())
+            self.engine.handle("setoption name BookFile value <empty>")
+            self.assertIsNone(self.engine.book)
+            self.engine.handle(f"setoption name BookFile value {path}.missing")
+            self.assertEqual(f"info string invalid value '{path}.missing' for option bookfile", self.lines()[-1])
+
+    def test_tablebase_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            build_tables(directory, ["KQK"])
+            self.engine.handle(f"setoption name TablebasePath value {directory}")
+            self.engine.handle("setoption name Threads value 2")
+            self.engine.handle("position fen 8/8/8/4k3/8/8/8/4K2Q w - - 0 1")
+            self.engine.handle("go depth 5")
+            self.engine.wait()
+            lines: List[str] = self.lines()
+            self.assertEqual("info string tablebase move", lines[0])
+            self.assertIn("score mate 7", lines[1])
+            self.assertTrue(lines[2].startswith("bestmove h1"))
+            self.engine.handle("setoption name TablebasePath value <empty>")
+            self.assertIsNone(self.engine.tablebase)
+            self.engine.handle(f"setoption name TablebasePath value {directory}/missing")
+            self.assertEqual(f"info string invalid value '{directory}/missing' for option tablebasepath",
+                             self.lines()[-1])
+
+    def test_threads_search_in_parallel(self):
+        self.engine.handle("setoption name Threads value 2")
+        self.engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.engine.handle("go depth 3")
+        self.engine.wait()
+        self.assertEqual("bestmove a1a8", self.lines()[-1])
+
+    def test_parallel_stop_right_after_go(self):
+        self.engine.handle("setoption name Threads value 2")
+        self.engine.handle("position startpos")
+        # a stop sent before the search thread got going ends the search too
+        self.engine.handle("go infinite")
+        self.engine.handle("stop")
+        self.assertTrue(self.lines()[-1].startswith("bestmove "))
+        self.assertIsNone(self.engine._thread)
+
+    def test_limits(self):
+        self.assertEqual(SearchLimits(depth=4), self.engine.limits(["depth", "4"]))
+        self.assertEqual(SearchLimits(soft_time=0.5, hard_time=0.5), self.engine.limits(["movetime", "500"]))
+        self.assertEqual(SearchLimits(), self.engine.limits(["infinite"]))
+
+        # white's clock is used with white to move
+        limits: SearchLimits = self.engine.limits(["wtime", "60000", "btime", "1000", "winc", "1000"])
+        self.assertGreater(limits.soft_time, 1)
+        self.assertLess(limits.soft_time, limits.hard_time)
+
+    def test_format_score(self):
+        self.assertEqual("cp -35", format_score(-35))
+        self.assertEqual("mate 1", format_score(MATE_SCORE - 1))
+        self.assertEqual("mate 2", format_score(MATE_SCORE - 3))
+        self.assertEqual("mate -1", format_score(-MATE_SCORE + 2))
+        self.assertEqual("mate -1", format_score(-MATE_SCORE + 1))
+        self.assertEqual("mate 0", format_score(-MATE_SCORE))
+
+    def test_checkmated_at_root(self):
+        self.engine.handle("position fen k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")
+        self.engine.handle("go depth 3")
+        self.engine.wait()
+        lines: List[str] = self.lines()
+        self.assertIn("score mate 0 ", lines[-2])
+        self.assertEqual("bestmove 0000", lines[-1])
+
+    def test_main_finishes_bounded_search(self):
+        commands = io.StringIO("position startpos\ngo depth 1\n")
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            self.assertEqual(0, main([], commands))
+        self.assertTrue(output.getvalue().splitlines()[-1].startswith("bestmove "))
@@ -0,0 +1,49 @@
+from random import Random
+from unittest import TestCase
+
+from chess.custom_typehints import Bitboard
+from chess.model.attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, \
+    rook_attacks, bishop_attacks, queen_attacks
+from chess.model.bitboard import to_square, popcount, WHITE, BLACK
+
+
+def _slide(square: int, occupied: Bitboard, directions) -> Bitboard:
+    x, y = square % 8, square // 8
+    attacks: Bitboard = 0
+    for dx, dy in directions:
+        i, j = x + dx, y + dy
+        while 0 <= i < 8 and 0 <= j < 8:
+            attacks |= 1 << (j * 8 + i)
+            if occupied >> (j * 8 + i) & 1:
+                break
+            i, j = i + dx, j + dy
+    return attacks
+
+
+class TestAttacks(TestCase):
+
+    def test_step_tables(self):
+        self.assertEqual(2, popcount(KNIGHT_ATTACKS[to_square((0, 0))]))
+        self.assertEqual(8, popcount(KNIGHT_ATTACKS[to_square((4, 4))]))
+        self.assertEqual(3, popcount(KING_ATTACKS[to_square((7, 7))]))
+        self.assertEqual(8, popcount(KING_ATTACKS[to_square((3, 3))]))
+
+        # white pawns attack towards row 0, black pawns towards row 7
+        self.assertEqual(1 << to_square((0, 5)) | 1 << to_square((2, 5)), PAWN_ATTACKS[WHITE][to_square((1, 6))])
+        self.assertEqual(1 << to_square((6, 2)), PAWN_ATTACKS[BLACK][to_square((7, 1))])
+
+    def test_sliding_attacks_empty_board(self):
+        for square in range(64):
+            self.assertEqual(14, popcount(rook_attacks(square, 0)))
+        self.assertEqual(7, popcount(bishop_attacks(to_square((0, 0)), 0)))
+        self.assertEqual(27, popcount(queen_attacks(to_square((3, 3)), 0)))
+
+    def test_sliding_attacks_match_ray_walk(self):
+        random: Random = Random(0)
+        rook_dirs = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        bishop_dirs = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+        for _ in range(500):
+            occupied: Bitboard = random.getrandbits(64) & random.getrandbits(64)
+            square: int = random.randrange(64)
+            self.assertEqual(_slide(square, occupied, rook_dirs), rook_attacks(square, occupied))
+            self.assertEqual(_slide(square, occupied, bishop_dirs), bishop_attacks(square, occupied))
@@ -0,0 +1,135 @@
+from random import Random
+from unittest import TestCase
+
+from chess.custom_typehints import Coord2D, Colour
+from chess.model.bitboard import BitBoard, to_square, to_coord, iter_squares, KING, PAWN, BLACK, WHITE
+from chess.model.game import Game
+from chess.model.pieces import Pawn, Rook, Knight, Bishop, Queen, King
+
+
+class TestBitBoard(TestCase):
+
+    def test_square_conversion(self):
+        for y in range(8):
+            for x in range(8):
+                self.assertTupleEqual((x, y), to_coord(to_square((x, y))))
+        self.assertEqual(0, to_square((0, 0)))
+        self.assertEqual(63, to_square((7, 7)))
+        self.assertListEqual([0, 3, 63], list(iter_squares(1 | 1 << 3 | 1 << 63)))
+
+    def test_put_piece(self):
+        board: BitBoard = BitBoard()
+        pawn: Pawn = Pawn(Colour.WHITE)
+        board.put_piece((3, 6), pawn)
+
+        self.assertIs(pawn, board[6][3].piece)
+        self.assertEqual(1 << to_square((3, 6)), board.pieces[PAWN + 6 * WHITE])
+        self.assertEqual(board.occupied, board.occupancy[WHITE])
+        self.assertEqual(0, board.occupancy[BLACK])
+
+        # replacing a piece clears the old bitboard
+        board.put_piece((3, 6), Rook(Colour.BLACK))
+        self.assertEqual(0, board.pieces[PAWN + 6 * WHITE])
+        self.assertEqual(board.occupied, board.occupancy[BLACK])
+
+    def test_move_and_remove_piece(self):
+        board: BitBoard = BitBoard()
+        board.put_piece((0, 0), Rook(Colour.BLACK))
+        board.put_piece((0, 7), Rook(Colour.WHITE))
+
+        # capture
+        board.move_piece((0, 7), (0, 0))
+        self.assertIsNone(board[7][0].piece)
+        self.assertIs(Colour.WHITE, board[0][0].colour())
+        self.assertEqual(1, bin(board.occupied).count("1"))
+        self.assertEqual(0, board.occupancy[BLACK])
+
+        board.remove_piece_at((0, 0))
+        self.assertEqual(0, board.occupied)
+        self.assertTrue(all(bitboard == 0 for bitboard in board.pieces))
+
+    def test_get_king_location(self):
+        game: Game = Game()
+        board = game.board
+        self.assertIsInstance(board, BitBoard)
+
+        self.assertTupleEqual((4, 0), board.get_king_location(Colour.BLACK))
+        self.assertTupleEqual((4, 7), board.get_king_location(Colour.WHITE))
+        self.assertEqual(1 << to_square((4, 0)), board.pieces[KING + 6 * BLACK])
+
+        board.clear()
+        self.assertIsNone(board.get_king_location(Colour.WHITE))
+
+    def test_get_pieces_by_colour(self):
+        game: Game = Game()
+        board = game.board
+
+        expected: set = {(x, y) for x in range(8) for y in (6, 7)}
+        self.assertSetEqual(expected, board.get_pieces_by_colour(Colour.WHITE))
+
+        expected.discard((4, 7))
+        self.assertSetEqual(expected, board.get_pieces_by_colour(Colour.WHITE, exclude_type=[King]))
+
+        pawns: set = {(x, 1) for x in range(8)}
+        self.assertSetEqual(pawns, board.get_pieces_by_colour(Colour.BLACK,
+                                                              exclude_type=[Rook, Knight, Bishop, Queen, King]))
+        self.assertSetEqual(pawns, board.get_pieces(Colour.BLACK, Pawn))
+        self.assertSetEqual({(1, 7), (6, 7)}, board.get_pieces(Colour.WHITE, Knight))
+
+    def test_rows_are_indexable(self):
+        board: BitBoard = BitBoard()
+        king_loc: Coord2D = (4, 0)
+        board.put_piece(king_loc, King(Colour.BLACK))
+        self.assertEqual(8, len(board))
+        self.assertEqual(8, len(list(board)))
+        self.assertIs(board[0][4].piece, board[-8][-4].piece)
+        self.assertRaises(IndexError, board.__getitem__, 8)
+
+    def test_attack_maps_follow_changes(self):
+        # after any sequence of placements, moves and removals the stored
+        # attacks must match a board built from scratch with the same pieces
+        random: Random = Random(2)
+        piece_types = [Pawn, Rook, Knight, Bishop, Queen, King]
+        board: BitBoard = BitBoard()
+        for _ in range(300):
+            coord: Coord2D = (random.randrange(8), random.randrange(8))
+            action: int = random.randrange(3)
+            if action == 0:
+                board.put_piece(coord, random.choice(piece_types)(random.choice([Colour.WHITE, Colour.BLACK])))
+            elif action == 1:
+                board.move_piece(coord, (random.randrange(8), random.randrange(8)))
+            else:
+                board.remove_piece_at(coord)
+
+            fresh: BitBoard = BitBoard()
+            for square in iter_squares(board.occupied):
+                fresh.put_piece(to_coord(square), board.squares[square])
+            self.assertListEqual(fresh.attacks_from, board.attacks_from)
+            self.assertEqual(fresh.attack_map(Colour.WHITE), board.attack_map(Colour.WHITE))
+            self.assertEqual(fresh.attack_map(Colour.BLACK), board.attack_map(Colour.BLACK))
+
+    def test_is_attacked(self):
+        board: BitBoard = BitBoard()
+        board.put_piece((0, 0), Rook(Colour.BLACK))
+        self.assertTrue(board.is_attacked(to_square((0, 7)), Colour.BLACK))
+        self.assertFalse(board.is_attacked(to_square((0, 7)), Colour.WHITE))
+
+        # blocking the file hides the far end, removing the blocker reveals it
+        board.put_piece((0, 4), Pawn(Colour.WHITE))
+        self.assertFalse(board.is_attacked(to_square((0, 7)), Colour.BLACK))
+        self.assertTrue(board.is_attacked(to_square((0, 4)), Colour.BLACK))
+        board.remove_piece_at((0, 4))
+        self.assertTrue(board.is_attacked(to_square((0, 7)), Colour.BLACK))
+
+    def test_moved_flags(self):
+        board: BitBoard = BitBoard()
+        board.put_piece((4, 7), King(Colour.WHITE))
+        board.put_piece((0, 4), Pawn(Colour.WHITE), has_moved=True)
+        self.assertFalse(board.has_moved((4, 7)))
+        self.assertTrue(board.has_moved((0, 4)))
+
+        board.move_piece((4, 7), (4, 6))
+        self.assertTrue(board.has_moved((4, 6)))
+        self.assertEqual(0, board.unmoved)
+        # boards do not carry a __dict__ either
+        self.assertFalse(hasattr(board, "__dict__"))
@@ -1,8 +1,10 @@
+from random import Random
 from unittest import TestCase
 
 from chess.custom_typehints import Coord2D, Colour
 from chess.model.game import Game
 from chess.model.board import Board
+from chess.model.pieces import King, Pawn, Knight, Bishop, Rook, Queen
 
 
 class TestBoard(TestCase):
@@ -40,3 +42,46 @@ class TestBoard(TestCase):
         for row in board:
             for block in row:
                 self.assertIsNone(block.piece)
+
+    def test_moved_flags(self):
+        board: Board = Board()
+        board.put_piece((4, 7), King(Colour.WHITE))
+        board.put_piece((0, 6), Pawn(Colour.WHITE), has_moved=True)
+        self.assertFalse(board.has_moved((4, 7)))
+        self.assertTrue(board.has_moved((0, 6)))
+
+        board.move_piece((4, 7), (4, 6))
+        self.assertTrue(board.has_moved((4, 6)))
+        self.assertFalse(board.has_moved((4, 7)))
+        board.reverse_pieces()
+        self.assertTrue(board.has_moved((4, 1)))
+        board.clear()
+        self.assertFalse(board.has_moved((4, 1)))
+
+    def test_piece_coords_follow_changes(self):
+        def scan(colour, excluded=()):
+            return {(block.x, block.y) for row in board for block in row
+                    if block.colour() is colour and type(block.piece) not in excluded}
+
+        board: Board = Board()
+        random: Random = Random(5)
+        piece_types = [Pawn, Knight, Bishop, Rook, Queen, King]
+        for step in range(300):
+            coord: Coord2D = (random.randrange(8), random.randrange(8))
+            action: int = random.randrange(4)
+            if action == 0:
+                board.put_piece(coord, random.choice(piece_types)(random.choice([Colour.WHITE, Colour.BLACK])))
+            elif action == 1:
+                board.move_piece(coord, (random.randrange(8), random.randrange(8)))
+            elif action == 2:
+                board.remove_piece_at(coord)
+            elif step % 50 == 0:
+                board.reverse_pieces()
+            for colour in (Colour.WHITE, Colour.BLACK):
+                self.assertSetEqual(scan(colour), board.get_pieces_by_colour(colour))
+                self.assertSetEqual(scan(colour, [King]), board.get_pieces_by_colour(colour, exclude_type=[King]))
+                self.assertSetEqual(scan(colour, piece_types[1:]), board.get_pieces(colour, Pawn))
+
+        board.clear()
+        self.assertSetEqual(set(), board.get_pieces_by_colour(Colour.WHITE))
+        self.assertIsNone(board.get_king_location(Colour.WHITE))
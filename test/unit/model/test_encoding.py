@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from chess.model.encoding import POSITION_BYTES, encode_position, decode_position, iter_positions
+from chess.model.fen import STARTING_FEN, game_from_fen, game_to_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.move_generator import generate_legal_moves
+
+FENS = [
+    STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "rnbqkbnr/pppp1ppp/8/8/3Pp3/8/PPP1PPPP/RNBQKBNR b Kq d3 0 3",
+    "8/8/8/8/8/8/8/K6k w - - 99 300",
+]
+
+
+class TestEncoding(TestCase):
+
+    def test_round_trip(self):
+        for fen in FENS:
+            data: bytes = encode_position(game_from_fen(fen))
+            self.assertEqual(POSITION_BYTES, len(data))
+            game: Game = decode_position(data)
+            self.assertEqual(fen, game_to_fen(game))
+            self.assertEqual(game_from_fen(fen).zobrist_key, game.zobrist_key)
+
+    def test_decoded_game_plays_on(self):
+        game: Game = Game()
+        for move in ("e2e4", "d7d5", "e4e5", "f7f5"):
+            game.make_move(from_uci(move))
+        decoded: Game = decode_position(encode_position(game))
+        self.assertEqual(sorted(generate_legal_moves(game)), sorted(generate_legal_moves(decoded)))
+        # castling needs the king and rooks to be unmoved after decoding
+        self.assertIn(from_uci("e5f6"), generate_legal_moves(decoded))
+
+    def test_iter_positions(self):
+        data: bytes = b"".join(encode_position(game_from_fen(fen)) for fen in FENS)
+        self.assertEqual(FENS, [game_to_fen(game) for game in iter_positions(data)])
+        with self.assertRaises(ValueError):
+            list(iter_positions(data[:-1]))
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            decode_position(bytes(31))
+        data: bytearray = bytearray(encode_position(Game()))
+        data[8] = 0xFF
+        with self.assertRaises(ValueError):
+            decode_position(data)
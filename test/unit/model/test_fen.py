@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from chess.model.board import Board
+from chess.model.fen import STARTING_FEN, game_from_fen, game_to_fen, board_to_fen, load_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.pieces import King, Rook
+from chess.custom_typehints import Colour
+
+KIWIPETE: str = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+class TestFen(TestCase):
+
+    def test_round_trip(self):
+        for fen in (STARTING_FEN, KIWIPETE, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 2",
+                    "4k3/8/8/8/8/8/8/4K2R b K - 37 81"):
+            self.assertEqual(fen, game_to_fen(game_from_fen(fen)))
+
+    def test_export_follows_play(self):
+        game: Game = Game()
+        self.assertEqual(STARTING_FEN, game_to_fen(game))
+        game.make_move(from_uci("e2e4"))
+        self.assertEqual("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1", game_to_fen(game))
+        for move in ("c7c5", "g1f3", "d8c7"):
+            game.make_move(from_uci(move))
+        self.assertEqual("rnb1kbnr/ppqppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3", game_to_fen(game))
+
+    def test_legacy_board(self):
+        board: Board = Board()
+        board.put_piece((4, 7), King(Colour.WHITE))
+        board.put_piece((0, 0), Rook(Colour.BLACK))
+        self.assertEqual("r7/8/8/8/8/8/8/4K3", board_to_fen(board))
+
+    def test_malformed(self):
+        for fen in ("", "8/8/8/8 w - -", STARTING_FEN.replace(" w ", " x "),
+                    STARTING_FEN.replace("KQkq", "KQkz"), STARTING_FEN.replace(" 0 1", " zero 1"),
+                    "rnbqkbnr/ppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"):
+            with self.assertRaises(ValueError, msg=fen):
+                game_from_fen(fen)
+
+    def test_state_fields_out_of_range(self):
+        base: str = "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq"
+        self.assertEqual(44, game_from_fen(f"{base} e3 0 3").en_passant)
+        for fields in ("e9 0 3", "e4 0 3", "e6 0 3", "i3 0 3", "e33 0 3", "- -1 3", "- 0 0", "- 0 -2"):
+            with self.assertRaises(ValueError, msg=fields):
+                game_from_fen(f"{base} {fields}")
+        with self.assertRaises(ValueError):
+            game_from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d3 0 1")
+        # no enemy pawn behind the square, or the square or the pawn's start square taken
+        for fen in ("4k3/8/8/3PN3/8/8/8/4K3 w - e6 0 1", "4k3/4n3/8/3Pp3/8/8/8/4K3 w - e6 0 1",
+                    "4k3/8/4n3/3Pp3/8/8/8/4K3 w - e6 0 1"):
+            with self.assertRaises(ValueError, msg=fen):
+                game_from_fen(fen)
+            with self.assertRaises(ValueError, msg=fen):
+                load_fen(Game(), fen)
+        self.assertEqual(20, game_from_fen("4k3/8/8/3Pp3/8/8/8/4K3 w - e6 0 1").en_passant)
+
+    def test_load_reuses_game(self):
+        game: Game = Game()
+        board = game.board
+        game.make_move(from_uci("e2e4"))
+        for fen in (KIWIPETE, "4k3/8/8/8/8/8/8/4K2R b K - 37 81", STARTING_FEN):
+            self.assertIs(game, load_fen(game, fen))
+            self.assertIs(board, game.board)
+            self.assertEqual(fen, game_to_fen(game))
+            self.assertEqual(game_from_fen(fen).zobrist_key, game.zobrist_key)
+            self.assertEqual([], game.played_moves())
+
+        # a malformed record leaves the game as it was
+        self.assertRaises(ValueError, load_fen, game, "8/8/8/8 w - -")
+        self.assertEqual(STARTING_FEN, game_to_fen(game))
@@ -1,8 +1,12 @@
 from unittest import TestCase
 
-from chess.custom_typehints import Colour
+from chess.constants import BLACK_KINGSIDE, BLACK_QUEENSIDE
+from chess.custom_typehints import Colour, GameStatus
+from chess.model.bitboard import BitBoard, to_square
 from chess.model.board import Board
 from chess.model.game import Game
+from chess.model.move import to_move
+from chess.model.pieces import Pawn, Knight, Bishop, Rook, Queen, King
 
 
 class TestGame(TestCase):
@@ -20,3 +24,105 @@ class TestGame(TestCase):
         self.assertIs(Colour.BLACK, game.turn())
         self.assertTupleEqual(((0, 6), (0, 5)), game.moves_made[0])
         self.assertEqual(2, game.turn_number)
+
+    def _snapshot(self, game: Game) -> tuple:
+        board = game.board
+        return (list(board.pieces), list(board.squares), list(board.attacks_from),
+                board.unmoved,
+                game.castling_rights, game.en_passant, game.halfmove_clock, game.status,
+                game.turn(), game.turn_number, list(game.moves_made))
+
+    def test_make_unmake_restores_position(self):
+        game: Game = Game()
+        before: tuple = self._snapshot(game)
+        moves = [((4, 6), (4, 4)), ((3, 1), (3, 3)), ((4, 4), (3, 3)), ((3, 0), (3, 3))]
+        snapshots = []
+        for from_coord, to_coord in moves:
+            snapshots.append(self._snapshot(game))
+            game.make_move(to_move(from_coord, to_coord))
+
+        self.assertIsInstance(game.board[3][3].piece, Queen)
+        self.assertEqual(0, game.halfmove_clock)
+        for snapshot in reversed(snapshots):
+            game.unmake_move()
+            self.assertEqual(snapshot, self._snapshot(game))
+        self.assertEqual(before, self._snapshot(game))
+
+    def test_make_move_castling(self):
+        game: Game = Game()
+        for coord in [(5, 7), (6, 7), (1, 0), (2, 0), (3, 0)]:
+            game.board.remove_piece_at(coord)
+        before: tuple = self._snapshot(game)
+
+        game.make_move(to_move((4, 7), (6, 7)))
+        self.assertIsInstance(game.board[7][5].piece, Rook)
+        self.assertIsNone(game.board[7][7].piece)
+        self.assertEqual(BLACK_KINGSIDE | BLACK_QUEENSIDE, game.castling_rights)
+
+        game.make_move(to_move((4, 0), (2, 0)))
+        self.assertIsInstance(game.board[0][3].piece, Rook)
+        self.assertIsNone(game.board[0][0].piece)
+        self.assertEqual(0, game.castling_rights)
+
+        game.unmake_move()
+        game.unmake_move()
+        self.assertEqual(before, self._snapshot(game))
+        self.assertFalse(game.board.has_moved((7, 7)))
+
+    def test_make_move_en_passant_and_promotion(self):
+        board: BitBoard = BitBoard()
+        board.put_piece((4, 7), King(Colour.WHITE))
+        board.put_piece((4, 0), King(Colour.BLACK))
+        board.put_piece((1, 3), Pawn(Colour.WHITE), has_moved=True)
+        board.put_piece((2, 1), Pawn(Colour.BLACK))
+        board.put_piece((7, 1), Pawn(Colour.WHITE), has_moved=True)
+        board.put_piece((6, 0), Knight(Colour.BLACK))
+        game: Game = Game(board=board, is_white_turn=False)
+        before: tuple = self._snapshot(game)
+
+        game.make_move(to_move((2, 1), (2, 3)))
+        self.assertEqual(to_square((2, 2)), game.en_passant)
+        game.make_move(to_move((1, 3), (2, 2)))
+        self.assertIsNone(game.board[3][2].piece)
+        self.assertIsNone(game.en_passant)
+        game.make_move(to_move((6, 0), (5, 2)))
+        game.make_move(to_move((7, 1), (7, 0), Rook))
+        self.assertIsInstance(game.board[0][7].piece, Rook)
+
+        for _ in range(4):
+            game.unmake_move()
+        self.assertEqual(before, self._snapshot(game))
+        self.assertIsInstance(game.board[1][7].piece, Pawn)
+
+    def test_move_castles_rook(self):
+        game: Game = Game()
+        for coord in [(5, 7), (6, 7)]:
+            game.board.remove_piece_at(coord)
+        game.move((4, 7), (6, 7))
+        self.assertIsInstance(game.board[7][6].piece, King)
+        self.assertIsInstance(game.board[7][5].piece, Rook)
+        self.assertIs(Colour.BLACK, game.turn())
+
+    def test_checkmate_status(self):
+        game: Game = Game()
+        for from_coord, to_coord in [((5, 6), (5, 5)), ((4, 1), (4, 3)), ((6, 6), (6, 4))]:
+            game.move(from_coord, to_coord)
+            self.assertIs(GameStatus.NORMAL, game.status)
+        game.move((3, 0), (7, 4))
+        self.assertIs(GameStatus.BLACK_WIN, game.status)
+
+    def test_illegal_move_is_rejected(self):
+        # the d2 pawn cannot leave the diagonal it is pinned on
+        game: Game = Game()
+        game.board.put_piece((0, 3), Bishop(Colour.BLACK))
+        game.move((3, 6), (3, 5))
+        self.assertIs(Colour.WHITE, game.turn())
+        self.assertFalse(game.moves_made)
+
+    def test_move_refusal(self):
+        game: Game = Game()
+        self.assertEqual("there's no piece at (4, 4)", game.move_refusal((4, 4), (4, 3)))
+        self.assertEqual("it's not Colour.BLACK's turn", game.move_refusal((4, 1), (4, 3)))
+        self.assertEqual("(4, 6) to (4, 3) is not a legal move", game.move_refusal((4, 6), (4, 3)))
+        self.assertIsNone(game.move_refusal((4, 6), (4, 4)))
+        self.assertTrue(game.move((4, 6), (4, 4)))
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from chess.model.bitboard import QUEEN
+from chess.model.move import encode_move, move_from, move_to, move_promotion, to_move, to_coords, \
+    to_uci, from_uci, square_name, parse_square
+from chess.model.pieces import Knight
+
+
+class TestMove(TestCase):
+
+    def test_encoding_round_trip(self):
+        move: int = encode_move(12, 4, QUEEN)
+        self.assertEqual(12, move_from(move))
+        self.assertEqual(4, move_to(move))
+        self.assertEqual(QUEEN, move_promotion(move))
+        self.assertTupleEqual(((4, 6), (4, 4)), to_coords(to_move((4, 6), (4, 4))))
+
+    def test_square_names(self):
+        self.assertEqual("a8", square_name(0))
+        self.assertEqual("h1", square_name(63))
+        self.assertEqual(52, parse_square("e2"))
+
+    def test_uci(self):
+        self.assertEqual("e2e4", to_uci(to_move((4, 6), (4, 4))))
+        self.assertEqual("b7b8n", to_uci(to_move((1, 1), (1, 0), Knight)))
+        self.assertEqual(to_move((1, 1), (1, 0), Knight), from_uci("b7b8n"))
+        self.assertRaises(ValueError, from_uci, "e2e9")
+        self.assertRaises(ValueError, from_uci, "e7e8k")
@@ -0,0 +1,126 @@
+import copy
+import pickle
+from unittest import TestCase
+
+from chess.custom_typehints import Colour
+from chess.model.bitboard import to_square
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.move_cache import MoveCache, MOVE_CACHE
+from chess.model.move_generator import generate_move, _generate_bitboard_move
+from chess.model.pieces import King
+
+
+class TestMoveCache(TestCase):
+
+    def setUp(self):
+        MOVE_CACHE.invalidate()
+        MOVE_CACHE.reset_stats()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache: MoveCache = MoveCache(capacity=2)
+        cache.put("a", {(0, 0)})
+        cache.put("b", {(1, 1)})
+        self.assertEqual({(0, 0)}, cache.get("a"))
+        cache.put("c", {(2, 2)})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual({(0, 0)}, cache.get("a"))
+        self.assertEqual({(2, 2)}, cache.get("c"))
+        self.assertEqual((3, 1, 1), (cache.hits, cache.misses, cache.evictions))
+        self.assertEqual(0.75, cache.hit_rate)
+
+        cache.resize(1)
+        self.assertEqual(1, len(cache))
+        self.assertEqual({(2, 2)}, cache.get("c"))
+        cache.invalidate()
+        self.assertEqual(0, len(cache))
+        self.assertRaises(ValueError, MoveCache, -1)
+
+    def test_disabled_cache_keeps_nothing(self):
+        cache: MoveCache = MoveCache(capacity=0)
+        cache.put("a", {(0, 0)})
+        self.assertIsNone(cache.get("a"))
+
+    def test_callers_cannot_change_cached_moves(self):
+        cache: MoveCache = MoveCache()
+        cache.put("a", {(0, 0)})
+        cache.get("a").add((1, 1))
+        self.assertEqual({(0, 0)}, cache.get("a"))
+
+    def test_repeated_queries_hit(self):
+        game: Game = Game()
+        first = generate_move(game.board, (6, 7))
+        second = generate_move(game.board, (6, 7))
+        self.assertEqual({(5, 5), (7, 5)}, first)
+        self.assertEqual(first, second)
+        self.assertEqual((1, 1), (MOVE_CACHE.hits, MOVE_CACHE.misses))
+
+        # the last move is part of the key, it decides en passant
+        generate_move(game.board, (6, 7), last_move=((4, 6), (4, 4)))
+        self.assertEqual(2, MOVE_CACHE.misses)
+
+    def test_mutations_change_the_key(self):
+        game: Game = Game()
+        board = game.board
+        for uci in ("e2e4", "e7e5", "g1f3", "b8c6", "f1c4", "g8f6"):
+            generate_move(board, (4, 7))
+            game.make_move(from_uci(uci))
+            self.assertEqual(_generate_bitboard_move(board, to_square((4, 7)), tuple()),
+                             generate_move(board, (4, 7)))
+        self.assertIn((6, 7), generate_move(board, (4, 7)))
+
+        # a moved king cannot castle, the placement is the same but the key is not
+        board.put_piece((4, 7), King(Colour.WHITE), has_moved=True)
+        self.assertNotIn((6, 7), generate_move(board, (4, 7)))
+
+        game.unmake_move()
+        self.assertEqual(_generate_bitboard_move(board, to_square((4, 7)), tuple()), generate_move(board, (4, 7)))
+
+    def test_mutation_drops_stale_entries(self):
+        game: Game = Game()
+        board = game.board
+        generate_move(board, (6, 7))
+        generate_move(board, (1, 7))
+        self.assertEqual(2, len(MOVE_CACHE))
+        # boards are not watched by default, other games may share the entries
+        self.assertIsNone(board.on_mutation)
+        game.make_move(from_uci("e2e4"))
+        self.assertEqual(2, len(MOVE_CACHE))
+        self.assertEqual({(5, 5), (7, 5)}, generate_move(Game().board, (6, 7)))
+
+        MOVE_CACHE.watch(board)
+        generate_move(board, (6, 7))
+        self.assertEqual(3, len(MOVE_CACHE))
+        board.remove_piece_at((6, 7))
+        self.assertEqual(2, len(MOVE_CACHE))
+
+        # entries of other positions are kept
+        cache: MoveCache = MoveCache()
+        cache.put("a", {(0, 0)}, position=1)
+        cache.put("b", {(1, 1)}, position=2)
+        cache.invalidate(1)
+        self.assertEqual((None, {(1, 1)}), (cache.get("a"), cache.get("b")))
+
+    def test_hook_is_not_copied(self):
+        game: Game = Game()
+        MOVE_CACHE.watch(game.board)
+        generate_move(game.board, (6, 7))
+        unwatched: Game = Game()
+        # the bound hook would carry the whole cache along
+        self.assertEqual(len(pickle.dumps(unwatched)), len(pickle.dumps(game)))
+        for board in (pickle.loads(pickle.dumps(game.board)), copy.deepcopy(game.board), copy.copy(game.board)):
+            self.assertIsNone(board.on_mutation)
+            self.assertEqual(game.board.zobrist_key, board.zobrist_key)
+            self.assertEqual(game.board.codes, board.codes)
+        self.assertIsNotNone(game.board.on_mutation)
+
+    def test_game_move_validation_hits(self):
+        game: Game = Game()
+        self.assertFalse(game.move((4, 6), (4, 3)))
+        self.assertFalse(game.move((4, 6), (3, 5)))
+        self.assertEqual((1, 1), (MOVE_CACHE.hits, MOVE_CACHE.misses))
+        # the status update after the move caches the legal moves of the reply
+        self.assertTrue(game.move((4, 6), (4, 4)))
+        self.assertEqual((2, 2), (MOVE_CACHE.hits, MOVE_CACHE.misses))
+        self.assertTrue(game.move((4, 1), (4, 3)))
+        self.assertEqual((3, 3), (MOVE_CACHE.hits, MOVE_CACHE.misses))
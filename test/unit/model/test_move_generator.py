@@ -1,10 +1,14 @@
+from random import Random
 from typing import Tuple
 from unittest import TestCase
 
 from chess.custom_typehints import Coord2DSet, Colour, Coord2D
 from chess.model.game import Game
+from chess.model.bitboard import BitBoard
 from chess.model.board import Board
-from chess.model.move_generator import generate_move
+from chess.model.fen import game_from_fen
+from chess.model.move import parse_square, to_uci
+from chess.model.move_generator import generate_move, generate_legal_moves
 from chess.model.pieces import Pawn, Rook, Bishop, Queen, Knight, King
 
 
@@ -84,7 +88,7 @@ class TestMoveValidator(TestCase):
         # 1 PB |
         #  ----|----
         # 2    | PW
-        board.put_piece((0, 1), Pawn(Colour.BLACK, has_moved=True))
+        board.put_piece((0, 1), Pawn(Colour.BLACK), has_moved=True)
         board.put_piece((1, 2), Pawn(Colour.WHITE))
         self.assertIn((1, 2), generate_move(board=board, from_coord=(0, 1)))
 
@@ -109,7 +113,7 @@ class TestMoveValidator(TestCase):
         # 1    | PB |
         #  ----|----|----
         # 2 PB |    | PW
-        board[2][0].piece.colour = Colour.BLACK
+        board.put_piece((0, 2), Pawn(Colour.BLACK))
         self.assertNotIn((0, 2), generate_move(board=board, from_coord=(1, 1)), msg=board)
 
     def test_rook_basic_move(self):
@@ -306,18 +310,18 @@ class TestMoveValidator(TestCase):
         self.assertIn((6, 7), king_moveset)
 
         # cannot castle when colour is not the same
-        board[7][7].piece.colour = Colour.BLACK
+        board.put_piece((7, 7), Rook(Colour.BLACK))
         king_moveset: Coord2DSet = generate_move(board=board, from_coord=(4, 7))
         self.assertNotIn((6, 7), king_moveset)
 
         # can castle again when the colour is the same
-        board[7][4].piece.colour = Colour.BLACK
+        board.put_piece((4, 7), King(Colour.BLACK))
         king_moveset: Coord2DSet = generate_move(board=board, from_coord=(4, 7))
         self.assertIn((6, 7), king_moveset)
 
         # cannot castle again when the piece at the other side
         # is not a rook and is not the same colour as King
-        board[7][7].piece = Bishop(Colour.BLACK)
+        board.put_piece((7, 7), Bishop(Colour.BLACK))
         king_moveset: Coord2DSet = generate_move(board=board, from_coord=(4, 7))
         self.assertNotIn((6, 7), king_moveset)
 
@@ -377,3 +381,77 @@ class TestMoveValidator(TestCase):
         last_move: Tuple[Coord2D, Coord2D] = ((1, 1), (1, 3))
         pawn_moveset: Coord2DSet = generate_move(board=board, from_coord=(0, 3), last_move=last_move)
         self.assertIn((1, 2), pawn_moveset)
+
+    def test_bitboard_matches_board(self):
+        # sliding, knight and pawn moves from the attack tables must agree
+        # with the ray walking generator of the list based board
+        random: Random = Random(1)
+        piece_types = [Pawn, Rook, Knight, Bishop, Queen]
+        for _ in range(50):
+            board: Board = Board()
+            bitboard: BitBoard = BitBoard()
+            for _ in range(random.randint(2, 20)):
+                coord: Coord2D = (random.randrange(8), random.randrange(8))
+                piece_type = random.choice(piece_types)
+                colour: Colour = random.choice([Colour.WHITE, Colour.BLACK])
+                board.put_piece(coord, piece_type(colour))
+                bitboard.put_piece(coord, piece_type(colour))
+
+            for y in range(8):
+                for x in range(8):
+                    self.assertSetEqual(generate_move(board=board, from_coord=(x, y)),
+                                        generate_move(board=bitboard, from_coord=(x, y)))
+
+    def test_king_cannot_retreat_along_check(self):
+        board: BitBoard = BitBoard()
+        board.put_piece((4, 4), King(Colour.WHITE))
+        board.put_piece((4, 0), Rook(Colour.BLACK))
+
+        king_moveset: Coord2DSet = generate_move(board=board, from_coord=(4, 4))
+        self.assertNotIn((4, 5), king_moveset)
+        self.assertNotIn((4, 3), king_moveset)
+        self.assertIn((3, 5), king_moveset)
+
+    def test_legal_moves_respect_pins(self):
+        # the e3 bishop is pinned to the file by the rook and cannot move at all,
+        # the d2 bishop is pinned by the queen but may slide along the pin
+        game: Game = game_from_fen("7k/8/4r3/8/1q6/4B3/3B4/4K3 w - - 0 1")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertFalse(any(move.startswith("e3") for move in moves))
+        self.assertSetEqual({"d2c3", "d2b4"}, {move for move in moves if move.startswith("d2")})
+
+    def test_legal_moves_check_evasion(self):
+        # only moving the king or blocking the rook's file is allowed
+        game: Game = game_from_fen("k7/8/8/4r3/8/2N5/8/R3K3 w - - 0 1")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertSetEqual({"e1d1", "e1f1", "e1d2", "e1f2", "c3e2", "c3e4"}, moves)
+
+    def test_en_passant_horizontal_pin(self):
+        # taking en passant would expose the king on the fifth row
+        game: Game = game_from_fen("8/8/8/K2pP2r/8/8/8/7k w - d6 0 1")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertNotIn("e5d6", moves)
+        self.assertIn("e5e6", moves)
+
+        game = game_from_fen("8/8/8/K2pP3/8/8/8/7k w - d6 0 1")
+        self.assertIn("e5d6", {to_uci(move) for move in generate_legal_moves(game)})
+
+    def test_en_passant_needs_an_enemy_pawn(self):
+        # an en passant square with our own knight behind it
+        game: Game = game_from_fen("4k3/8/8/3PN3/8/8/8/4K3 w - - 0 1")
+        game.en_passant = parse_square("e6")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertNotIn("d5e6", moves)
+        self.assertIn("d5d6", moves)
+
+    def test_castling_through_attack(self):
+        game: Game = game_from_fen("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertIn("e1g1", moves)
+        self.assertIn("e1c1", moves)
+
+        # a rook on the f-file stops kingside castling only
+        game = game_from_fen("4kr2/8/8/8/8/8/8/R3K2R w KQ - 0 1")
+        moves = {to_uci(move) for move in generate_legal_moves(game)}
+        self.assertNotIn("e1g1", moves)
+        self.assertIn("e1c1", moves)
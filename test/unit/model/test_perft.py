@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.move import to_uci
+from chess.model.perft import perft, divide
+
+# well known positions and their node counts by depth
+KIWIPETE: str = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+ENDGAME: str = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+PROMOTIONS: str = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"
+TRICKY: str = "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"
+
+
+class TestPerft(TestCase):
+
+    def assertPerft(self, fen: str, counts):
+        game = game_from_fen(fen)
+        for depth, expected in enumerate(counts, start=1):
+            self.assertEqual(expected, perft(game, depth), msg=f"{fen} depth {depth}")
+
+    def test_starting_position(self):
+        self.assertPerft(STARTING_FEN, [20, 400, 8902])
+
+    def test_kiwipete(self):
+        self.assertPerft(KIWIPETE, [48, 2039])
+
+    def test_endgame(self):
+        self.assertPerft(ENDGAME, [14, 191, 2812])
+
+    def test_promotions(self):
+        self.assertPerft(PROMOTIONS, [6, 264])
+
+    def test_tricky(self):
+        self.assertPerft(TRICKY, [44, 1486])
+
+    def test_divide(self):
+        counts = divide(game_from_fen(STARTING_FEN), 2)
+        self.assertEqual(20, len(counts))
+        self.assertEqual(400, sum(counts.values()))
+        self.assertEqual(20, {to_uci(move): count for move, count in counts.items()}["e2e4"])
@@ -0,0 +1,93 @@
+import bz2
+import gzip
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+from chess.model.fen import game_from_fen, game_to_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.pgn import PgnGame, read_games, parse_san, move_to_san, game_to_pgn, write_games
+
+SAMPLE: str = """[Event "Casual"]
+[White "Anderssen"]
+[Black "Kieseritzky"]
+[Result "1-0"]
+
+1. e4 e5 2. f4 exf4 3. Bc4 Qh4+ {the queen comes out
+early} 4. Kf1 b5 (4... d6 5. Nf3) 5. Bxb5 Nf6 6. Nf3 Qh6 7. d3 Nh5 8. Nh4 Qg5
+9. Nf5 c6 10. g4 Nf6 11. Rg1 cxb5 12. h4 Qg6 13. h5 Qg5 14. Qf3 Ng8 15. Bxf4
+Qf6 16. Nc3 Bc5 17. Nd5 Qxb2 18. Bd6 Bxg1 19. e5 Qxa1+ 20. Ke2 Na6 21. Nxg7+
+Kd8 22. Qf6+ Nxf6 23. Be7# 1-0
+
+[Event "Short"]
+[Result "*"]
+
+1. e4 $1 e5 2. Nf3 ; a comment
+Nc6 *
+"""
+
+
+class TestPgn(TestCase):
+
+    def test_read_games(self):
+        games = list(read_games(io.StringIO(SAMPLE)))
+        self.assertEqual(2, len(games))
+        self.assertEqual("Anderssen", games[0].headers["White"])
+        self.assertEqual("1-0", games[0].result)
+        self.assertEqual(45, len(games[0].moves))
+        self.assertEqual("Be7#", games[0].moves[-1])
+        self.assertEqual(["e4", "e5", "Nf3", "Nc6"], games[1].moves)
+
+        final: Game = games[0].replay()
+        self.assertEqual("r1bk3r/p2pBpNp/n4n2/1p1NP2P/6P1/3P4/P1P1K3/q5b1 b - - 1 23", game_to_fen(final))
+
+    def test_parse_san(self):
+        game: Game = game_from_fen("4k3/1P6/8/8/8/8/R6R/4K3 w - - 0 1")
+        self.assertEqual(from_uci("a2d2"), parse_san(game, "Rad2"))
+        self.assertEqual(from_uci("b7b8n"), parse_san(game, "b8=N"))
+        with self.assertRaises(ValueError):
+            parse_san(game, "Rd2")
+        with self.assertRaises(ValueError):
+            parse_san(game, "Nf3")
+
+        game = game_from_fen("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1")
+        self.assertEqual(from_uci("e8c8"), parse_san(game, "O-O-O"))
+
+    def test_move_to_san(self):
+        game: Game = game_from_fen("4k3/8/8/8/8/8/R6R/4K3 w - - 0 1")
+        self.assertEqual("Rad2", move_to_san(game, from_uci("a2d2")))
+        self.assertEqual("Ra8+", move_to_san(game, from_uci("a2a8")))
+        game = game_from_fen("k7/8/1K6/8/8/8/8/7R w - - 0 1")
+        self.assertEqual("Rh8#", move_to_san(game, from_uci("h1h8")))
+
+    def test_write_and_read_back(self):
+        game: Game = list(read_games(io.StringIO(SAMPLE)))[0].replay()
+        fen: str = game_to_fen(game)
+        text: str = game_to_pgn(game, {"White": "Anderssen"}, result="1-0")
+        self.assertEqual(fen, game_to_fen(game))
+        self.assertTrue(text.startswith('[Event "?"]'))
+        self.assertTrue(all(len(line) <= 80 for line in text.splitlines()))
+
+        record: PgnGame = next(read_games(io.StringIO(text)))
+        self.assertEqual("Anderssen", record.headers["White"])
+        self.assertEqual(fen, game_to_fen(record.replay()))
+
+    def test_start_from_fen(self):
+        game: Game = game_from_fen("4k3/8/8/8/8/8/8/R3K3 b Q - 0 12")
+        game.make_move(from_uci("e8d7"))
+        game.make_move(from_uci("e1c1"))
+        text: str = game_to_pgn(game)
+        self.assertIn('[FEN "4k3/8/8/8/8/8/8/R3K3 b Q - 0 12"]', text)
+        self.assertIn("12... Kd7 13. O-O-O+ *", text)
+        self.assertEqual(game_to_fen(game), game_to_fen(next(read_games(io.StringIO(text))).replay()))
+
+    def test_compressed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, opener in (("games.pgn.gz", gzip.open), ("games.pgn.bz2", bz2.open)):
+                path: str = os.path.join(directory, name)
+                self.assertEqual(2, write_games(path, [SAMPLE.split("\n\n[")[0], "[" + SAMPLE.split("\n\n[")[1]]))
+                with opener(path, "rt") as handle:
+                    self.assertIn("Kieseritzky", handle.read())
+                self.assertEqual([45, 4], [len(game.moves) for game in read_games(path)])
@@ -1,7 +1,23 @@
+import copy
+import pickle
 from unittest import TestCase
 
-from chess.model.pieces import Piece
+from chess.custom_typehints import Colour
+from chess.model.pieces import Piece, Pawn, King
 
 
 class TestPiece(TestCase):
-    pass
+
+    def test_pieces_are_shared(self):
+        self.assertIs(Pawn(Colour.WHITE), Pawn(Colour.WHITE))
+        self.assertIsNot(Pawn(Colour.WHITE), Pawn(Colour.BLACK))
+        self.assertIsNot(Pawn(Colour.WHITE), King(Colour.WHITE))
+        self.assertIs(Pawn(Colour.BLACK), pickle.loads(pickle.dumps(Pawn(Colour.BLACK))))
+        self.assertIs(King(Colour.BLACK), copy.deepcopy(King(Colour.BLACK)))
+
+    def test_pieces_are_immutable(self):
+        piece: Piece = Pawn(Colour.WHITE)
+        self.assertFalse(hasattr(piece, "__dict__"))
+        with self.assertRaises(AttributeError):
+            piece.colour = Colour.BLACK
+        self.assertIs(Colour.WHITE, Pawn(Colour.WHITE).colour)
@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, BUCKET_BYTES
+
+
+class TestTranspositionTable(TestCase):
+
+    def test_size_is_bounded(self):
+        table: TranspositionTable = TranspositionTable(size_mb=1)
+        self.assertEqual(1024 * 1024, table.size_bytes)
+        self.assertEqual(1024 * 1024 // 16, len(table))
+
+    def test_store_and_probe(self):
+        table: TranspositionTable = TranspositionTable(size_mb=0.01)
+        key: int = Game().zobrist_key
+        self.assertIsNone(table.probe(key))
+
+        table.store(key, from_uci("e2e4"), -35, 6, EXACT)
+        entry = table.probe(key)
+        self.assertEqual((from_uci("e2e4"), -35, 6, EXACT), tuple(entry))
+        self.assertEqual(1, table.hits)
+        self.assertEqual(1, table.misses)
+        self.assertEqual(0.5, table.hit_rate)
+
+        # scores beyond 16 bits are clamped
+        table.store(key, 0, 10 ** 6, 6, LOWER_BOUND)
+        self.assertEqual(32767, table.probe(key).score)
+        # a store without a move keeps the previous best move
+        self.assertEqual(from_uci("e2e4"), table.probe(key).move)
+
+    def test_replacement_policy(self):
+        table: TranspositionTable = TranspositionTable(buffer=bytearray(BUCKET_BYTES))
+        self.assertEqual(1, table.buckets)
+
+        table.store(1, 1, 0, 8, EXACT)
+        # shallower results go to the always-replace slot
+        table.store(2, 2, 0, 3, UPPER_BOUND)
+        table.store(3, 3, 0, 2, UPPER_BOUND)
+        self.assertEqual(8, table.probe(1).depth)
+        self.assertIsNone(table.probe(2))
+        self.assertEqual(3, table.probe(3).move)
+        self.assertEqual(1, table.collisions)
+
+        # a deeper result takes over the depth-preferred slot
+        table.store(4, 4, 0, 9, EXACT)
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(9, table.probe(4).depth)
+
+        # entries of an older search can be replaced by shallower ones
+        table.new_search()
+        table.store(5, 5, 0, 1, EXACT)
+        self.assertIsNone(table.probe(4))
+        self.assertEqual(1, table.probe(5).depth)
+
+    def test_shared_buffer(self):
+        buffer: bytearray = bytearray(BUCKET_BYTES * 64)
+        writer: TranspositionTable = TranspositionTable(buffer=buffer)
+        reader: TranspositionTable = TranspositionTable(buffer=buffer)
+        writer.store(12345, 7, 100, 4, EXACT)
+        self.assertEqual(100, reader.probe(12345).score)
+
+        # a torn entry fails the key check
+        buffer[(12345 % 64) * 32 + 8] ^= 1
+        self.assertIsNone(reader.probe(12345))
+
+    def test_hashfull(self):
+        table: TranspositionTable = TranspositionTable(buffer=bytearray(BUCKET_BYTES * 4))
+        self.assertEqual(0, table.hashfull())
+        for key in range(4):
+            table.store(key, 0, 0, 1, EXACT)
+        self.assertEqual(500, table.hashfull())
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from unittest import TestCase
+
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci, to_uci
+from chess.model.move_generator import generate_legal_moves
+from chess.model.validation import MoveValidator, ValidationResult, validate_moves
+
+KIWIPETE: str = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+MATE_IN_ONE: str = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+class TestValidation(TestCase):
+
+    def test_legal_move(self):
+        result: ValidationResult = MoveValidator().validate(STARTING_FEN, "e2e4")
+        game: Game = game_from_fen(STARTING_FEN)
+        game.make_move(from_uci("e2e4"))
+        self.assertEqual(ValidationResult(STARTING_FEN, "e2e4", True, zobrist_key=game.zobrist_key), result)
+
+    def test_rejected(self):
+        validator: MoveValidator = MoveValidator()
+        for fen, move, error in ((STARTING_FEN, "e2e5", "illegal move"),
+                                 (STARTING_FEN, "e2", "invalid move 'e2'"),
+                                 ("8/8/8 w - -", "e2e4", "invalid position: FEN placement needs 8 rows: '8/8/8'"),
+                                 ("8/8/8/8/8/8/4P3/4K3 w - - 0 1", "e2e4",
+                                  "invalid position: each side needs exactly one king"),
+                                 ("4k3/8/8/8/8/8/8/3RK3 b - - 0 1", "e8d8", "illegal move"),
+                                 ("4k3/4R3/8/8/8/8/8/4K3 w - - 0 1", "e1d1",
+                                  "invalid position: the side not to move is in check"),
+                                 ("4k3/8/8/3pP3/8/8/8/4K3 w - e9 0 1", "e5d6",
+                                  "invalid position: invalid en passant square 'e9'"),
+                                 ("4k3/8/8/3pP3/8/8/8/4K3 w - d3 0 1", "e5d6",
+                                  "invalid position: invalid en passant square 'd3'"),
+                                 ("4k3/8/8/4P3/8/8/8/4K3 w - d6 0 1", "e5d6",
+                                  "invalid position: no pawn can be taken en passant"),
+                                 ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 -1 1", "e5d6",
+                                  "invalid position: FEN move clocks out of range: "
+                                  "'4k3/8/8/3pP3/8/8/8/4K3 w - d6 -1 1'"),
+                                 ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 0", "e5d6",
+                                  "invalid position: FEN move clocks out of range: "
+                                  "'4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 0'")):
+            with self.subTest(fen=fen, move=move):
+                result: ValidationResult = validator.validate(fen, move)
+                self.assertFalse(result.legal)
+                self.assertEqual(error, result.error)
+                self.assertIsNone(result.zobrist_key)
+
+    def test_check_and_mate(self):
+        validator: MoveValidator = MoveValidator()
+        mate: ValidationResult = validator.validate(MATE_IN_ONE, "a1a8")
+        self.assertEqual((True, True, False), (mate.check, mate.checkmate, mate.stalemate))
+        check: ValidationResult = validator.validate("4k3/8/8/8/8/8/8/R3K3 w - - 0 1", "a1a8")
+        self.assertEqual((True, False), (check.check, check.checkmate))
+        stalemate: ValidationResult = validator.validate("k7/8/1K6/8/8/8/8/2Q5 w - - 0 1", "c1c7")
+        self.assertEqual((False, False, True), (stalemate.check, stalemate.checkmate, stalemate.stalemate))
+
+    def test_validator_leaves_position_unchanged(self):
+        validator: MoveValidator = MoveValidator()
+        validator.validate(KIWIPETE, "e1g1")
+        key: int = validator.game.zobrist_key
+        for move in generate_legal_moves(game_from_fen(KIWIPETE)):
+            self.assertTrue(validator.validate(KIWIPETE, to_uci(move)).legal)
+        self.assertEqual(key, validator.game.zobrist_key)
+
+    def test_batch_keeps_order(self):
+        pairs: List[Tuple[str, str]] = [(STARTING_FEN, "e2e4"), (KIWIPETE, "e1g1"), (STARTING_FEN, "e2e5"),
+                                        (MATE_IN_ONE, "a1a8"), (KIWIPETE, "e1c1"), ("bad", "e2e4")] * 5
+        expected: List[ValidationResult] = [MoveValidator().validate(fen, move) for fen, move in pairs]
+        self.assertEqual(expected, validate_moves(iter(pairs), chunk_size=4))
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(expected, validate_moves(pairs, executor=executor, chunk_size=4))
+        self.assertEqual(expected, validate_moves(pairs, workers=2, chunk_size=8))
+        self.assertEqual([], validate_moves([], workers=2))
+
+    def test_batch_reports_bad_state_fields(self):
+        en_passant: str = "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1"
+        results: List[ValidationResult] = validate_moves([(en_passant, "e5d6"),
+                                                          (en_passant.replace("d6", "d9"), "e5d6"),
+                                                          (en_passant.replace(" 0 1", " 0 -3"), "e5d6")])
+        self.assertEqual([True, False, False], [result.legal for result in results])
+        self.assertTrue(all(result.error.startswith("invalid position: ") for result in results[1:]))
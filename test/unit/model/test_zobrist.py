@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.game import Game
+from chess.model.move import from_uci
+from chess.model.move_generator import generate_legal_moves
+
+
+def play(game: Game, *moves: str) -> Game:
+    for move in moves:
+        game.make_move(from_uci(move))
+    return game
+
+
+class TestZobrist(TestCase):
+
+    def test_transpositions_share_a_key(self):
+        first: Game = play(Game(), "e2e4", "e7e5", "g1f3")
+        second: Game = play(Game(), "g1f3", "e7e5", "e2e4")
+        self.assertEqual(first.zobrist_key, second.zobrist_key)
+
+        # knights out and back again restores the start position
+        start: int = Game().zobrist_key
+        self.assertEqual(start, play(Game(), "g1f3", "g8f6", "f3g1", "f6g8").zobrist_key)
+
+    def test_state_is_part_of_the_key(self):
+        self.assertNotEqual(game_from_fen(STARTING_FEN).zobrist_key,
+                            game_from_fen(STARTING_FEN.replace(" w ", " b ")).zobrist_key)
+        self.assertNotEqual(game_from_fen(STARTING_FEN).zobrist_key,
+                            game_from_fen(STARTING_FEN.replace("KQkq", "Kkq")).zobrist_key)
+
+        # the en passant square only counts when a pawn can take on it
+        fen: str = "4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1"
+        self.assertNotEqual(game_from_fen(fen).zobrist_key, game_from_fen(fen.replace("e3", "-")).zobrist_key)
+        fen = "4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1"
+        self.assertEqual(game_from_fen(fen).zobrist_key, game_from_fen(fen.replace("e3", "-")).zobrist_key)
+
+    def test_incremental_key_matches_fresh_position(self):
+        game: Game = play(Game(), "e2e4", "d7d5", "e4d5", "g8f6", "f1b5", "c7c6", "g1f3", "c6b5", "e1g1")
+        fresh: Game = game_from_fen("rnbqkb1r/pp2pppp/5n2/1p1P4/8/5N2/PPPP1PPP/RNBQ1RK1 b kq - 1 5")
+        self.assertEqual(fresh.zobrist_key, game.zobrist_key)
+
+    def test_make_unmake_restores_key(self):
+        game: Game = game_from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        key: int = game.zobrist_key
+        for move in generate_legal_moves(game):
+            game.make_move(move)
+            self.assertNotEqual(key, game.zobrist_key)
+            game.unmake_move()
+            self.assertEqual(key, game.zobrist_key)
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+from unittest import TestCase
+
+from chess.data.book import OpeningBook, build_book
+from chess.net.server import GameServer, engine_reply, init_engine_worker, _worker
+from chess.model.fen import STARTING_FEN, game_from_fen
+from chess.model.pgn import PgnGame
+
+
+class Client:
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+
+    @classmethod
+    async def connect(cls, server: GameServer) -> "Client":
+        return cls(*await asyncio.open_connection("127.0.0.1", server.port))
+
+    async def send(self, line: str) -> None:
+        self.writer.write(line.encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self) -> str:
+        return (await asyncio.wait_for(self.reader.readline(), 10)).decode().strip()
+
+    async def close(self) -> None:
+        self.writer.close()
+
+
+class FailingExecutor(Executor):
+
+    def __init__(self, error: Exception) -> None:
+        self.error: Exception = error
+        self.calls: int = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        self.calls += 1
+        future: Future = Future()
+        future.set_exception(self.error)
+        return future
+
+
+class TestGameServer(TestCase):
+
+    def run_server(self, scenario, **options) -> None:
+        async def run():
+            with ThreadPoolExecutor(1) as executor:
+                server: GameServer = GameServer(executor=executor, engine_depth=1, **options)
+                await server.start(port=0)
+                try:
+                    await scenario(server)
+                finally:
+                    await server.close()
+        asyncio.run(run())
+
+    def test_two_players(self):
+        async def scenario(server: GameServer):
+            white: Client = await Client.connect(server)
+            await white.send("new")
+            self.assertEqual("game 1 white", await white.receive())
+            self.assertEqual(f"state 1 normal - {STARTING_FEN}", await white.receive())
+
+            black: Client = await Client.connect(server)
+            await black.send("join 1")
+            self.assertEqual("game 1 black", await black.receive())
+            await black.receive()
+            watcher: Client = await Client.connect(server)
+            await watcher.send("join 1")
+            self.assertEqual("game 1 watching", await watcher.receive())
+            await watcher.receive()
+
+            await black.send("move 1 e7e5")
+            self.assertEqual("error not your turn", await black.receive())
+            await white.send("move 1 e2e5")
+            self.assertEqual("error (4, 6) to (4, 3) is not a legal move", await white.receive())
+            await white.send("move 1 e2e4")
+            for client in (white, black, watcher):
+                self.assertEqual("state 1 normal e2e4 rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+                                 await client.receive())
+
+            # the seat of a player who left is free again
+            await black.send("leave 1")
+            await black.send("ping")
+            self.assertEqual("pong", await black.receive())
+            await black.close()
+            await watcher.send("leave 1")
+            await watcher.send("join 1")
+            self.assertEqual("game 1 black", await watcher.receive())
+            await white.close()
+            await watcher.close()
+
+        self.run_server(scenario)
+
+    def test_engine_replies(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            await client.send("new black engine")
+            self.assertEqual("game 1 black", await client.receive())
+            await client.receive()
+            # the engine plays white's first move in the executor
+            reply: List[str] = (await client.receive()).split()
+            self.assertEqual(["state", "1", "normal"], reply[:3])
+            self.assertNotEqual("-", reply[3])
+            await client.send("ping")
+            self.assertEqual("pong", await client.receive())
+            await client.close()
+
+        self.run_server(scenario)
+
+    def test_engine_failure_closes_the_game(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            await client.send("new black engine")
+            await client.receive()
+            await client.receive()
+            self.assertEqual("error 1 engine failed", await client.receive())
+            self.assertEqual("closed 1", await client.receive())
+            self.assertEqual({}, server.sessions)
+            await client.close()
+
+        async def run():
+            server: GameServer = GameServer(executor=FailingExecutor(RuntimeError("search crashed")), engine_depth=1)
+            await server.start(port=0)
+            try:
+                await scenario(server)
+            finally:
+                await server.close()
+        asyncio.run(run())
+
+    def test_broken_pool_is_replaced(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            await client.send("new black engine")
+            await client.receive()
+            await client.receive()
+            self.assertEqual("error 1 engine failed", await client.receive())
+            # searched again on a fresh pool
+            self.assertEqual(["state", "1", "normal"], (await client.receive()).split()[:3])
+            self.assertNotIsInstance(server._executor, FailingExecutor)
+            self.assertEqual(0, server.sessions[1].engine_failures)
+            await client.close()
+
+        async def run():
+            broken: FailingExecutor = FailingExecutor(BrokenProcessPool("a worker died"))
+            server: GameServer = GameServer(executor=broken, engine_depth=1, workers=1)
+            # the server replaces only a pool it owns
+            server._own_executor = True
+            await server.start(port=0)
+            try:
+                await scenario(server)
+            finally:
+                await server.close()
+            self.assertEqual(1, broken.calls)
+        asyncio.run(run())
+
+    def test_engine_plays_book_moves(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            await client.send("new black engine")
+            await client.receive()
+            await client.receive()
+            self.assertEqual("state 1 normal d2d4 rnbqkbnr/pppppppp/8/8/3P4/8/PPP1PPPP/RNBQKBNR b KQkq d3 0 1",
+                             await client.receive())
+            await client.close()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "book.bin")
+            build_book([PgnGame(moves=["d4"], result="1-0")], path)
+            with OpeningBook(path) as book:
+                self.run_server(scenario, book=book)
+
+    def test_bad_commands(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            for line, reply in (("dance", "error unknown command dance"), ("move 7 e2e4", "error unknown game"),
+                                ("new purple", "error unknown option purple")):
+                await client.send(line)
+                self.assertEqual(reply, await client.receive())
+            await client.send("new")
+            await client.receive()
+            await client.receive()
+            await client.send("move 1 e2")
+            self.assertEqual("error invalid move 'e2'", await client.receive())
+            await client.close()
+
+        self.run_server(scenario)
+
+    def test_idle_games_are_evicted(self):
+        async def scenario(server: GameServer):
+            client: Client = await Client.connect(server)
+            await client.send("new")
+            await client.receive()
+            await client.receive()
+            self.assertEqual([], server.sweep())
+            self.assertIn(1, server.sessions)
+            await asyncio.sleep(0.1)
+            self.assertEqual([1], server.sweep())
+            self.assertEqual("closed 1", await client.receive())
+            await client.send("state 1")
+            self.assertEqual("error unknown game", await client.receive())
+            await client.close()
+
+        self.run_server(scenario, idle_timeout=0.05)
+
+    def test_finished_games_are_evicted(self):
+        async def scenario(server: GameServer):
+            white: Client = await Client.connect(server)
+            black: Client = await Client.connect(server)
+            await white.send("new")
+            await black.send("join 1")
+            for client in (white, black):
+                await client.receive()
+                await client.receive()
+            for client, move in ((white, "f2f3"), (black, "e7e5"), (white, "g2g4"), (black, "d8h4")):
+                await client.send(f"move 1 {move}")
+                await white.receive()
+                state: str = await black.receive()
+            self.assertTrue(state.startswith("state 1 black_win d8h4"))
+            await white.send("move 1 a2a3")
+            self.assertEqual("error the game is over", await white.receive())
+            await asyncio.sleep(0.1)
+            self.assertEqual([1], server.sweep())
+            await white.close()
+            await black.close()
+
+        self.run_server(scenario, finished_timeout=0.05)
+
+    def test_engine_reply(self):
+        self.assertEqual(4, len(engine_reply(STARTING_FEN, 0.1, depth=1)))
+        # black is mated
+        self.assertIsNone(engine_reply("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1", 0.1, depth=1))
+
+    def test_engine_worker_keeps_its_table(self):
+        init_engine_worker(hash_mb=1)
+        searcher = _worker.searcher
+        engine_reply(STARTING_FEN, 0.1, depth=2)
+        engine_reply("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1", 0.1, depth=2)
+        # the same searcher answered both, its table still knows the first position
+        self.assertIs(searcher, _worker.searcher)
+        self.assertIsNotNone(searcher.table.probe(game_from_fen(STARTING_FEN).zobrist_key))